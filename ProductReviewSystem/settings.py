@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'products.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -90,6 +91,40 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # throttle buckets, any backend with atomic incr() works (e.g. Redis/Memcached in production)
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+THROTTLE_CACHE = 'throttle'
+
+
+## password hashing on a bounded pool (products.auth); logins rehash hashes made with other ITERATIONS
+PASSWORD_HASHERS = [
+    'products.auth.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+AUTHENTICATION_BACKENDS = ['products.auth.PooledModelBackend']
+AUTH_HASHING = {
+    'ITERATIONS': 600000,
+    'WORKERS': 2,
+    'MAX_PENDING': 16,
+    'TIMEOUT': 10,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -141,8 +176,37 @@ REST_FRAMEWORK = {
     ),
 
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'] ,
+
+    # token buckets for write endpoints (products.throttling.TokenBucketThrottle)
+    'DEFAULT_THROTTLE_RATES': {
+        'review_react': '30/min',
+        'review_report': '10/min',
+        'review_comment': '20/min',
+    },
+
+    # orjson when installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'products.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+## gzip / brotli compression of large responses (products.middleware.CompressionMiddleware)
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'EXCLUDE_PATHS': ['/admin/', '/api/token/'],  # token responses carry secrets
 }
 
+## reviews older than this are moved to the archive tables by `manage.py archive_reviews`
+REVIEW_ARCHIVE_AFTER_DAYS = 365
+
+## raise on lazy foreign-key / deferred-column loads while serializing (products/lazyloads.py);
+## the test runner turns it on
+FORBID_LAZY_LOADS = False
+TEST_RUNNER = 'products.testrunner.TestRunner'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -10,7 +10,12 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ProductReviewSystem.settings')
 
 application = get_wsgi_application()
+
+# Load the URLconf (and with it every view module) now rather than on the first request:
+# servers that preload the app (gunicorn --preload) then do it once before forking workers
+get_resolver().url_patterns
@@ -1,3 +1,69 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Product, Review, ReviewComment, Interaction, Report, Notification, ArchivedReview
+
+# Changelists show __str__ and foreign keys of every row: list_select_related joins them into
+# the page query instead of one query per row, raw_id_fields keeps the edit forms from
+# loading every user / product / review into a <select>, and show_full_result_count=False
+# skips the unfiltered COUNT(*) over the big tables.
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('name', 'price', 'rating_count', 'rating_avg', 'created_at')
+    search_fields = ('name',)
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'is_visible', 'is_offensive', 'created_at')
+    list_select_related = ('product', 'user')  # Review.__str__ shows both
+    list_filter = ('is_visible', 'rating')
+    raw_id_fields = ('product', 'user')
+    show_full_result_count = False
+
+
+@admin.register(ReviewComment)
+class ReviewCommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'depth', 'reply_count', 'created_at')
+    list_select_related = ('user',)  # __str__ uses review_id, no review join
+    raw_id_fields = ('review', 'user', 'parent')
+    show_full_result_count = False
+
+
+@admin.register(Interaction)
+class InteractionAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('reaction',)
+    raw_id_fields = ('review', 'user')
+    show_full_result_count = False
+
+
+@admin.register(Report)
+class ReportAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'reason', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('review', 'user')
+    show_full_result_count = False
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'is_read', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('is_read',)
+    # NotificationInbox.unread_count only follows inbox.notify / inbox.mark_read, so the admin
+    # can't create notifications or change who owns them or whether they are read
+    readonly_fields = ('user', 'is_read')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ArchivedReview)
+class ArchivedReviewAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'rating', 'created_at', 'archived_at')  # __str__ uses ids only
+    raw_id_fields = ('product', 'user')
+    show_full_result_count = False
@@ -0,0 +1,300 @@
+import heapq
+import os
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from time import process_time
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Max, Q, Sum
+from django.db.models.functions import Cast
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import get_current_timezone, localdate
+
+from . import events
+from . import sentiment
+from .moderation import is_offensive
+from .models import ArchivedReview, ChangeEvent, EventCursor, Interaction, ProductAnalyticsDay, Review
+
+# Analytics engine. Product analytics and general analytics read ProductAnalyticsDay
+# (one row per product and review day) instead of querying the base tables themselves,
+# so their numbers agree. The dated admin report is products/moderation.py.
+#
+# A run reads the delta since three stored high-water marks: new reviews, new reactions
+# and new change-feed events (approvals, edits, deletes, archiving...). It collects the
+# (product, day) rows they touch and recomputes those rows from the base tables in one
+# pass. Rows and marks are saved in the same transaction and rows are recomputed from
+# scratch, never incremented, so repeating or interrupting a run can't double count.
+
+WINDOW_DAYS = 30
+TOP_WORDS = 5
+BATCH_SIZE = 1000
+REFRESH_DAYS = 100
+
+WORD_RE = re.compile(r'\b\w+\b')
+
+REVIEWS_MARK = 'analytics.reviews'
+INTERACTIONS_MARK = 'analytics.interactions'
+EVENTS_MARK = 'analytics.events'
+MARKS = (REVIEWS_MARK, INTERACTIONS_MARK, EVENTS_MARK)
+
+
+def load_positions():
+    saved = dict(EventCursor.objects.filter(name__in=MARKS).values_list('name', 'position'))
+    return {name: saved.get(name, 0) for name in MARKS}
+
+
+def read_delta(positions, batch_size):
+    # (product_id, day) keys touched since `positions`, reading at most batch_size rows per source;
+    # also tells whether a source had more rows than that
+    keys = set()
+    new_positions = dict(positions)
+    full = False
+
+    reviews = list(
+        Review.objects.filter(id__gt=positions[REVIEWS_MARK]).order_by('id')
+        .values_list('id', 'product_id', 'created_at')[:batch_size]
+    )
+    for _, product_id, created_at in reviews:
+        keys.add((product_id, localdate(created_at)))
+    if reviews:
+        new_positions[REVIEWS_MARK] = reviews[-1][0]
+    full |= len(reviews) == batch_size
+
+    reactions = list(
+        Interaction.objects.filter(id__gt=positions[INTERACTIONS_MARK]).order_by('id')
+        .values_list('id', 'review__product_id', 'review__created_at')[:batch_size]
+    )
+    for _, product_id, created_at in reactions:
+        keys.add((product_id, localdate(created_at)))
+    if reactions:
+        new_positions[INTERACTIONS_MARK] = reactions[-1][0]
+    full |= len(reactions) == batch_size
+
+    feed = events.read_feed(positions[EVENTS_MARK], batch_size)
+    review_ids = {event.review_id for event in feed if event.review_id}
+    found = {
+        review_id: (product_id, created_at)
+        for review_id, product_id, created_at in
+        Review.objects.filter(id__in=review_ids).values_list('id', 'product_id', 'created_at')
+    }
+    for event in feed:
+        if event.review_id in found:
+            product_id, created_at = found[event.review_id]
+            keys.add((product_id, localdate(created_at)))
+        elif 'product_id' in event.payload and 'created_at' in event.payload:
+            # the review is gone (review.deleted): use the state recorded in the event
+            keys.add((event.payload['product_id'], localdate(parse_datetime(event.payload['created_at']))))
+        if 'previous_product_id' in event.payload:
+            # review.updated: the row the review was in before the update lost it
+            keys.add((event.payload['previous_product_id'], localdate(parse_datetime(event.payload['previous_created_at']))))
+    if feed:
+        new_positions[EVENTS_MARK] = feed[-1].id
+    full |= len(feed) == batch_size
+
+    return keys, new_positions, full
+
+
+def iter_review_rows(condition=Q(), chunk_size=BATCH_SIZE):
+    # (id, product_id, created_at, rating, is_visible, score, text, likes) of hot and archived
+    # reviews, in id order, streamed with .iterator(); likes of hot reviews come from one grouped query
+    fields = ('id', 'product_id', 'created_at', 'rating', 'is_visible', 'sentiment_score', 'review_text')
+    hot = Review.objects.filter(condition)
+    likes = dict(
+        Interaction.objects.filter(reaction='like', review__in=hot.values('id'))
+        .values('review_id').annotate(n=Count('id')).order_by().values_list('review_id', 'n')
+    )
+    return heapq.merge(
+        (row + (likes.get(row[0], 0),) for row in hot.order_by('id').values_list(*fields).iterator(chunk_size)),
+        ArchivedReview.objects.filter(condition).order_by('id').values_list(*fields, 'likes_count').iterator(chunk_size),
+    )
+
+
+def compute_rows(reviews):
+    # every metric of every (product, day) present in `reviews`, in a single pass
+    rows, words = {}, defaultdict(Counter)
+    for review_id, product_id, created_at, rating, is_visible, score, text, likes in reviews:
+        key = (product_id, localdate(created_at))
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = ProductAnalyticsDay(product_id=product_id, day=key[1])
+        if not is_visible:
+            row.pending_count += 1
+            continue
+
+        row.review_count += 1
+        row.rating_sum += rating
+        row.max_rating = max(row.max_rating or 0, rating)
+        if score is not None:
+            row.sentiment_sum += score
+            row.sentiment_count += 1
+            polarity = sentiment.label(score)
+            if polarity == 'positive':
+                row.positive_count += 1
+            elif polarity == 'negative':
+                row.negative_count += 1
+        if rating <= 2:
+            row.low_rated_count += 1
+        if is_offensive(text):
+            row.offensive_count += 1
+        if likes > row.top_review_likes:  # ids ascend, so ties keep the oldest review
+            row.top_review_id, row.top_review_likes = review_id, likes
+        words[key].update(WORD_RE.findall(text.lower()))
+
+    for key, row in rows.items():
+        row.word_counts = dict(words[key])
+    return list(rows.values())
+
+
+def refresh(keys):
+    # recompute the given (product_id, day) rows; the days are read together, REFRESH_DAYS at a time
+    by_day = defaultdict(set)
+    for product_id, day in keys:
+        by_day[day].add(product_id)
+    tz = get_current_timezone()
+    days = sorted(by_day)
+    for start in range(0, len(days), REFRESH_DAYS):
+        reviews, rows = Q(), Q()
+        for day in days[start:start + REFRESH_DAYS]:
+            reviews |= Q(
+                product_id__in=by_day[day],
+                created_at__gte=datetime.combine(day, time.min, tzinfo=tz),
+                created_at__lt=datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz),
+            )
+            rows |= Q(day=day, product_id__in=by_day[day])
+        ProductAnalyticsDay.objects.filter(rows).delete()
+        ProductAnalyticsDay.objects.bulk_create(compute_rows(iter_review_rows(reviews)), batch_size=500)
+
+
+def step(batch_size=BATCH_SIZE):
+    # process one batch of the delta; returns (whether more may be waiting, rows recomputed)
+    with transaction.atomic():
+        positions = load_positions()
+        keys, new_positions, full = read_delta(positions, batch_size)
+        refresh(keys)
+        for name in MARKS:
+            if new_positions[name] != positions[name]:
+                events.save_position(name, new_positions[name])
+    return full, len(keys)
+
+
+def run(batch_size=BATCH_SIZE):
+    # process the whole delta; returns the number of rows recomputed
+    total = 0
+    while True:
+        more, refreshed = step(batch_size)
+        total += refreshed
+        if not more:
+            return total
+
+
+def skip_delta():
+    # move the marks to the latest rows, for a pass that recomputes everything
+    events.save_position(REVIEWS_MARK, Review.objects.aggregate(last=Max('id'))['last'] or 0)
+    events.save_position(INTERACTIONS_MARK, Interaction.objects.aggregate(last=Max('id'))['last'] or 0)
+    events.save_position(EVENTS_MARK, ChangeEvent.objects.aggregate(last=Max('id'))['last'] or 0)
+
+
+def rebuild():
+    # recompute every row in one pass over all reviews (after writes that bypass the API);
+    # the marks jump to the latest rows, which this pass already covers
+    with transaction.atomic():
+        ProductAnalyticsDay.objects.all().delete()
+        skip_delta()
+        rows = compute_rows(iter_review_rows())
+        ProductAnalyticsDay.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+# precompute_product_analytics: the rebuild, partitioned by product across worker processes
+
+ROW_FIELDS = tuple(field.attname for field in ProductAnalyticsDay._meta.concrete_fields if not field.primary_key)
+
+
+def compute_products(product_ids):
+    # worker side: stream these products' reviews, tokenize and aggregate them here and send back
+    # compact tuples (ROW_FIELDS order) for the parent's bulk write, with the CPU time spent
+    start = process_time()
+    reviews = 0
+
+    def counted(rows):
+        nonlocal reviews
+        for row in rows:
+            reviews += 1
+            yield row
+
+    rows = compute_rows(counted(iter_review_rows(Q(product_id__in=product_ids))))
+    return {
+        'product_ids': product_ids,
+        'rows': [tuple(getattr(row, name) for name in ROW_FIELDS) for row in rows],
+        'reviews': reviews,
+        'busy': process_time() - start,
+        'pid': os.getpid(),
+    }
+
+
+def save_products(result):
+    # parent side: replace the rows of the chunk's products
+    ProductAnalyticsDay.objects.filter(product_id__in=result['product_ids']).delete()
+    ProductAnalyticsDay.objects.bulk_create(
+        [ProductAnalyticsDay(**dict(zip(ROW_FIELDS, values))) for values in result['rows']], batch_size=500,
+    )
+
+
+# read side
+
+def window_start(days=WINDOW_DAYS):
+    return localdate() - timedelta(days=days)
+
+
+def product_summary(product_id, days=WINDOW_DAYS):
+    rows = ProductAnalyticsDay.objects.filter(product_id=product_id, day__gte=window_start(days))
+    count = rating_sum = sentiment_count = positive = negative = 0
+    sentiment_sum = 0.0
+    max_rating = None
+    words = Counter()
+    for row in rows:
+        count += row.review_count
+        rating_sum += row.rating_sum
+        if row.max_rating is not None:
+            max_rating = max(max_rating or 0, row.max_rating)
+        sentiment_sum += row.sentiment_sum
+        sentiment_count += row.sentiment_count
+        positive += row.positive_count
+        negative += row.negative_count
+        words.update(row.word_counts)
+
+    return {
+        'review_count': count,
+        'average_rating': round(rating_sum / count, 2) if count else 0,
+        'max_rating': max_rating,
+        'average_sentiment': round(sentiment_sum / sentiment_count, 4) if sentiment_count else None,
+        'sentiment': {
+            'positive': positive,
+            'neutral': sentiment_count - positive - negative,
+            'negative': negative,
+        },
+        'common_words': words.most_common(TOP_WORDS),
+    }
+
+
+def top_rated_products(days=WINDOW_DAYS, limit=5):
+    return list(
+        ProductAnalyticsDay.objects
+        .filter(day__gte=window_start(days), review_count__gt=0)
+        .values('product_id', 'product__name')
+        .annotate(count=Sum('review_count'), total=Sum('rating_sum'))
+        .annotate(average_rating=Cast(F('total'), FloatField()) / F('count'))
+        .order_by('-average_rating', 'product_id')[:limit]
+    )
+
+
+def most_liked_review(days=WINDOW_DAYS):
+    # (review_id, likes) of the most liked visible review written in the window, or None
+    return (
+        ProductAnalyticsDay.objects
+        .filter(day__gte=window_start(days), top_review_likes__gt=0)
+        .order_by('-top_review_likes', 'top_review_id')
+        .values_list('top_review_id', 'top_review_likes')
+        .first()
+    )
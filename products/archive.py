@@ -0,0 +1,86 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now, timedelta
+
+from . import events
+from . import similarity
+from .models import (
+    ArchivedInteraction, ArchivedReport, ArchivedReview, ArchivedReviewComment, ChangeEvent,
+    Interaction, Report, Review, ReviewComment,
+)
+
+# Archival of old reviews. Reviews past REVIEW_ARCHIVE_AFTER_DAYS are copied, with their
+# reactions, reports and comments, into the Archived* tables and deleted from the hot
+# tables in batches. Stored aggregates (product ratings and buckets, user stats,
+# precomputed analytics) keep counting archived reviews. The delete handlers in
+# products/signals.py therefore don't decrement anything while in_progress() is true.
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+
+_archiving = ContextVar('archiving', default=False)
+
+
+def in_progress():
+    return _archiving.get()
+
+
+def archive_after_days():
+    return getattr(settings, 'REVIEW_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+
+
+def candidates(days=None):
+    cutoff = now() - timedelta(days=archive_after_days() if days is None else days)
+    return Review.objects.filter(created_at__lt=cutoff)
+
+
+def archive_reviews(review_ids):
+    # move one batch of reviews and their children in one transaction; returns how many moved
+    with transaction.atomic():
+        reviews = list(Review.objects.filter(id__in=review_ids).with_reaction_counts().order_by('id'))
+        if not reviews:
+            return 0
+        ids = [review.id for review in reviews]
+
+        # the first write takes SQLite's write lock, so no reaction or comment can sneak in
+        # between copying the children below and deleting them
+        ArchivedReview.objects.bulk_create([
+            ArchivedReview(
+                id=review.id, product_id=review.product_id, user_id=review.user_id, rating=review.rating,
+                review_text=review.review_text, is_visible=review.is_visible, created_at=review.created_at,
+                views_count=review.views_count, sentiment_score=review.sentiment_score,
+                likes_count=review.likes_count, dislikes_count=review.dislikes_count,
+            )
+            for review in reviews
+        ])
+        ArchivedInteraction.objects.bulk_create([
+            ArchivedInteraction(id=row['id'], review_id=row['review_id'], user_id=row['user_id'],
+                                reaction=row['reaction'], created_at=row['created_at'])
+            for row in Interaction.objects.filter(review_id__in=ids).values('id', 'review_id', 'user_id', 'reaction', 'created_at')
+        ], batch_size=500)
+        ArchivedReport.objects.bulk_create([
+            ArchivedReport(id=row['id'], review_id=row['review_id'], user_id=row['user_id'],
+                           reason=row['reason'], created_at=row['created_at'])
+            for row in Report.objects.filter(review_id__in=ids).values('id', 'review_id', 'user_id', 'reason', 'created_at')
+        ], batch_size=500)
+        ArchivedReviewComment.objects.bulk_create([
+            ArchivedReviewComment(**row)
+            for row in ReviewComment.objects.filter(review_id__in=ids).values(
+                'id', 'review_id', 'user_id', 'parent_id', 'comment_text', 'created_at', 'path', 'depth', 'reply_count',
+            )
+        ], batch_size=500)
+        ChangeEvent.objects.bulk_create([
+            ChangeEvent(kind='review.archived', review_id=review.id, payload=events.review_payload(review))
+            for review in reviews
+        ])
+
+        # live members of clusters rooted in this batch keep their flags
+        similarity.release_batch(ids)
+
+        token = _archiving.set(True)
+        try:
+            Review.objects.filter(id__in=ids).delete()  # cascades to the hot children
+        finally:
+            _archiving.reset(token)
+    return len(reviews)
@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+# Password hashing off the request threads. Hashing and verification run on a small
+# thread pool (hashlib's PBKDF2 releases the GIL, so WORKERS threads use WORKERS cores);
+# at most MAX_PENDING jobs may be queued or running, beyond that logins and signups get
+# a 503 with Retry-After instead of piling up and starving the API workers.
+#
+# New hashes use AUTH_HASHING['ITERATIONS']. A login whose stored hash has another
+# iteration count (or another algorithm) is rehashed with the current settings, so the
+# work factor can be raised or lowered without resetting passwords.
+#
+# The counters are per process, like the pool.
+
+DEFAULTS = {
+    'ITERATIONS': PBKDF2PasswordHasher.iterations,
+    'WORKERS': 2,
+    'MAX_PENDING': 16,
+    'TIMEOUT': 10,  # seconds a request waits for its hash
+}
+RATE_WINDOW = 60  # seconds of logins behind logins_per_second
+
+
+def config(name):
+    return getattr(settings, 'AUTH_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    # same algorithm and format as Django's hasher, with the iteration count from settings
+
+    @property
+    def iterations(self):
+        return config('ITERATIONS')
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, please retry shortly.'
+    default_code = 'hashing_busy'
+    wait = 1  # sent as Retry-After by DRF's exception handler
+
+
+_lock = threading.Lock()
+_pool = None
+_slots = None
+_counters = {}
+_recent = deque()
+
+
+def _get_pool():
+    global _pool, _slots
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=config('WORKERS'), thread_name_prefix='password-hashing')
+            _slots = threading.BoundedSemaphore(config('MAX_PENDING'))
+        return _pool, _slots
+
+
+@receiver(setting_changed)
+def _reset_pool(setting, **kwargs):
+    global _pool
+    if setting == 'AUTH_HASHING':
+        with _lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
+
+
+def _count(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def run(func, *args):
+    # run func(*args) on the hashing pool; raises HashingBusy when the pool is full or too slow
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        _count('rejected')
+        raise HashingBusy()
+    queued = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            _count('jobs')
+            _count('queue_seconds', started - queued)
+            _count('hash_seconds', time.perf_counter() - started)
+            slots.release()
+
+    future = pool.submit(job)
+    try:
+        return future.result(timeout=config('TIMEOUT'))
+    except TimeoutError:
+        _count('timeouts')
+        raise HashingBusy()
+
+
+def hash_password(raw_password):
+    _count('hashes')
+    return run(make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    # check the password on the pool, upgrading an outdated hash in the same job
+    upgraded = []
+    correct = run(check_password, raw_password, user.password, lambda raw: upgraded.append(make_password(raw)))
+    if upgraded:
+        user.password = upgraded[0]
+        user.save(update_fields=['password'])
+        _count('rehashed')
+    return correct
+
+
+def record_login(success):
+    _count('logins' if success else 'failed_logins')
+    if success:
+        now = time.monotonic()
+        with _lock:
+            _recent.append(now)
+            while _recent and _recent[0] < now - RATE_WINDOW:
+                _recent.popleft()
+
+
+def metrics():
+    with _lock:
+        counters = dict(_counters)
+        cutoff = time.monotonic() - RATE_WINDOW
+        recent = sum(1 for stamp in _recent if stamp >= cutoff)
+    jobs = counters.get('jobs', 0)
+    return {
+        'logins': counters.get('logins', 0),
+        'failed_logins': counters.get('failed_logins', 0),
+        'logins_per_second': round(recent / RATE_WINDOW, 2),
+        'signups_hashed': counters.get('hashes', 0),
+        'rehashed': counters.get('rehashed', 0),
+        'rejected': counters.get('rejected', 0),
+        'timeouts': counters.get('timeouts', 0),
+        'avg_hash_ms': round(counters.get('hash_seconds', 0) / jobs * 1000, 2) if jobs else None,
+        'avg_queue_ms': round(counters.get('queue_seconds', 0) / jobs * 1000, 2) if jobs else None,
+        'workers': config('WORKERS'),
+        'max_pending': config('MAX_PENDING'),
+        'iterations': config('ITERATIONS'),
+    }
+
+
+def reset_metrics():
+    with _lock:
+        _counters.clear()
+        _recent.clear()
+
+
+class PooledModelBackend(ModelBackend):
+    # ModelBackend with the password check on the hashing pool; the user lookup and the
+    # rehash save stay on the request thread (and its database connection)
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            user = None
+        try:
+            if user is None:
+                # hash anyway, so unknown usernames take as long as wrong passwords
+                run(make_password, password)
+                success = False
+            else:
+                success = verify_password(user, password) and self.user_can_authenticate(user)
+        except HashingBusy:
+            if isinstance(request, Request):
+                raise  # API logins: DRF answers 503 with Retry-After
+            return None  # plain Django views (the admin login) only handle "no user", not a 503
+        record_login(success)
+        return user if success else None
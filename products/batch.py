@@ -0,0 +1,34 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+
+
+def chunked_rows(queryset, ids, size, fields):
+    # rows are read chunk by chunk after the id list is fixed, so writes made between
+    # chunks never run while a read cursor over the same tables is open
+    for i in range(0, len(ids), size):
+        yield list(queryset.filter(id__in=ids[i:i + size]).values_list(*fields))
+
+
+def bounded_map(pool, func, iterable, window):
+    # like pool.map, but keeps at most `window` chunks in flight instead of reading everything up front
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def process_map(func, chunks, workers):
+    # run `func` over chunks in a process pool, yielding results in order; workers=1 runs
+    # inline. Workers that read the database open their own connections.
+    if workers <= 1:
+        yield from map(func, chunks)
+        return
+    connections.close_all()  # don't share the SQLite handle with the workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        yield from bounded_map(pool, func, chunks, workers * 2)
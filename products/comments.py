@@ -0,0 +1,62 @@
+from .models import ReviewComment
+
+# '~' sorts after the digits and '/' used in paths, so [path, path + '~') is a whole subtree
+PATH_END = '~'
+# what ReviewCommentSerializer shows: the author row is only read for its username
+COMMENT_COLUMNS = ('id', 'review', 'user__username', 'parent', 'comment_text', 'created_at', 'path', 'depth', 'reply_count')
+
+
+def subtree_range(path):
+    return {'path__gte': path, 'path__lt': path + PATH_END}
+
+
+def comment_id_from_path(path):
+    return int(path[-ReviewComment.PATH_STEP:-1])
+
+
+def load_thread(review, parent=None, depth=None, limit=20, after=None):
+    # One page of comments at one level (top-level comments, or replies to `parent`)
+    # with their replies `depth` levels down (all levels when depth is None).
+    # Top-level comments are newest first, replies oldest first; `after` is the
+    # id of the last comment of the previous page (keyset pagination).
+    # Returns (page comments, each with a 'replies' list of the same shape, next cursor).
+    newest_first = parent is None
+    level_depth = parent.depth + 1 if parent else 0
+    prefix = parent.path if parent else ''
+
+    level = ReviewComment.objects.filter(review=review, depth=level_depth)
+    if parent:
+        level = level.filter(**subtree_range(prefix))
+    if after is not None:
+        cursor = prefix + ReviewComment.path_segment(after)
+        level = level.filter(path__lt=cursor) if newest_first else level.filter(path__gt=cursor)
+
+    # cheap index-only query for the page boundaries
+    paths = list(level.order_by('-path' if newest_first else 'path').values_list('path', flat=True)[:limit + 1])
+    next_cursor = comment_id_from_path(paths[limit - 1]) if len(paths) > limit else None
+    paths = paths[:limit]
+    if not paths:
+        return [], None
+
+    # the page comments are consecutive at their level, so they and all their
+    # replies are exactly the paths between the first and the last one
+    comments = ReviewComment.objects.filter(review=review, path__gte=min(paths), path__lt=max(paths) + PATH_END)
+    if depth is not None:
+        comments = comments.filter(depth__lte=level_depth + depth)
+    comments = comments.select_related('user').only(*COMMENT_COLUMNS)
+    return list(comments.order_by('path')), next_cursor
+
+
+def build_tree(comments, rows):
+    # nest serialized rows (same order as `comments`) under their parents
+    nodes = {}
+    roots = []
+    for comment, row in zip(comments, rows):
+        row['replies'] = []
+        nodes[comment.path] = row
+        parent_row = nodes.get(comment.path[:-ReviewComment.PATH_STEP])
+        if parent_row is not None:
+            parent_row['replies'].append(row)
+        else:
+            roots.append(row)
+    return roots
@@ -0,0 +1,63 @@
+from django.utils.timezone import now
+
+from .models import ChangeEvent, EventCursor
+
+# Change feed (transactional outbox). Every mutation made through the API writes a
+# ChangeEvent row inside its own transaction, so an event exists if and only if the
+# change was committed. Consumers read events in id order after the last id they
+# processed. SQLite serializes writers, so ids become visible in commit order.
+
+FEED_LIMIT = 100
+FEED_MAX_LIMIT = 1000
+
+
+def record(kind, review_id=None, object_id=None, actor=None, **payload):
+    # call inside the transaction.atomic() block of the change being described
+    return ChangeEvent.objects.create(
+        kind=kind, review_id=review_id, object_id=object_id,
+        actor_id=getattr(actor, 'pk', actor), payload=payload,
+    )
+
+
+def review_payload(review, previous=None):
+    payload = {
+        'product_id': review.product_id,
+        'user_id': review.user_id,
+        'rating': review.rating,
+        'is_visible': review.is_visible,
+        'created_at': review.created_at.isoformat(),
+    }
+    if previous:
+        # state before an update (the pre_save snapshot): a review moved to another product
+        # or day also changed the aggregates of the one it left
+        payload['previous_product_id'] = previous['product_id']
+        payload['previous_created_at'] = previous['created_at'].isoformat()
+    return payload
+
+
+def read_feed(after=0, limit=FEED_LIMIT, kinds=None):
+    # one indexed range read: id > after, in id order
+    events = ChangeEvent.objects.filter(id__gt=after)
+    if kinds:
+        events = events.filter(kind__in=kinds)
+    return list(events.order_by('id')[:limit])
+
+
+def iter_batches(after=0, batch_size=FEED_LIMIT, kinds=None):
+    # every event after `after`, batch by batch, until the feed is drained
+    while True:
+        batch = read_feed(after, batch_size, kinds)
+        if not batch:
+            return
+        yield batch
+        after = batch[-1].id
+
+
+def load_position(consumer):
+    return EventCursor.objects.filter(name=consumer).values_list('position', flat=True).first() or 0
+
+
+def save_position(consumer, position):
+    # one UPDATE once the cursor exists
+    if not EventCursor.objects.filter(name=consumer).update(position=position, updated_at=now()):
+        EventCursor.objects.create(name=consumer, position=position)
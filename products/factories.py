@@ -0,0 +1,229 @@
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+from types import SimpleNamespace
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.timezone import now, timedelta
+
+from . import analytics
+from . import inbox
+from . import moderation
+from . import related
+from . import sentiment
+from . import timeseries
+from . import userstats
+from .models import ArchivedInteraction, ArchivedReport, ArchivedReview, ArchivedReviewComment
+from .models import Interaction, Notification, Product, Report, Review, ReviewComment
+
+# Bulk builders for tests and benchmarks. Users share one password hash, computed once.
+# Every choice comes from a seeded random.Random, so the same seed builds the same data.
+#
+# Users and products (a few thousand rows, returned as model instances) go through
+# bulk_create. The big tables are built as plain tuples with their ids assigned here and
+# written by insert_rows(): one executemany per chunk, no model instances and no
+# per-batch SQL compilation. Those builders return the new ids.
+#
+# Neither path sends signals, so stored aggregates (ratings, user stats, unread counters,
+# analytics) are not maintained while building. Call rebuild_derived() before reading them.
+
+PASSWORD = 'factory-pass'
+BATCH_SIZE = 2000
+INSERT_CHUNK = 20000
+
+RATING_WEIGHTS = (5, 7, 13, 30, 45)  # share of 1..5 star reviews
+REVIEW_TEXTS = {
+    1: ("Terrible, it broke after a week.", "Awful quality, a waste of money.", "Bad product and poor support."),
+    2: ("Disappointed, the battery is poor.", "Not worth the price, too many issues."),
+    3: ("It is okay for the price.", "Does the job, nothing special.", "Average build, arrived on time."),
+    4: ("Good value, works as described.", "Nice design and easy to set up.", "Solid and reliable so far."),
+    5: ("Excellent, I love it!", "Great quality, highly recommended.", "Perfect, best purchase this year."),
+}
+
+
+@lru_cache(maxsize=None)
+def password_hash(password=PASSWORD):
+    # hashing is slow on purpose: do it once and share the result
+    return make_password(password)
+
+
+def popularity(n, skew=1.0):
+    # Zipf-like weights: a few items get most of the activity
+    return [1 / (rank + 1) ** skew for rank in range(n)]
+
+
+def timestamp(rng, days, start=None):
+    return (start or now()) - timedelta(seconds=rng.uniform(0, days * 86400))
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    # bulk_create would overwrite auto_now_add fields with now()
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def next_id(model, archive=None):
+    # first free id; archived rows keep their ids, so they count too
+    last = [model.objects.aggregate(last=Max('id'))['last'] or 0]
+    if archive is not None:
+        last.append(archive.objects.aggregate(last=Max('id'))['last'] or 0)
+    return max(last) + 1
+
+
+def insert_rows(model, fields, rows):
+    # rows: tuples of database-ready values for `fields` (attnames, the id first); every
+    # other column gets its field default
+    meta = model._meta
+    rest = [field for field in meta.concrete_fields if field.attname not in fields]
+    defaults = tuple(field.get_db_prep_save(field.get_default(), connection) for field in rest)
+    columns = ', '.join(connection.ops.quote_name(meta.get_field(name).column) for name in fields)
+    columns += ''.join(', ' + connection.ops.quote_name(field.column) for field in rest)
+    sql = f"INSERT INTO {connection.ops.quote_name(meta.db_table)} ({columns}) VALUES ({', '.join(['%s'] * (len(fields) + len(rest)))})"
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), INSERT_CHUNK):
+            cursor.executemany(sql, [row + defaults for row in rows[i:i + INSERT_CHUNK]])
+        for statement in connection.ops.sequence_reset_sql(no_style(), [model]):  # explicit ids skip sequences
+            cursor.execute(statement)
+    return [row[0] for row in rows]
+
+
+def make_users(n, prefix='user', password=PASSWORD, **fields):
+    hashed = password_hash(password)
+    return User.objects.bulk_create(
+        [User(username=f'{prefix}{i}', password=hashed, **fields) for i in range(n)], batch_size=BATCH_SIZE,
+    )
+
+
+def make_products(n, rng, prefix='Product'):
+    with explicit_timestamps(Product):
+        return Product.objects.bulk_create([
+            Product(
+                name=f'{prefix} {i}', name_lower=f'{prefix} {i}'.lower(), description=f'Description of {prefix.lower()} {i}',
+                price=Decimal(f'{rng.uniform(1, 500):.2f}'), created_at=timestamp(rng, 730),
+            )
+            for i in range(n)
+        ], batch_size=BATCH_SIZE)
+
+
+def make_reviews(n, products, users, rng, visible_ratio=0.8, days=365):
+    # popular products and active users get most reviews; ratings lean positive
+    scores = {text: sentiment.score(text) for texts in REVIEW_TEXTS.values() for text in texts}
+    offensive = {text: moderation.is_offensive(text) for texts in REVIEW_TEXTS.values() for text in texts}
+    picked_products = rng.choices([product.pk for product in products], weights=popularity(len(products)), k=n)
+    picked_users = rng.choices([user.pk for user in users], weights=popularity(len(users), skew=0.8), k=n)
+    ratings = rng.choices(range(1, 6), weights=RATING_WEIGHTS, k=n)
+    start, first = now(), next_id(Review, ArchivedReview)
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = []
+    for review_id, (product_id, user_id, rating) in enumerate(zip(picked_products, picked_users, ratings), first):
+        text = rng.choice(REVIEW_TEXTS[rating])
+        visible = rng.random() < visible_ratio
+        created_at = adapt(timestamp(rng, days, start))
+        rows.append((review_id, product_id, user_id, rating, text, scores[text], offensive[text], visible, created_at, created_at))
+    fields = ('id', 'product_id', 'user_id', 'rating', 'review_text', 'sentiment_score', 'is_offensive', 'is_visible', 'created_at', 'updated_at')
+    return insert_rows(Review, fields, rows)
+
+
+def make_interactions(review_ids, users, rng, per_review=2.0, like_ratio=0.75):
+    # about `per_review` reactions per review (exponential spread), at most one per user
+    user_ids = [user.pk for user in users]
+    created_at = connection.ops.adapt_datetimefield_value(now())
+    rows = []
+    interaction_id = next_id(Interaction, ArchivedInteraction)
+    for review_id in review_ids:
+        count = min(int(rng.expovariate(1 / per_review)), len(user_ids))
+        for user_id in rng.sample(user_ids, count):
+            rows.append((interaction_id, review_id, user_id, 'like' if rng.random() < like_ratio else 'dislike', created_at))
+            interaction_id += 1
+    return insert_rows(Interaction, ('id', 'review_id', 'user_id', 'reaction', 'created_at'), rows)
+
+
+def make_reports(review_ids, users, rng, ratio=0.02):
+    user_ids = [user.pk for user in users]
+    created_at = connection.ops.adapt_datetimefield_value(now())
+    rows = []
+    report_id = next_id(Report, ArchivedReport)
+    for review_id in review_ids:
+        if rng.random() < ratio:
+            for user_id in rng.sample(user_ids, min(rng.randint(1, 3), len(user_ids))):
+                rows.append((report_id, review_id, user_id, rng.choice(['spam', 'offensive', 'off-topic']), created_at))
+                report_id += 1
+    return insert_rows(Report, ('id', 'review_id', 'user_id', 'reason', 'created_at'), rows)
+
+
+def make_comments(review_ids, users, rng, per_review=0.5, reply_ratio=0.3):
+    # top-level comments plus one level of replies; the ids are known up front, so the
+    # materialized paths and reply counts are written with the rows
+    user_ids = [user.pk for user in users]
+    created_at = connection.ops.adapt_datetimefield_value(now())
+    comment_id = next_id(ReviewComment, ArchivedReviewComment)
+    top = []
+    for review_id in review_ids:
+        for _ in range(int(rng.expovariate(1 / per_review))):
+            top.append([comment_id, review_id, rng.choice(user_ids), 'Thanks for the review', None, 0, 0])
+            comment_id += 1
+    replies = []
+    for comment in top:
+        if rng.random() < reply_ratio:
+            replies.append([comment_id, comment[1], rng.choice(user_ids), 'Agreed', comment[0], 1, 0])
+            comment[6] += 1
+            comment_id += 1
+    segment = ReviewComment.path_segment
+    rows = [(*comment, segment(comment[0]), created_at) for comment in top]
+    rows += [(*reply, segment(reply[4]) + segment(reply[0]), created_at) for reply in replies]
+    fields = ('id', 'review_id', 'user_id', 'comment_text', 'parent_id', 'depth', 'reply_count', 'path', 'created_at')
+    return insert_rows(ReviewComment, fields, rows)
+
+
+def make_notifications(users, rng, per_user=5, read_ratio=0.6, days=120):
+    # archived notifications get fresh ids, so only the hot table matters here
+    start, notification_id = now(), next_id(Notification)
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = []
+    for user in users:
+        for i in range(per_user):
+            is_read, created_at = rng.random() < read_ratio, adapt(timestamp(rng, days, start))
+            rows.append((notification_id, user.pk, f'Notification {i} for {user.username}', is_read, created_at, created_at))
+            notification_id += 1
+    return insert_rows(Notification, ('id', 'user_id', 'message', 'is_read', 'created_at', 'updated_at'), rows)
+
+
+def rebuild_derived():
+    # bring every stored aggregate in line with the bulk-loaded rows
+    timeseries.rebuild_buckets()
+    userstats.rebuild()
+    inbox.rebuild()
+    analytics.rebuild()
+    related.build()
+
+
+def build_dataset(reviews=1000, users=None, products=None, seed=0, prefix='fx', derived=True,
+                  interactions_per_review=2.0, comments_per_review=0.5, notifications_per_user=5):
+    # a whole, consistent dataset in one transaction; returns the users and products and
+    # the ids of everything else
+    rng = random.Random(seed)
+    users = users if users is not None else max(reviews // 20, 10)
+    products = products if products is not None else max(reviews // 50, 5)
+    with transaction.atomic():
+        data = SimpleNamespace(users=make_users(users, prefix=f'{prefix}_user'))
+        data.products = make_products(products, rng, prefix=f'{prefix} product')
+        data.reviews = make_reviews(reviews, data.products, data.users, rng)
+        data.interactions = make_interactions(data.reviews, data.users, rng, per_review=interactions_per_review)
+        data.reports = make_reports(data.reviews, data.users, rng)
+        data.comments = make_comments(data.reviews, data.users, rng, per_review=comments_per_review)
+        data.notifications = make_notifications(data.users, rng, per_user=notifications_per_user)
+        if derived:
+            rebuild_derived()
+    return data
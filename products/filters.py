@@ -0,0 +1,70 @@
+from django.db.models import Count, Q
+from django_filters import rest_framework as filters
+
+from .models import Product
+from . import search
+
+
+def prefix_upper_bound(prefix):
+    # the smallest string above every string that starts with `prefix`: its last character
+    # bumped to the next code point (code point order is SQLite's BINARY order over UTF-8, where
+    # a '\uffff' sentinel would sort below emoji and other astral characters)
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000  # surrogates can't be stored
+    return prefix[:-1] + chr(code) if code <= 0x10FFFF else None
+
+
+class ProductFilter(filters.FilterSet):
+    # ?name=<prefix>&q=<words>&min_price=&max_price=&min_rating=
+    name = filters.CharFilter(method='filter_name_prefix')
+    q = filters.CharFilter(method='filter_search')
+    min_price = filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = filters.NumberFilter(field_name='price', lookup_expr='lte')
+    min_rating = filters.NumberFilter(field_name='rating_avg', lookup_expr='gte')
+
+    class Meta:
+        model = Product
+        fields = ['name', 'q', 'min_price', 'max_price', 'min_rating']
+
+    def filter_name_prefix(self, queryset, name, value):
+        # range on the stored lower-cased name so product_name_lower_idx is used (LIKE can't use it);
+        # both sides are folded by str.lower(), so non-ASCII names match case-insensitively too
+        prefix = value.lower()
+        queryset = queryset.filter(name_lower__gte=prefix)
+        upper = prefix_upper_bound(prefix)
+        return queryset.filter(name_lower__lt=upper) if upper else queryset
+
+    def filter_search(self, queryset, name, value):
+        return search.search(queryset, value)
+
+
+# facet buckets: (label, lower bound included, upper bound excluded)
+PRICE_FACETS = [('0-25', 0, 25), ('25-50', 25, 50), ('50-100', 50, 100), ('100-250', 100, 250), ('250+', 250, None)]
+RATING_FACETS = [('4-5', 4, None), ('3-4', 3, 4), ('2-3', 2, 3), ('1-2', 1, 2)]
+
+
+def _range(field, low, high):
+    condition = Q(**{f'{field}__gte': low})
+    if high is not None:
+        condition &= Q(**{f'{field}__lt': high})
+    return condition
+
+
+def facet_counts(queryset):
+    # price and rating bucket counts of the filtered catalog in one aggregate query
+    aggregates = {'total': Count('id'), 'rating_unrated': Count('id', filter=Q(rating_avg__isnull=True))}
+    for label, low, high in PRICE_FACETS:
+        aggregates[f'price_{label}'] = Count('id', filter=_range('price', low, high))
+    for label, low, high in RATING_FACETS:
+        aggregates[f'rating_{label}'] = Count('id', filter=_range('rating_avg', low, high))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+    return {
+        'total': counts['total'],
+        'price': {label: counts[f'price_{label}'] for label, _, _ in PRICE_FACETS},
+        'rating': {
+            **{label: counts[f'rating_{label}'] for label, _, _ in RATING_FACETS},
+            'unrated': counts['rating_unrated'],
+        },
+    }
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils.timezone import now
+
+from .models import Notification, NotificationInbox
+
+
+def _adjust_unread(user, delta):
+    # change the counter with one UPDATE; the first time a user is seen it is built from the table
+    updated = NotificationInbox.objects.filter(user=user).update(unread_count=Greatest(F('unread_count') + delta, 0))
+    if not updated:
+        NotificationInbox.objects.get_or_create(
+            user=user,
+            defaults={'unread_count': Notification.objects.filter(user=user, is_read=False).count()},
+        )
+
+
+def notify(user, message):
+    # create a notification and count it as unread
+    with transaction.atomic():
+        notification = Notification.objects.create(user=user, message=message)
+        _adjust_unread(user, 1)
+    return notification
+
+
+def unread_count(user):
+    inbox = NotificationInbox.objects.filter(user=user).values_list('unread_count', flat=True).first()
+    if inbox is None:
+        return Notification.objects.filter(user=user, is_read=False).count()
+    return inbox
+
+
+def mark_read(user, ids=None):
+    # mark the user's unread notifications (all, or only `ids`) as read with a single UPDATE
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        unread = unread.filter(id__in=ids)
+    with transaction.atomic():
+        marked = unread.update(is_read=True, updated_at=now())
+        if marked:
+            _adjust_unread(user, -marked)
+    return marked
+
+
+def rebuild():
+    # recount every inbox from the notifications table (after bulk loads)
+    counts = Notification.objects.filter(is_read=False).values('user_id').annotate(n=Count('id')).order_by()
+    with transaction.atomic():
+        NotificationInbox.objects.all().delete()
+        NotificationInbox.objects.bulk_create(
+            [NotificationInbox(user_id=row['user_id'], unread_count=row['n']) for row in counts], batch_size=1000,
+        )
+    return len(counts)
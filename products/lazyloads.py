@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.models import Model
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+
+# Guard against the one-query-per-row loads serializers hide: a foreign key that wasn't
+# select_related (`review.user.username`) or a column left out by only(). With
+# settings.FORBID_LAZY_LOADS on (the test runner sets it, products/testrunner.py), they
+# raise LazyLoadError inside forbid(), which the API serializers wrap around every row.
+# Off, forbid() costs a settings lookup and Django's descriptors are left untouched.
+
+_forbidden = ContextVar('forbid_lazy_loads', default=False)
+_installed = False
+
+
+class LazyLoadError(RuntimeError):
+    pass
+
+
+def _guard_fk(get_object):
+    def guarded(self, instance):
+        if _forbidden.get():
+            raise LazyLoadError(
+                f"lazy load of {type(instance).__name__}.{self.field.name} while serializing: "
+                f"add select_related('{self.field.name}') to the queryset"
+            )
+        return get_object(self, instance)
+    return guarded
+
+
+def _guard_deferred(refresh_from_db):
+    def guarded(self, using=None, fields=None, **kwargs):
+        if _forbidden.get() and fields:
+            raise LazyLoadError(
+                f"deferred load of {type(self).__name__}.{', '.join(fields)} while serializing: "
+                f"add it to the only() of the queryset"
+            )
+        return refresh_from_db(self, using=using, fields=fields, **kwargs)
+    return guarded
+
+
+def install():
+    # patch once, the first time the guard is switched on
+    global _installed
+    if not _installed:
+        ForwardManyToOneDescriptor.get_object = _guard_fk(ForwardManyToOneDescriptor.get_object)
+        Model.refresh_from_db = _guard_deferred(Model.refresh_from_db)
+        _installed = True
+
+
+@contextmanager
+def forbid():
+    if not getattr(settings, 'FORBID_LAZY_LOADS', False):
+        yield
+        return
+    install()
+    token = _forbidden.set(True)
+    try:
+        yield
+    finally:
+        _forbidden.reset(token)
+
+
+class ForbidLazyLoadsMixin:
+    # serializer mixin: each row is serialized under forbid()
+    def to_representation(self, instance):
+        with forbid():
+            return super().to_representation(instance)
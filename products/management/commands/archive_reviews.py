@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products import archive
+
+
+class Command(BaseCommand):
+    help = "Move reviews older than --days (with their reactions, reports and comments) to the archive tables, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="default: settings.REVIEW_ARCHIVE_AFTER_DAYS")
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--sleep', type=float, default=0.0, help="pause between batches to let other writers in")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        days = archive.archive_after_days() if options['days'] is None else options['days']
+        old = archive.candidates(days)
+
+        if options['dry_run']:
+            self.stdout.write(f"{old.count()} reviews older than {days} days")
+            return
+
+        total = 0
+        last_id = 0
+        while True:
+            # walk by id so every batch is a short write transaction
+            ids = list(old.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            total += archive.archive_reviews(ids)
+            last_id = ids[-1]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} reviews older than {days} days"))
@@ -0,0 +1,72 @@
+import logging
+import os
+import statistics
+import threading
+import time
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from products import auth
+from products.management.timing import percentile
+
+
+class Command(BaseCommand):
+    help = "Measure logins per second (and per core) through the hashing pool for several PBKDF2 iteration counts (data is rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', default='600000,260000,100000', help="comma-separated iteration counts")
+        parser.add_argument('--logins', type=int, default=40, help="password checks per iteration count")
+        parser.add_argument('--clients', type=int, default=8, help="concurrent clients calling the pool")
+        parser.add_argument('--workers', type=int, help="hashing threads (default: AUTH_HASHING['WORKERS'])")
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        workers = options['workers'] or auth.config('WORKERS')
+        cores = min(workers, os.cpu_count() or 1)
+        self.stdout.write(f"{options['logins']} logins per setting, {options['clients']} clients, {workers} hashing threads, {cores} usable cores")
+        for iterations in [int(value) for value in options['iterations'].split(',')]:
+            settings = {'ITERATIONS': iterations, 'WORKERS': workers, 'MAX_PENDING': options['clients'], 'TIMEOUT': 60}
+            with override_settings(AUTH_HASHING=settings), transaction.atomic():
+                self.bench(iterations, options['logins'], options['clients'], cores)
+                transaction.set_rollback(True)
+
+    def bench(self, iterations, logins, clients, cores):
+        # pool only: `clients` threads verifying one stored hash
+        encoded = make_password('bench-pass')
+        remaining = iter(range(logins))
+        lock = threading.Lock()
+
+        def client():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                auth.run(check_password, 'bench-pass', encoded)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        rate = logins / (time.perf_counter() - start)
+
+        # end to end: sequential logins through the token endpoint
+        User.objects.create(username='bench_login_user', password=encoded)
+        api = APIClient(HTTP_HOST='localhost')
+        timings = []
+        for _ in range(max(logins // 4, 1)):
+            start = time.perf_counter()
+            response = api.post('/api/auth/login/', {'username': 'bench_login_user', 'password': 'bench-pass'}, format='json')
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.content
+
+        self.stdout.write(
+            f"  {iterations:>8} iterations  {rate:7.1f} logins/s  {rate / cores:7.1f} logins/s/core  "
+            f"login p50 {percentile(timings, 50):7.1f} ms  p95 {percentile(timings, 95):7.1f} ms  mean {statistics.mean(timings) * 1000:7.1f} ms"
+        )
@@ -0,0 +1,63 @@
+import gzip
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from products.middleware import brotli
+from products.models import Product, Review
+from products.renderers import FastJSONRenderer, orjson
+from products.views import ReviewViewSet
+
+
+class Command(BaseCommand):
+    help = "Benchmark render time and bytes on the wire of ReviewViewSet.list (data is rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"orjson: {'yes' if orjson else 'no (stdlib fallback)'}, brotli: {'yes' if brotli else 'no'}")
+        for rows in options['rows']:
+            with transaction.atomic():
+                self.seed(rows)
+                self.bench(rows, options['repeat'])
+                transaction.set_rollback(True)
+
+    def seed(self, rows):
+        user = User.objects.create_user(username='bench_render_user')
+        product = Product.objects.create(name='Bench product', description='bench', price=10)
+        text = "Solid build quality, the battery lasts two days and the screen is bright enough outdoors. " * 4
+        Review.objects.bulk_create(
+            [Review(product=product, user=user, rating=i % 5 + 1, review_text=text, is_visible=True) for i in range(rows)],
+            batch_size=1000,
+        )
+
+    def bench(self, rows, repeat):
+        request = APIRequestFactory().get('/api/reviews/')
+        response = ReviewViewSet.as_view({'get': 'list'})(request)
+        data = response.data
+
+        self.stdout.write(f"\n{rows} rows")
+        for name, renderer in [('stdlib', JSONRenderer()), ('fast', FastJSONRenderer())]:
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                body = renderer.render(data)
+                best = min(best, time.perf_counter() - start)
+            self.stdout.write(f"  {name:<7} render {best * 1000:8.1f} ms  {len(body):>10} bytes")
+
+        start = time.perf_counter()
+        gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+        gzip_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(f"  gzip    +{gzip_ms:7.1f} ms  {len(gzipped):>10} bytes ({len(gzipped) / len(body):.1%})")
+
+        if brotli is not None:
+            start = time.perf_counter()
+            compressed = brotli.compress(body, quality=5)
+            br_ms = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"  br      +{br_ms:7.1f} ms  {len(compressed):>10} bytes ({len(compressed) / len(body):.1%})")
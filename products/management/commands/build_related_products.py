@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products import related
+
+
+class Command(BaseCommand):
+    help = "Precompute the top-K related products of every product from co-ratings (served by /api/products/<id>/related/)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=related.TOP_K)
+        parser.add_argument('--min-co-raters', type=int, default=related.MIN_CO_RATERS)
+        parser.add_argument('--chunk-size', type=int, default=related.CHUNK_SIZE, help="anchor products per pass")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = related.build(options['top_k'], options['min_co_raters'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} related products in {time.perf_counter() - start:.1f}s"))
@@ -0,0 +1,60 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.batch import chunked_rows, process_map
+from products.models import DuplicateReview, LSHBucket, Review, ReviewSignature
+from products import similarity
+
+
+def compute_signatures(rows):
+    # runs in the worker processes: pure CPU work, no database access
+    return [(review_id, *similarity.fingerprint(text)) for review_id, text in rows]
+
+
+class Command(BaseCommand):
+    help = "Build MinHash/LSH signatures for existing reviews with a process pool, then flag near-duplicates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--rebuild', action='store_true', help="drop all signatures and flags first")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['rebuild']:
+            with transaction.atomic():
+                DuplicateReview.objects.all().delete()
+                LSHBucket.objects.all().delete()
+                ReviewSignature.objects.all().delete()
+
+        ids = list(Review.objects.filter(signature__isnull=True).order_by('id').values_list('id', flat=True))
+        batches = chunked_rows(Review.objects.all(), ids, options['chunk_size'], ('id', 'review_text'))
+        total = self.save_all(process_map(compute_signatures, batches, options['workers']))
+
+        flagged = similarity.find_duplicates_in_buckets()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} reviews and flagged {flagged} duplicates in {elapsed:.1f}s"
+        ))
+
+    def save_all(self, results):
+        total = 0
+        for signatures in results:
+            # exact copies of a text already indexed are linked by hash, they stay out of the buckets
+            hashes = {text_hash for _, text_hash, _ in signatures if text_hash is not None}
+            seen = set(ReviewSignature.objects.filter(text_hash__in=hashes).values_list('text_hash', flat=True))
+            signature_rows, bucket_rows = [], []
+            for review_id, text_hash, signature in signatures:
+                bucketed = text_hash is not None and text_hash not in seen
+                seen.add(text_hash)
+                signature_row, buckets = similarity.signature_rows(review_id, signature, text_hash, bucketed)
+                signature_rows.append(signature_row)
+                bucket_rows += buckets
+            with transaction.atomic():
+                ReviewSignature.objects.bulk_create(signature_rows, batch_size=500)
+                LSHBucket.objects.bulk_create(bucket_rows, batch_size=1000)
+            total += len(signature_rows)
+        return total
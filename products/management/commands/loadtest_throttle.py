@@ -0,0 +1,74 @@
+import logging
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from products.management.timing import percentile
+from products.models import Product, Review
+
+
+class Command(BaseCommand):
+    help = "Flood the throttled review endpoints and report latency of allowed, throttled and normal requests (data is rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help="requests sent by the abusive client")
+        parser.add_argument('--endpoint', choices=['react', 'report', 'add-comment'], default='add-comment')
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.ERROR)  # one warning per 429 otherwise
+        caches[getattr(settings, 'THROTTLE_CACHE', 'default')].clear()
+        with transaction.atomic():
+            self.run(options['requests'], options['endpoint'])
+            transaction.set_rollback(True)
+
+    def run(self, total, endpoint):
+        abuser = User.objects.create_user(username='loadtest_abuser')
+        reader = User.objects.create_user(username='loadtest_reader')
+        product = Product.objects.create(name='Load test', description='load test', price=1)
+        reviews = [
+            Review.objects.create(product=product, user=reader, rating=3, review_text='load test', is_visible=True)
+            for _ in range(total if endpoint != 'add-comment' else 1)
+        ]
+
+        abusive, normal = APIClient(HTTP_HOST='localhost'), APIClient(HTTP_HOST='localhost')
+        abusive.force_authenticate(abuser)
+        normal.force_authenticate(reader)
+
+        timings = {'allowed': [], 'throttled': [], 'normal reads': []}
+        retry_after = set()
+        payload = {'react': {'reaction': 'like'}, 'report': {'reason': 'spam'}, 'add-comment': {'comment_text': 'spam'}}[endpoint]
+
+        for i in range(total):
+            # react/report are unique per review, so the abuser walks over many reviews
+            review = reviews[i % len(reviews)]
+            start = time.perf_counter()
+            response = abusive.post(f'/api/reviews/{review.id}/{endpoint}/', payload, format='json')
+            elapsed = time.perf_counter() - start
+            if response.status_code == 429:
+                timings['throttled'].append(elapsed)
+                retry_after.add(response['Retry-After'])
+            else:
+                timings['allowed'].append(elapsed)
+
+            if i % 10 == 0:
+                start = time.perf_counter()
+                normal.get(f'/api/reviews/{reviews[0].id}/')
+                timings['normal reads'].append(time.perf_counter() - start)
+
+        self.stdout.write(f"{total} POST /{endpoint}/ requests from one client")
+        for name, values in timings.items():
+            if not values:
+                self.stdout.write(f"  {name:<13} 0 requests")
+                continue
+            self.stdout.write(
+                f"  {name:<13} {len(values):>6} requests  p50 {percentile(values, 50):6.2f} ms  "
+                f"p95 {percentile(values, 95):6.2f} ms  max {max(values) * 1000:6.2f} ms  mean {statistics.mean(values) * 1000:6.2f} ms"
+            )
+        if retry_after:
+            self.stdout.write(f"  Retry-After values seen: {', '.join(sorted(retry_after, key=int)[:5])}...")
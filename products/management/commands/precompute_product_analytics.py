@@ -0,0 +1,104 @@
+import os
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from products import analytics
+from products.batch import process_map
+from products import events
+from products.models import ArchivedReview, Product, Review
+
+# last product id whose rows are written; 0 when no run is in progress
+PROGRESS_MARK = 'analytics.precompute'
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the analytics rows of every product on a pool of worker processes, products "
+        "partitioned in chunks; an interrupted run resumes after the last chunk written"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="worker processes (1 runs in this process)")
+        parser.add_argument('--chunk-size', type=int, default=100, help="at most this many products per task")
+        parser.add_argument('--chunk-reviews', type=int, default=5000, help="close a task once its products have this many reviews")
+        parser.add_argument('--restart', action='store_true', help="ignore the saved progress and start over")
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if min(workers, options['chunk_size'], options['chunk_reviews']) < 1:
+            raise CommandError("--workers, --chunk-size and --chunk-reviews must be at least 1")
+
+        position = 0 if options['restart'] else events.load_position(PROGRESS_MARK)
+        if position:
+            self.stdout.write(f"Resuming after product {position}")
+        else:
+            # the incremental engine skips to now: every product is recomputed below
+            with transaction.atomic():
+                analytics.skip_delta()
+                events.save_position(PROGRESS_MARK, 0)
+
+        ids = list(Product.objects.filter(id__gt=position).order_by('id').values_list('id', flat=True))
+        chunks = self.partition(ids, position, options['chunk_size'], options['chunk_reviews'])
+
+        start = time.perf_counter()
+        writing = 0.0
+        reviews = rows = 0
+        busy = defaultdict(float)
+        # results arrive in product order, so the progress mark only moves past written chunks
+        for done, result in enumerate(process_map(analytics.compute_products, chunks, workers), 1):
+            write_start = time.process_time()  # CPU time: the wall clock also counts waiting for workers
+            with transaction.atomic():
+                analytics.save_products(result)
+                events.save_position(PROGRESS_MARK, result['product_ids'][-1])
+            writing += time.process_time() - write_start
+            reviews += result['reviews']
+            rows += len(result['rows'])
+            busy[result['pid']] += result['busy']
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  chunk {done}/{len(chunks)}: products up to {result['product_ids'][-1]}, {len(result['rows'])} rows")
+        events.save_position(PROGRESS_MARK, 0)
+        wall = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Precomputed {len(ids)} products ({len(chunks)} chunks) on {workers} worker(s): "
+            f"{reviews} reviews -> {rows} rows in {wall:.2f}s"
+        ))
+        self.report(workers, wall, writing, busy)
+
+    def partition(self, ids, position, chunk_size, chunk_reviews):
+        # a few popular products hold most reviews: chunks are cut by review count, not only by products
+        counts = defaultdict(int)
+        for model in (Review, ArchivedReview):
+            rows = model.objects.filter(product_id__gt=position).values('product_id').annotate(n=Count('id')).order_by()
+            for row in rows:
+                counts[row['product_id']] += row['n']
+        chunks, chunk, reviews = [], [], 0
+        for product_id in ids:
+            chunk.append(product_id)
+            reviews += counts[product_id]
+            if len(chunk) >= chunk_size or reviews >= chunk_reviews:
+                chunks.append(chunk)
+                chunk, reviews = [], 0
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def report(self, workers, wall, writing, busy):
+        # one worker doing it all would need the workers' CPU time plus the parent's writes; the
+        # writes stay serial (one SQLite writer), which caps the speedup whatever the pool size
+        compute = sum(busy.values())
+        if not wall:
+            return
+        serial = compute + writing
+        speedup = serial / wall
+        self.stdout.write(f"  worker CPU {compute:.2f}s, parent write CPU {writing:.2f}s, {os.cpu_count() or 1} CPU(s)")
+        self.stdout.write(
+            f"  speedup {speedup:.2f}x on {workers} worker(s), scaling efficiency {speedup / workers:.0%}, "
+            f"serial writes cap the speedup at {serial / writing if writing else float('inf'):.1f}x"
+        )
+        for pid, seconds in sorted(busy.items()):
+            self.stdout.write(f"    pid {pid}: {seconds:.2f}s CPU")
@@ -0,0 +1,103 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter and loads settings.WSGI_APPLICATION, the way a new worker starts.
+SCRIPT = '''
+import json, os, sys, time
+from io import BytesIO
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', %(settings)r)
+import django
+django.setup()
+ready = time.perf_counter()
+from django.core.servers.basehttp import get_internal_wsgi_application
+application = get_internal_wsgi_application()  # settings.WSGI_APPLICATION
+loaded = time.perf_counter()
+
+def get(path):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+        'wsgi.errors': sys.stderr,
+    }
+    status = []
+    body = b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+    return status[0], len(body)
+
+status, size = get(%(path)r)
+first = time.perf_counter()
+get(%(path)r)
+second = time.perf_counter()
+print(json.dumps({
+    'status': status, 'bytes': size, 'modules': len(sys.modules),
+    'phases': {
+        'django.setup() (apps ready)': ready - start,
+        'WSGI application loaded': loaded - ready,
+        'first response': first - loaded,
+        'second response': second - first,
+    },
+    'total': first - start,
+}))
+'''
+
+PROJECT_PREFIXES = ('products', 'ProductReviewSystem')
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package" -> [(name, depth, self_s, cumulative_s)]
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(own) / 1e6, int(cumulative) / 1e6))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Start fresh interpreters like a new worker and report per-module import time, app-ready time and time to first response"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/products/', help="URL requested as the first response")
+        parser.add_argument('--runs', type=int, default=3, help="fresh processes; phase times are medians")
+        parser.add_argument('--top', type=int, default=15, help="slowest imports to list")
+
+    def handle(self, *args, **options):
+        script = SCRIPT % {'settings': os.environ.get('DJANGO_SETTINGS_MODULE', 'ProductReviewSystem.settings'), 'path': options['path']}
+        # phases come from plain processes; one more run under -X importtime (which slows imports) lists the modules
+        runs = [self.start(script) for _ in range(options['runs'])]
+        result = runs[-1]
+        imports = parse_importtime(self.start(script, '-X', 'importtime', stderr=True))
+        self.stdout.write(f"GET {options['path']} -> {result['status']} ({result['bytes']} bytes), {result['modules']} modules loaded")
+        # the min-max spread shows how big a change has to be to tell it from noise
+        self.stdout.write(f"Phases (median and min-max of {len(runs)} fresh processes):")
+        for phase in result['phases']:
+            self.write_phase(phase, [run['phases'][phase] for run in runs])
+        self.write_phase('cold start to first response', [run['total'] for run in runs])
+
+        self.stdout.write("\nSlowest top-level imports (cumulative, under -X importtime):")
+        for name, _, _, cumulative in sorted((row for row in imports if row[1] == 0), key=lambda row: -row[3])[:options['top']]:
+            self.stdout.write(f"  {cumulative * 1000:8.1f} ms  {name}")
+
+        self.stdout.write("\nProject modules (self / cumulative):")
+        for name, _, own, cumulative in sorted((row for row in imports if row[0].split('.')[0] in PROJECT_PREFIXES), key=lambda row: -row[3]):
+            self.stdout.write(f"  {own * 1000:8.1f} / {cumulative * 1000:8.1f} ms  {name}")
+
+    def write_phase(self, phase, values):
+        self.stdout.write(
+            f"  {phase:<30} {statistics.median(values) * 1000:8.1f} ms"
+            f"  ({min(values) * 1000:.1f}-{max(values) * 1000:.1f})"
+        )
+
+    def start(self, script, *flags, stderr=False):
+        process = subprocess.run([sys.executable, *flags, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(process.stderr[-2000:])
+        return process.stderr if stderr else json.loads(process.stdout.strip().splitlines()[-1])
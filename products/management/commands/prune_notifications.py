@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now, timedelta
+
+from products.models import ArchivedNotification, ChangeEvent, Notification
+
+
+class Command(BaseCommand):
+    help = "Delete (or archive) read notifications older than --days, in small batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help="keep read notifications newer than this")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--archive', action='store_true', help="copy rows to ArchivedNotification before deleting")
+        parser.add_argument('--sleep', type=float, default=0.0, help="pause between batches to let other writers in")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = now() - timedelta(days=options['days'])
+        old_read = Notification.objects.filter(is_read=True, created_at__lt=cutoff)  # notif_read_created_idx
+
+        if options['dry_run']:
+            self.stdout.write(f"{old_read.count()} read notifications older than {options['days']} days")
+            return
+
+        total = 0
+        last_id = 0
+        while True:
+            # walk by id so every batch is a short, indexed write transaction
+            batch = list(
+                old_read.filter(id__gt=last_id).order_by('id')
+                .values('id', 'user_id', 'message', 'created_at')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            ids = [row['id'] for row in batch]
+            with transaction.atomic():
+                if options['archive']:
+                    ArchivedNotification.objects.bulk_create([
+                        ArchivedNotification(user_id=row['user_id'], message=row['message'], created_at=row['created_at'])
+                        for row in batch
+                    ])
+                # delete events let delta-syncing clients drop them (products/sync.py)
+                ChangeEvent.objects.bulk_create([
+                    ChangeEvent(kind='notification.deleted', object_id=row['id'], payload={'user_id': row['user_id']})
+                    for row in batch
+                ])
+                Notification.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            last_id = ids[-1]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        action = 'Archived' if options['archive'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{action} {total} read notifications older than {options['days']} days"))
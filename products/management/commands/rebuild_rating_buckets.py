@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.timeseries import rebuild_buckets
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily per-product rating buckets and product rating aggregates from visible reviews"
+
+    def handle(self, *args, **options):
+        count = rebuild_buckets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily rating buckets"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = "Recreate the product full-text index and its triggers, then reindex every product"
+
+    def handle(self, *args, **options):
+        install_search_index()
+        self.stdout.write(self.style.SUCCESS("Product search index rebuilt"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products import userstats
+
+
+class Command(BaseCommand):
+    help = "Recount the per-user activity stats from reviews, reactions and comments"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = userstats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} users"))
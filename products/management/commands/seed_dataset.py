@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products import factories
+
+
+class Command(BaseCommand):
+    help = "Bulk-load a deterministic dataset (users, products, reviews, reactions, reports, comments, notifications)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--users', type=int, help="default: reviews / 20")
+        parser.add_argument('--products', type=int, help="default: reviews / 50")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed', help="username / product name prefix, change it to load twice")
+        parser.add_argument('--skip-derived', action='store_true', help="don't rebuild ratings, user stats, inboxes and analytics")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        data = factories.build_dataset(
+            reviews=options['reviews'], users=options['users'], products=options['products'],
+            seed=options['seed'], prefix=options['prefix'], derived=not options['skip_derived'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {len(data.users)} users, {len(data.products)} products, {len(data.reviews)} reviews, "
+            f"{len(data.interactions)} reactions, {len(data.reports)} reports, {len(data.comments)} comments and "
+            f"{len(data.notifications)} notifications in {time.perf_counter() - start:.1f}s"
+        ))
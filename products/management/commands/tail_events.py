@@ -0,0 +1,43 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from products import events
+
+
+class Command(BaseCommand):
+    help = "Print change-feed events after a cursor as JSON lines, in id order and in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after', type=int, help="start after this event id (default: the consumer's saved position)")
+        parser.add_argument('--consumer', help="save the position under this name so the next run resumes from it")
+        parser.add_argument('--kind', action='append', help="only these kinds (repeatable)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--follow', action='store_true', help="keep polling for new events")
+        parser.add_argument('--interval', type=float, default=2.0, help="seconds between polls with --follow")
+
+    def handle(self, *args, **options):
+        consumer = options['consumer']
+        position = options['after']
+        if position is None:
+            position = events.load_position(consumer) if consumer else 0
+
+        total = 0
+        while True:
+            for batch in events.iter_batches(position, options['batch_size'], options['kind']):
+                for event in batch:
+                    self.stdout.write(json.dumps({
+                        'id': event.id, 'kind': event.kind, 'review_id': event.review_id, 'object_id': event.object_id,
+                        'actor_id': event.actor_id, 'payload': event.payload, 'created_at': event.created_at,
+                    }, cls=DjangoJSONEncoder))
+                position = batch[-1].id
+                total += len(batch)
+                if consumer:
+                    events.save_position(consumer, position)  # after the batch is written out
+            if not options['follow']:
+                break
+            time.sleep(options['interval'])
+
+        self.stderr.write(f"{total} events, position {position}")
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products import analytics
+
+
+class Command(BaseCommand):
+    help = "Bring the precomputed analytics up to date with reviews, reactions and change-feed events since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=analytics.BATCH_SIZE, help="rows read per source and step")
+        parser.add_argument('--rebuild', action='store_true', help="recompute everything from the base tables first")
+        parser.add_argument('--loop', action='store_true', help="keep running, catching up every --interval seconds")
+        parser.add_argument('--interval', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            start = time.perf_counter()
+            rows = analytics.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} analytics rows in {time.perf_counter() - start:.1f}s"))
+
+        while True:
+            start = time.perf_counter()
+            rows = analytics.run(options['batch_size'])
+            if rows or not options['loop']:
+                self.stdout.write(f"Recomputed {rows} analytics rows in {time.perf_counter() - start:.1f}s")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,4 @@
+def percentile(values, pct):
+    # nearest-rank percentile of timings in seconds, returned in milliseconds
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000
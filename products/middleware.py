@@ -0,0 +1,109 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli  # optional, used when the client accepts "br"
+except ImportError:
+    brotli = None
+
+
+DEFAULT_COMPRESSION_SETTINGS = {
+    'MIN_SIZE': 1024,        # bytes, smaller responses are sent as they are
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'EXCLUDE_PATHS': [],     # path prefixes that are never compressed
+}
+
+re_accepts_encoding = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def get_compression_settings():
+    return {**DEFAULT_COMPRESSION_SETTINGS, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+def parse_accept_encoding(header):
+    # "gzip;q=0.8, br" -> {"gzip": 0.8, "br": 1.0}
+    encodings = {}
+    for part in header.split(','):
+        match = re_accepts_encoding.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        encodings[match.group(1).lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    # prefer brotli (smaller) when available, then gzip
+    accepted = parse_accept_encoding(header)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0
+    for encoding in candidates:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    # gzip / brotli compression of responses above RESPONSE_COMPRESSION['MIN_SIZE'].
+    # Views opt out with `compress_response = False` (class attribute or @action kwarg).
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        initkwargs = getattr(view_func, 'initkwargs', None) or getattr(view_func, 'view_initkwargs', None) or {}
+        enabled = initkwargs.get('compress_response', getattr(view_class, 'compress_response', True))
+        request.compress_response = enabled
+        return None
+
+    def compress(self, request, response):
+        config = get_compression_settings()
+
+        if not getattr(request, 'compress_response', True):
+            return response
+        if any(request.path.startswith(prefix) for prefix in config['EXCLUDE_PATHS']):
+            return response
+        if response.streaming or response.status_code != 200 or response.has_header('Content-Encoding'):
+            return response
+
+        # always vary on Accept-Encoding so caches keep one copy per encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if len(response.content) < config['MIN_SIZE']:
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=config['BROTLI_QUALITY'])
+        elif encoding == 'gzip':
+            compressed = gzip.compress(response.content, compresslevel=config['GZIP_LEVEL'], mtime=0)
+        else:
+            return response
+
+        # don't send bigger bodies than the original
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # the representation changed, so a strong ETag is no longer valid
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
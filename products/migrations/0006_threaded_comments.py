@@ -0,0 +1,46 @@
+# Generated by Django 4.2.23 on 2026-10-19 14:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_paths(apps, schema_editor):
+    # existing comments are all top-level
+    ReviewComment = apps.get_model('products', 'ReviewComment')
+    for comment in ReviewComment.objects.filter(path='').only('id').iterator():
+        ReviewComment.objects.filter(pk=comment.pk).update(path=f'{comment.pk:010d}/')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_rating_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviewcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reviewcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='products.reviewcomment'),
+        ),
+        migrations.AddField(
+            model_name='reviewcomment',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='reviewcomment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='reviewcomment',
+            index=models.Index(fields=['review', 'path'], name='comment_review_path_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-19 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_review_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='sentiment_score',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.23 on 2026-10-19 15:07
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def backfill_user_stats(apps, schema_editor):
+    # counters for every user with existing activity, with one grouped query per table
+    totals = {}
+
+    def add(user_id, counts):
+        row = totals.setdefault(user_id, {})
+        for field, value in counts.items():
+            row[field] = row.get(field, 0) + (value or 0)
+
+    Review = apps.get_model('products', 'Review')
+    for row in Review.objects.values('user_id').order_by().annotate(
+        review_count=Count('id'),
+        visible_review_count=Count('id', filter=Q(is_visible=True)),
+        rating_sum=Sum('rating'),
+        visible_rating_sum=Sum('rating', filter=Q(is_visible=True)),
+    ):
+        add(row.pop('user_id'), row)
+    for row in apps.get_model('products', 'Interaction').objects.values('review__user_id').order_by().annotate(
+        likes_received=Count('id', filter=Q(reaction='like')),
+        dislikes_received=Count('id', filter=Q(reaction='dislike')),
+    ):
+        add(row.pop('review__user_id'), row)
+    for row in apps.get_model('products', 'ReviewComment').objects.values('user_id').order_by().annotate(comment_count=Count('id')):
+        add(row.pop('user_id'), row)
+
+    UserStats = apps.get_model('products', 'UserStats')
+    UserStats.objects.bulk_create([UserStats(user_id=user_id, **counts) for user_id, counts in totals.items()], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('products', '0009_product_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.PositiveIntegerField(db_index=True, default=0)),
+                ('visible_review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('visible_rating_sum', models.PositiveIntegerField(default=0)),
+                ('likes_received', models.PositiveIntegerField(default=0)),
+                ('dislikes_received', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
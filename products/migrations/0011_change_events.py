@@ -0,0 +1,36 @@
+# Generated by Django 4.2.23 on 2026-10-19 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_user_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCursor',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('review.created', 'Review created'), ('review.updated', 'Review updated'), ('review.deleted', 'Review deleted'), ('review.approved', 'Review approved'), ('reaction.created', 'Reaction created'), ('report.created', 'Report created'), ('comment.created', 'Comment created'), ('notification.created', 'Notification created')], max_length=32)),
+                ('review_id', models.IntegerField(null=True)),
+                ('object_id', models.IntegerField(null=True)),
+                ('actor_id', models.IntegerField(null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'id'], name='event_kind_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.23 on 2026-10-19 15:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_change_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAnalyticsDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('max_rating', models.PositiveSmallIntegerField(null=True)),
+                ('sentiment_sum', models.FloatField(default=0)),
+                ('sentiment_count', models.PositiveIntegerField(default=0)),
+                ('positive_count', models.PositiveIntegerField(default=0)),
+                ('negative_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('low_rated_count', models.PositiveIntegerField(default=0)),
+                ('offensive_count', models.PositiveIntegerField(default=0)),
+                ('top_review_id', models.IntegerField(null=True)),
+                ('top_review_likes', models.PositiveIntegerField(default=0)),
+                ('word_counts', models.JSONField(default=dict)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_days', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='analytics_day_idx')],
+                'unique_together': {('product', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.23 on 2026-10-19 15:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0012_analytics_engine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReview',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('rating', models.IntegerField(choices=[(1, '⭐'), (2, '⭐⭐'), (3, '⭐⭐⭐'), (4, '⭐⭐⭐⭐'), (5, '⭐⭐⭐⭐⭐')])),
+                ('review_text', models.TextField()),
+                ('is_visible', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('views_count', models.PositiveIntegerField(default=0)),
+                ('sentiment_score', models.FloatField(blank=True, null=True)),
+                ('likes_count', models.PositiveIntegerField(default=0)),
+                ('dislikes_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to='products.product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='changeevent',
+            name='kind',
+            field=models.CharField(choices=[('review.created', 'Review created'), ('review.updated', 'Review updated'), ('review.deleted', 'Review deleted'), ('review.approved', 'Review approved'), ('review.archived', 'Review archived'), ('reaction.created', 'Reaction created'), ('report.created', 'Report created'), ('comment.created', 'Comment created'), ('notification.created', 'Notification created')], max_length=32),
+        ),
+        migrations.CreateModel(
+            name='ArchivedReviewComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('parent_id', models.IntegerField(null=True)),
+                ('comment_text', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('path', models.CharField(max_length=255)),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('reply_count', models.PositiveIntegerField(default=0)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='products.archivedreview')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_review_comments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedReport',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('reason', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reports', to='products.archivedreview')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reports', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedInteraction',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('reaction', models.CharField(choices=[('like', 'Helpful'), ('dislike', 'Not Helpful')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interactions', to='products.archivedreview')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_interactions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
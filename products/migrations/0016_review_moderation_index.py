@@ -0,0 +1,40 @@
+# Generated by Django 4.2.23 on 2026-10-19 15:50
+
+import re
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 500
+# products.moderation.OFFENSIVE_RE as of this migration
+OFFENSIVE_RE = re.compile('bad|stupid|poor|shit|disgusting', re.IGNORECASE)
+
+
+def backfill_is_offensive(apps, schema_editor):
+    Review = apps.get_model('products', 'Review')
+    ids = [pk for pk, text in Review.objects.values_list('id', 'review_text').iterator() if OFFENSIVE_RE.search(text)]
+    for i in range(0, len(ids), CHUNK_SIZE):
+        Review.objects.filter(id__in=ids[i:i + CHUNK_SIZE]).update(is_offensive=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_related_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='is_offensive',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_is_offensive, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['created_at', 'reason'], name='report_created_reason_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['created_at', 'is_visible', 'rating', 'is_offensive'], name='review_moderation_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:17
+
+import re
+from hashlib import blake2b
+
+from django.db import migrations, models
+
+
+def backfill_text_hash(apps, schema_editor):
+    # products.similarity.fingerprint as of this migration: texts with fewer than
+    # 3 distinct word trigrams stay unhashed
+    ReviewSignature = apps.get_model('products', 'ReviewSignature')
+    words_re = re.compile(r'\w+')
+    rows = ReviewSignature.objects.values_list('review_id', 'review__review_text')
+    for review_id, text in rows.iterator(chunk_size=2000):
+        words = words_re.findall(text.lower())
+        if len({tuple(words[i:i + 3]) for i in range(len(words) - 2)}) < 3:
+            continue
+        digest = blake2b(' '.join(words).encode(), digest_size=8).digest()
+        ReviewSignature.objects.filter(pk=review_id).update(text_hash=int.from_bytes(digest, 'big', signed=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviewsignature',
+            name='text_hash',
+            field=models.BigIntegerField(db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_text_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:23
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def backfill_review_days(apps, schema_editor):
+    # every review, hot and archived, per author and review day
+    UserReviewDay = apps.get_model('products', 'UserReviewDay')
+    days = {}
+    for name in ('Review', 'ArchivedReview'):
+        rows = (
+            apps.get_model('products', name).objects
+            .annotate(day=TruncDate('created_at'))
+            .values('user_id', 'day')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            key = (row['user_id'], row['day'])
+            days[key] = days.get(key, 0) + row['n']
+    UserReviewDay.objects.bulk_create(
+        [UserReviewDay(user_id=user_id, day=day, count=n) for (user_id, day), n in days.items()], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0018_review_signature_text_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserReviewDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'user', 'count'], name='user_review_day_idx')],
+                'unique_together': {('user', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_review_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_user_review_day'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changeevent',
+            name='kind',
+            field=models.CharField(choices=[('review.created', 'Review created'), ('review.updated', 'Review updated'), ('review.deleted', 'Review deleted'), ('review.approved', 'Review approved'), ('review.archived', 'Review archived'), ('reaction.created', 'Reaction created'), ('report.created', 'Report created'), ('comment.created', 'Comment created'), ('notification.created', 'Notification created'), ('notification.deleted', 'Notification deleted')], max_length=32),
+        ),
+    ]
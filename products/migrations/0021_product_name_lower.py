@@ -0,0 +1,61 @@
+# Generated by Django 4.2.23 on 2026-10-19 17:09
+
+from django.db import migrations, models
+
+# Adding (and removing) a column makes Django rebuild products_product on SQLite, which
+# drops the FTS triggers; they are recreated as 0009_product_search created them
+CREATE_SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS products_product_fts_ai AFTER INSERT ON products_product BEGIN
+        INSERT INTO products_product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_product_fts_ad AFTER DELETE ON products_product BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_product_fts_au AFTER UPDATE OF name, description ON products_product BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    "INSERT INTO products_product_fts(products_product_fts) VALUES ('rebuild')",
+]
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SEARCH_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+def backfill_name_lower(apps, schema_editor):
+    # str.lower() rather than the database's LOWER(), which only folds ASCII on SQLite
+    Product = apps.get_model('products', 'Product')
+    products = list(Product.objects.only('id', 'name'))
+    for product in products:
+        product.name_lower = product.name.lower()
+    Product.objects.bulk_update(products, ['name_lower'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_change_event_notification_deleted'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_search_triggers),  # last step when unapplied
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_name_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='name_lower',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_name_lower, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name_lower'], name='product_name_lower_idx'),
+        ),
+        migrations.RunPython(create_search_triggers, migrations.RunPython.noop),
+    ]
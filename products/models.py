@@ -1,16 +1,50 @@
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
 from django.contrib.auth.models import User
 
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
+    # name.lower() from Python, set on save (products/signals.py): SQLite's LOWER() only folds ASCII
+    name_lower = models.CharField(max_length=255, default='', editable=False)
     description = models.TextField()
-    price = models.DecimalField(max_digits=10, decimal_places=2)
-    created_at = models.DateTimeField(auto_now_add=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # visible reviews aggregates, kept up to date with the rating buckets (products/timeseries.py)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(null=True, blank=True, db_index=True)
+
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name_lower'], name='product_name_lower_idx'),  # case-insensitive prefix search
+        ]
 
     def __str__(self):
         return self.name  # show product name in admin
 
 
+class ReviewQuerySet(models.QuerySet):
+    def with_reaction_counts(self):
+        # likes / dislikes counted in the same query instead of two queries per review
+        return self.annotate(
+            likes_count=Count('interactions', filter=Q(interactions__reaction='like')),
+            dislikes_count=Count('interactions', filter=Q(interactions__reaction='dislike')),
+        )
+
+    def with_user_state(self, user):
+        # current user's reaction and report flag as subqueries (skipped for anonymous users)
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            current_user_reaction=Subquery(
+                Interaction.objects.filter(review=OuterRef('pk'), user=user).values('reaction')[:1]
+            ),
+            current_user_reported=Exists(Report.objects.filter(review=OuterRef('pk'), user=user)),
+        )
+
+
 class Review(models.Model):
     STAR_CHOICES = [
         (1, '⭐'),
@@ -26,22 +60,152 @@ class Review(models.Model):
     review_text = models.TextField()
     is_visible = models.BooleanField(default=False)  # visible after approval
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta sync / ETags (products/sync.py)
     views_count = models.PositiveIntegerField(default=0)  # how many times this review was viewed
+    sentiment_score = models.FloatField(null=True, blank=True, db_index=True)  # -1..1, set from review_text on save
+    is_offensive = models.BooleanField(default=False)  # set from review_text on save (products/moderation.py)
 
+    objects = ReviewQuerySet.as_manager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='review_product_created_idx'),  # per-product day ranges
+            models.Index(fields=['product', 'updated_at'], name='review_product_updated_idx'),  # ?product= sync / ETag
+            # covers the admin moderation report: date range + the counted flags
+            models.Index(fields=['created_at', 'is_visible', 'rating', 'is_offensive'], name='review_moderation_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.rating} Stars by {self.user.username}"
 
 
+class ProductRatingDay(models.Model):
+    # daily per-product bucket of visible reviews (by review date), kept up to date by products/signals.py
+    product = models.ForeignKey(Product, related_name='rating_days', on_delete=models.CASCADE)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)  # star histogram
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'day')  # also the index used for range scans
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}: {self.count} reviews"
+
+
+class RelatedProduct(models.Model):
+    # top-K "customers who rated this highly also rated" neighbours, written only by products/related.py
+    product = models.ForeignKey(Product, related_name='related_products', on_delete=models.CASCADE)
+    related = models.ForeignKey(Product, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()  # cosine similarity of the two products' high-rating vectors
+    co_raters = models.PositiveIntegerField()  # users who rated both highly
+
+    class Meta:
+        unique_together = ('product', 'related')
+        indexes = [
+            models.Index(fields=['product', '-score', 'related'], name='related_product_score_idx'),  # the served order
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class ProductAnalyticsDay(models.Model):
+    # per-product, per-day metrics of reviews (by review date), written only by products/analytics.py
+    product = models.ForeignKey(Product, related_name='analytics_days', on_delete=models.CASCADE)
+    day = models.DateField()
+    review_count = models.PositiveIntegerField(default=0)  # visible reviews
+    rating_sum = models.PositiveIntegerField(default=0)
+    max_rating = models.PositiveSmallIntegerField(null=True)
+    sentiment_sum = models.FloatField(default=0)
+    sentiment_count = models.PositiveIntegerField(default=0)  # visible reviews with a score
+    positive_count = models.PositiveIntegerField(default=0)
+    negative_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)  # not approved yet
+    low_rated_count = models.PositiveIntegerField(default=0)  # visible, 1-2 stars
+    offensive_count = models.PositiveIntegerField(default=0)  # visible
+    top_review_id = models.IntegerField(null=True)  # most liked visible review of the day
+    top_review_likes = models.PositiveIntegerField(default=0)
+    word_counts = models.JSONField(default=dict)  # word -> occurrences in visible reviews
+
+    class Meta:
+        unique_together = ('product', 'day')
+        indexes = [
+            models.Index(fields=['day'], name='analytics_day_idx'),  # windows across all products
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}: {self.review_count} reviews"
+
+
+class ReviewSignature(models.Model):
+    # MinHash signature of review_text (products/similarity.py)
+    review = models.OneToOneField(Review, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    signature = models.BinaryField()
+    text_hash = models.BigIntegerField(null=True, db_index=True)  # normalized text, null when too short to index
+
+    def __str__(self):
+        return f"Signature of review {self.review_id}"
+
+
+class LSHBucket(models.Model):
+    # one row per (cluster root, band): reviews sharing a bucket are near-duplicate candidates
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='lsh_buckets')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='lsh_band_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"Review {self.review_id} in band {self.band} bucket {self.bucket}"
+
+
+class DuplicateReview(models.Model):
+    # one row per member of a duplicate cluster, `duplicate_of` is the cluster's oldest review
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='duplicate_flags')
+    duplicate_of = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='duplicated_by')
+    similarity = models.FloatField()  # estimated Jaccard similarity
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('review', 'duplicate_of')
+
+    def __str__(self):
+        return f"Review {self.review_id} duplicates {self.duplicate_of_id} ({self.similarity:.0%})"
+
+
 class ReviewComment(models.Model):
+    PATH_STEP = 11  # "0000000042/" per level
+    MAX_DEPTH = 20
+
     review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name="comments")  # المرتبط بالمراجعة
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="review_comments")  # من كتب الرد
     comment_text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')  # replied comment
+    path = models.CharField(max_length=255, blank=True, default='')  # materialized path of ids, set by products/signals.py
+    depth = models.PositiveSmallIntegerField(default=0)  # 0 for top-level comments
+    reply_count = models.PositiveIntegerField(default=0)  # direct replies
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['review', 'path'], name='comment_review_path_idx'),  # threads and subtrees
+        ]
+
+    @staticmethod
+    def path_segment(comment_id):
+        return f'{comment_id:010d}/'
 
     def __str__(self):
-        return f"Comment by {self.user.username} on review {self.review.id}"
+        return f"Comment by {self.user.username} on review {self.review_id}"
 
 
 
@@ -60,7 +224,7 @@ class Interaction(models.Model):
         unique_together = ('review', 'user')  # prevent same user from reacting twice to same review
 
     def __str__(self):
-        return f"{self.user.username} - {self.reaction} - {self.review.id}"
+        return f"{self.user.username} - {self.reaction} - {self.review_id}"
 
 
 class Report(models.Model):
@@ -71,18 +235,188 @@ class Report(models.Model):
 
     class Meta:
         unique_together = ('review', 'user')  # prevent duplicate reports by same user
+        indexes = [
+            models.Index(fields=['created_at', 'reason'], name='report_created_reason_idx'),  # moderation report per day / reason
+        ]
 
     def __str__(self):
-        return f"Report by {self.user.username} on review {self.review.id}"
+        return f"Report by {self.user.username} on review {self.review_id}"
 
 
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')  # user to notify
     message = models.CharField(max_length=255)  # notification content
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # delta sync / ETags (products/sync.py)
     is_read = models.BooleanField(default=False)  # mark if read
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created_idx'),  # inbox / ?unread=true
+            models.Index(fields=['user', 'updated_at'], name='notif_user_updated_idx'),  # sync / ETag
+            models.Index(fields=['is_read', 'created_at'], name='notif_read_created_idx'),  # retention
+        ]
+
     def __str__(self):
         return f"To {self.user.username}: {self.message}"
 
 
+class UserReviewDay(models.Model):
+    # reviews a user wrote per day (by review date, approved or not), kept up to date by products/signals.py
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_days')
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'day')
+        indexes = [
+            models.Index(fields=['day', 'user', 'count'], name='user_review_day_idx'),  # covers the leaderboard range
+        ]
+
+    def __str__(self):
+        return f"User {self.user_id} on {self.day}: {self.count} reviews"
+
+
+class UserStats(models.Model):
+    # per-user activity counters, kept up to date by products/userstats.py
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    review_count = models.PositiveIntegerField(default=0, db_index=True)  # all reviews written (leaderboard)
+    visible_review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)  # of all reviews written
+    visible_rating_sum = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)  # on the user's reviews
+    dislikes_received = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)  # comments written
+
+    @property
+    def pending_review_count(self):
+        return self.review_count - self.visible_review_count
+
+    @property
+    def average_rating_given(self):
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else None
+
+    @property
+    def visible_average_rating_given(self):
+        return round(self.visible_rating_sum / self.visible_review_count, 2) if self.visible_review_count else None
+
+    def __str__(self):
+        return f"Stats of {self.user.username}"
+
+
+class NotificationInbox(models.Model):
+    # denormalized unread counter, kept in sync by products/inbox.py
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_inbox')
+    unread_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Inbox of {self.user.username}: {self.unread_count} unread"
+
+
+class ArchivedNotification(models.Model):
+    # read notifications moved out of the hot table by the prune_notifications command
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived to {self.user.username}: {self.message}"
+
+
+class ArchivedReview(models.Model):
+    # reviews older than REVIEW_ARCHIVE_AFTER_DAYS, moved out of the hot tables by products/archive.py.
+    # Ids are kept, so a review keeps its id once archived.
+    id = models.IntegerField(primary_key=True)
+    product = models.ForeignKey(Product, related_name='archived_reviews', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='archived_reviews', on_delete=models.CASCADE)
+    rating = models.IntegerField(choices=Review.STAR_CHOICES)
+    review_text = models.TextField()
+    is_visible = models.BooleanField(default=False)
+    created_at = models.DateTimeField(db_index=True)
+    views_count = models.PositiveIntegerField(default=0)
+    sentiment_score = models.FloatField(null=True, blank=True)
+    likes_count = models.PositiveIntegerField(default=0)  # reactions at archive time
+    dislikes_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived review {self.id} of product {self.product_id}"
+
+
+class ArchivedInteraction(models.Model):
+    id = models.IntegerField(primary_key=True)
+    review = models.ForeignKey(ArchivedReview, related_name='interactions', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='archived_interactions', on_delete=models.CASCADE)
+    reaction = models.CharField(max_length=10, choices=Interaction.REVIEW_REACTION_CHOICES)
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived {self.reaction} on review {self.review_id}"
+
+
+class ArchivedReport(models.Model):
+    id = models.IntegerField(primary_key=True)
+    review = models.ForeignKey(ArchivedReview, related_name='reports', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='archived_reports', on_delete=models.CASCADE)
+    reason = models.TextField()
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived report on review {self.review_id}"
+
+
+class ArchivedReviewComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    review = models.ForeignKey(ArchivedReview, related_name='comments', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='archived_review_comments', on_delete=models.CASCADE)
+    parent_id = models.IntegerField(null=True)  # the whole thread is archived together
+    comment_text = models.TextField()
+    created_at = models.DateTimeField()
+    path = models.CharField(max_length=255)
+    depth = models.PositiveSmallIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Archived comment on review {self.review_id}"
+
+
+class ChangeEvent(models.Model):
+    # append-only outbox: one row per mutation, written in the same transaction (products/events.py)
+    KINDS = [
+        ('review.created', 'Review created'),
+        ('review.updated', 'Review updated'),
+        ('review.deleted', 'Review deleted'),
+        ('review.approved', 'Review approved'),
+        ('review.archived', 'Review archived'),
+        ('reaction.created', 'Reaction created'),
+        ('report.created', 'Report created'),
+        ('comment.created', 'Comment created'),
+        ('notification.created', 'Notification created'),
+        ('notification.deleted', 'Notification deleted'),
+    ]
+
+    kind = models.CharField(max_length=32, choices=KINDS)
+    review_id = models.IntegerField(null=True)  # plain ids, not FKs: events outlive the rows they describe
+    object_id = models.IntegerField(null=True)  # id of the reaction / report / comment / notification
+    actor_id = models.IntegerField(null=True)  # user who made the change
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'id'], name='event_kind_id_idx'),  # feed filtered by kind
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} review={self.review_id}"
+
+
+class EventCursor(models.Model):
+    # last event id processed by a named feed consumer (tail_events --consumer)
+    name = models.CharField(max_length=64, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
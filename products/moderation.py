@@ -0,0 +1,89 @@
+import re
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils.timezone import get_current_timezone
+
+from .models import Report, Review
+
+# Moderation report over a date range, per day and in total: pending, low-rated and
+# offensive reviews (by the day they were written) and reports (by the day they were
+# filed, per reason). Low-rated and offensive count visible reviews, like the analytics.
+#
+# Each table is read with one conditional-aggregate query over a range of a covering
+# index (review_moderation_idx, report_created_reason_idx), so the cost follows the
+# number of rows in the range, not the size of the table. Reviews store is_offensive,
+# set on save, instead of running the word regex at report time.
+
+OFFENSIVE_WORDS = ('bad', 'stupid', 'poor', 'shit', 'disgusting')
+OFFENSIVE_RE = re.compile('|'.join(OFFENSIVE_WORDS), re.IGNORECASE)
+LOW_RATING = 2
+DEFAULT_DAYS = 7
+MAX_DAYS = 366
+TOP_REASONS = 10
+
+
+def is_offensive(text):
+    return OFFENSIVE_RE.search(text) is not None
+
+
+def report(start, end):
+    tz = get_current_timezone()
+    since = datetime.combine(start, time.min, tzinfo=tz)
+    until = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz)
+    days = {
+        start + timedelta(days=i): {'not_approved': 0, 'low_rated': 0, 'offensive': 0, 'reports': 0, 'reasons': {}}
+        for i in range((end - start).days + 1)
+    }
+
+    visible = Q(is_visible=True)
+    reviews = (
+        Review.objects.filter(created_at__gte=since, created_at__lt=until)
+        .annotate(day=TruncDate('created_at')).values('day').order_by()
+        .annotate(
+            not_approved=Count('id', filter=Q(is_visible=False)),
+            low_rated=Count('id', filter=visible & Q(rating__lte=LOW_RATING)),
+            offensive=Count('id', filter=visible & Q(is_offensive=True)),
+        )
+    )
+    for row in reviews:
+        days[row.pop('day')].update(row)
+
+    reports = (
+        Report.objects.filter(created_at__gte=since, created_at__lt=until)
+        .annotate(day=TruncDate('created_at')).values('day', 'reason').order_by()
+        .annotate(n=Count('id'))
+    )
+    for row in reports:
+        day = days[row['day']]
+        day['reports'] += row['n']
+        day['reasons'][row['reason']] = row['n']
+
+    totals = {'not_approved': 0, 'low_rated': 0, 'offensive': 0, 'reports': 0}
+    reasons = {}
+    for day in days.values():
+        for key in totals:
+            totals[key] += day[key]
+        for reason, n in day['reasons'].items():
+            reasons[reason] = reasons.get(reason, 0) + n
+
+    def top(counts):
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:TOP_REASONS])
+
+    return {
+        'start': start,
+        'end': end,
+        'not_approved_reviews': totals['not_approved'],
+        'low_rated_reviews': totals['low_rated'],
+        'offensive_reviews': totals['offensive'],
+        'reports': totals['reports'],
+        'reports_by_reason': top(reasons),
+        'days': [
+            {
+                'date': date, 'not_approved_reviews': day['not_approved'], 'low_rated_reviews': day['low_rated'],
+                'offensive_reviews': day['offensive'], 'reports': day['reports'], 'reports_by_reason': top(day['reasons']),
+            }
+            for date, day in days.items()
+        ],
+    }
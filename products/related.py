@@ -0,0 +1,70 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .models import ArchivedReview, RelatedProduct, Review
+
+# Item-item recommendations: "customers who rated X highly also rated Y highly".
+# Every product is a sparse 0/1 vector over users (1 = a visible review of 4+ stars,
+# archived reviews included). Two products score the cosine of their vectors,
+# co_raters / sqrt(likers(X) * likers(Y)), and the TOP_K best neighbours of each product
+# are stored in RelatedProduct, which the API reads with one indexed query.
+#
+# build() goes over the users' baskets of liked products once per chunk of CHUNK_SIZE
+# anchor products, counting co-occurrences with Counter.update (a C loop over the whole
+# basket), so memory stays bounded by the chunk instead of products x products.
+
+HIGH_RATING = 4
+TOP_K = 10
+MIN_CO_RATERS = 2  # a single shared user is noise
+CHUNK_SIZE = 500
+MAX_BASKET = 500  # users who liked more products than this are skipped (bulk raters say little)
+READ_CHUNK = 5000
+
+
+def baskets():
+    # the sorted products each user rated highly, one list per user
+    liked = defaultdict(set)
+    for model in (Review, ArchivedReview):
+        rows = model.objects.filter(is_visible=True, rating__gte=HIGH_RATING).values_list('user_id', 'product_id')
+        for user_id, product_id in rows.iterator(chunk_size=READ_CHUNK):
+            liked[user_id].add(product_id)
+    return [sorted(products) for products in liked.values() if len(products) <= MAX_BASKET]
+
+
+def neighbours(baskets, top_k=TOP_K, min_co_raters=MIN_CO_RATERS, chunk_size=CHUNK_SIZE):
+    # yields (product_id, related_id, score, co_raters), best first for each product
+    likers = Counter(product_id for basket in baskets for product_id in basket)  # vector norms (squared)
+    pairing = [basket for basket in baskets if len(basket) > 1]  # single-product baskets pair nothing
+    anchors = sorted(likers)
+    for start in range(0, len(anchors), chunk_size):
+        chunk = set(anchors[start:start + chunk_size])
+        co_counts = defaultdict(Counter)
+        for basket in pairing:
+            for product_id in chunk.intersection(basket):
+                co_counts[product_id].update(basket)
+
+        for product_id in sorted(co_counts):
+            counts = co_counts[product_id]
+            del counts[product_id]
+            scored = [
+                (count / math.sqrt(likers[product_id] * likers[related_id]), count, related_id)
+                for related_id, count in counts.items() if count >= min_co_raters
+            ]
+            # ties go to the product with more co-raters, then the older product
+            for score, count, related_id in heapq.nsmallest(top_k, scored, key=lambda row: (-row[0], -row[1], row[2])):
+                yield product_id, related_id, score, count
+
+
+def build(top_k=TOP_K, min_co_raters=MIN_CO_RATERS, chunk_size=CHUNK_SIZE):
+    # recompute the whole table and swap it in one transaction; returns the number of rows
+    rows = [
+        RelatedProduct(product_id=product_id, related_id=related_id, score=round(score, 6), co_raters=count)
+        for product_id, related_id, score, count in neighbours(baskets(), top_k, min_co_raters, chunk_size)
+    ]
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        RelatedProduct.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,27 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson  # optional, much faster than the stdlib encoder
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    # Same output as DRF's JSONRenderer, encoded with orjson when it is installed.
+    # Falls back to the stdlib encoder when orjson is missing or indentation is requested.
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # DRF's encoder handles lazy strings, querysets, decimals... as a fallback
+        ret = orjson.dumps(data, default=self.encoder.default, option=orjson.OPT_NON_STR_KEYS)
+
+        # keep DRF's escaping of line/paragraph separators for JavaScript clients
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
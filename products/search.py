@@ -0,0 +1,75 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Full-text search over product name/description with an SQLite FTS5 index.
+# The index is an external-content table kept in sync by triggers. Django rebuilds
+# SQLite tables for some schema changes, which drops their triggers, so migrations
+# that alter products_product should recreate them with a copy of INSTALL_SQL, as
+# 0009_product_search does (or run `python manage.py rebuild_search_index`).
+
+FTS_TABLE = 'products_product_fts'
+
+INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(name, description, content='products_product', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+UNINSTALL_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+WORD_RE = re.compile(r'\w+')
+
+
+def install_search_index(schema_editor=None):
+    # create (if missing) and rebuild the FTS index; no-op on other databases
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+
+
+def uninstall_search_index(schema_editor=None):
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for sql in UNINSTALL_SQL:
+            cursor.execute(sql)
+
+
+def match_query(text):
+    # every word must match, as a prefix: 'wireless head' -> '"wireless"* "head"*'
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(text))
+
+
+def search(queryset, text):
+    query = match_query(text)
+    if not query:
+        return queryset
+    if connection.vendor != 'sqlite':
+        # no FTS index: plain (slow) matching; icontains folds case like FTS5's unicode61
+        # tokenizer but, unlike it, doesn't ignore diacritics ('cafe' won't find 'café')
+        for word in WORD_RE.findall(text):
+            queryset = queryset.filter(Q(name__icontains=word) | Q(description__icontains=word))
+        return queryset
+    return queryset.filter(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query]))
@@ -0,0 +1,84 @@
+import math
+import re
+
+# Lexicon-based review sentiment, no external models: word scores from -3 to 3,
+# negation flips the following words, intensifiers scale them, and the sum is
+# squashed into [-1, 1] (VADER-style normalization).
+
+LEXICON = {
+    # positive
+    'good': 1.9, 'great': 3.0, 'excellent': 3.0, 'amazing': 2.8, 'awesome': 3.0, 'perfect': 2.7,
+    'fantastic': 2.9, 'wonderful': 2.7, 'love': 3.0, 'loved': 2.9, 'loves': 2.7, 'like': 1.5,
+    'liked': 1.6, 'nice': 1.8, 'best': 3.0, 'better': 1.9, 'happy': 2.5, 'satisfied': 2.0,
+    'recommend': 1.8, 'recommended': 1.8, 'worth': 1.6, 'helpful': 1.8, 'useful': 1.6, 'easy': 1.4,
+    'fast': 1.2, 'quick': 1.1, 'reliable': 1.8, 'sturdy': 1.5, 'solid': 1.4, 'comfortable': 1.8,
+    'beautiful': 2.6, 'pretty': 1.6, 'cheap': 0.5, 'affordable': 1.5, 'bright': 1.0, 'clean': 1.3,
+    'durable': 1.7, 'impressive': 2.3, 'smooth': 1.4, 'quality': 1.0, 'works': 1.2, 'enjoy': 2.2,
+    'enjoyed': 2.2, 'glad': 2.0, 'pleased': 2.1, 'superb': 3.0, 'brilliant': 2.8, 'outstanding': 3.0,
+    'flawless': 2.8, 'favorite': 2.0, 'fine': 0.8, 'ok': 0.9, 'okay': 0.9, 'thanks': 1.9,
+    # negative
+    'bad': -2.5, 'terrible': -3.0, 'awful': -3.0, 'horrible': -3.0, 'worst': -3.0, 'poor': -2.1,
+    'hate': -2.7, 'hated': -3.0, 'dislike': -1.6, 'disappointed': -2.3, 'disappointing': -2.2,
+    'useless': -2.2, 'broken': -2.2, 'broke': -2.0, 'defective': -2.4, 'slow': -1.2, 'expensive': -1.0,
+    'overpriced': -1.9, 'waste': -2.3, 'cheaply': -1.4, 'flimsy': -1.8, 'fake': -2.1, 'refund': -1.2,
+    'return': -0.6, 'returned': -1.3, 'problem': -1.7, 'problems': -1.7, 'issue': -1.3, 'issues': -1.3,
+    'fail': -2.3, 'failed': -2.3, 'fails': -2.0, 'annoying': -1.8, 'uncomfortable': -1.7, 'ugly': -2.3,
+    'stupid': -2.4, 'disgusting': -2.9, 'shit': -2.6, 'scam': -2.9, 'noisy': -1.3, 'dirty': -1.9,
+    'wrong': -2.1, 'missing': -1.2, 'damaged': -2.1, 'unreliable': -2.0, 'mediocre': -1.3,
+    'sad': -2.1, 'angry': -2.3,
+}
+
+NEGATIONS = {'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'without', 'hardly', 'barely'}
+NEGATION_SCOPE = 3  # words after a negation whose polarity is flipped
+NEGATION_FACTOR = -0.74
+
+INTENSIFIERS = {
+    'very': 1.3, 'really': 1.25, 'extremely': 1.5, 'so': 1.2, 'super': 1.3, 'absolutely': 1.4,
+    'totally': 1.3, 'incredibly': 1.5, 'quite': 1.1, 'slightly': 0.7, 'somewhat': 0.8,
+}
+
+ALPHA = 15  # normalization constant
+
+TOKEN_RE = re.compile(r"[a-z]+(?:n't|'[a-z]+)?")
+
+
+def score(text):
+    # sentiment of a text in [-1, 1]; 0 when no lexicon word is found
+    total = 0.0
+    negated_for = 0
+    boost = 1.0
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in NEGATIONS or token.endswith("n't"):
+            negated_for = NEGATION_SCOPE
+            continue
+        if token in INTENSIFIERS:
+            boost *= INTENSIFIERS[token]
+            continue
+
+        value = LEXICON.get(token)
+        if value is not None:
+            value *= boost
+            if negated_for:
+                value *= NEGATION_FACTOR
+            total += value
+        boost = 1.0
+        if negated_for:
+            negated_for -= 1
+
+    if not total:
+        return 0.0
+    return round(total / math.sqrt(total * total + ALPHA), 4)
+
+
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+
+def label(value):
+    if value is None:
+        return None
+    if value >= POSITIVE_THRESHOLD:
+        return 'positive'
+    if value <= NEGATIVE_THRESHOLD:
+        return 'negative'
+    return 'neutral'
@@ -1,9 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Product, Review , Notification ,ReviewComment
-from django.db.models import Avg, Count
 from .models import Interaction
 from .models import Report
+from .models import UserStats
+from .models import ChangeEvent
+from .models import ArchivedReview
+from .models import RelatedProduct
+from . import auth
+from .lazyloads import ForbidLazyLoadsMixin
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -14,37 +19,52 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ('username', 'password', 'email', 'first_name', 'last_name')
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data.get('email', ''),
-            password=validated_data['password'],
+        # same fields as create_user(), with the password hashed on the hashing pool
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data.get('email', '')),
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', ''),
         )
+        user.password = auth.hash_password(validated_data['password'])
+        user.save()
         return user
 
 
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
     average_rating = serializers.SerializerMethodField()  # show product's average rating
-    reviews_count = serializers.SerializerMethodField()   # show number of reviews
+    reviews_count = serializers.IntegerField(source='rating_count', read_only=True)  # show number of reviews
 
     class Meta:
         model = Product
         fields = ['id', 'name', 'description', 'price', 'average_rating', 'reviews_count']
 
     def get_average_rating(self, obj):
-        # calculate average rating for this product (visible reviews only)
-        avg = Review.objects.filter(product=obj, is_visible=True).aggregate(Avg('rating'))['rating__avg']
+        # the stored aggregate (products/timeseries.py)
+        avg = obj.rating_avg
         return round(avg, 2) if avg else 0.0
 
-    def get_reviews_count(self, obj):
-        # count visible reviews for this product
-        return Review.objects.filter(product=obj, is_visible=True).count()
 
+class RelatedProductSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
+    # a precomputed neighbour, shown with the related product's own fields
+    id = serializers.IntegerField(source='related.id')
+    name = serializers.CharField(source='related.name')
+    price = serializers.DecimalField(source='related.price', max_digits=10, decimal_places=2)
+    average_rating = serializers.SerializerMethodField()
+    reviews_count = serializers.IntegerField(source='related.rating_count')
 
-class ReviewSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RelatedProduct
+        fields = ['id', 'name', 'price', 'average_rating', 'reviews_count', 'score', 'co_raters']
+
+    def get_average_rating(self, obj):
+        avg = obj.related.rating_avg
+        return round(avg, 2) if avg else 0.0
+
+
+class ReviewSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)  # show username of review owner
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     likes_count = serializers.SerializerMethodField()       # number of likes
@@ -52,11 +72,12 @@ class ReviewSerializer(serializers.ModelSerializer):
     user_reaction = serializers.SerializerMethodField()     # current user's reaction
     views_count = serializers.IntegerField(read_only=True)  # how many times this review was viewed
     is_reported_by_user = serializers.SerializerMethodField()  # has the current user reported this?
+    sentiment_score = serializers.FloatField(read_only=True)  # text sentiment from -1 to 1
 
     class Meta:
         model = Review
         fields = ['id', 'product', 'user', 'rating', 'review_text', 'is_visible', 'created_at', 'views_count',
-          'likes_count', 'dislikes_count', 'user_reaction', 'is_reported_by_user']
+          'likes_count', 'dislikes_count', 'user_reaction', 'is_reported_by_user', 'sentiment_score']
         read_only_fields = ('created_at', 'is_visible')
 
     def validate_rating(self, value):
@@ -67,16 +88,22 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def get_likes_count(self, obj):
         # count how many users liked this review
+        if hasattr(obj, 'likes_count'):
+            return obj.likes_count  # annotated by Review.objects.with_reaction_counts()
         return obj.interactions.filter(reaction='like').count()
 
     def get_dislikes_count(self, obj):
         # count how many users disliked this review
+        if hasattr(obj, 'dislikes_count'):
+            return obj.dislikes_count
         return obj.interactions.filter(reaction='dislike').count()
 
     def get_user_reaction(self, obj):
         # return current user's reaction (if exists)
         user = self.context['request'].user
         if user.is_authenticated:
+            if hasattr(obj, 'current_user_reaction'):
+                return obj.current_user_reaction  # annotated by Review.objects.with_user_state()
             interaction = obj.interactions.filter(user=user).first()
             if interaction:
                 return interaction.reaction
@@ -86,22 +113,50 @@ class ReviewSerializer(serializers.ModelSerializer):
         # return True if current user has already reported this review
         user = self.context['request'].user
         if user.is_authenticated:
+            if hasattr(obj, 'current_user_reported'):
+                return obj.current_user_reported
             return obj.reports.filter(user=user).exists()
         return False
 
 
 
-class ReviewCommentSerializer(serializers.ModelSerializer):
+class ArchivedReviewSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
+    # read-only, for ?include_archived=true; reaction counts are frozen at archive time
+    user = serializers.StringRelatedField(read_only=True)
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedReview
+        fields = ['id', 'product', 'user', 'rating', 'review_text', 'is_visible', 'created_at', 'views_count',
+                  'likes_count', 'dislikes_count', 'sentiment_score', 'archived', 'archived_at']
+        read_only_fields = fields
+
+    def get_archived(self, obj):
+        return True
+
+
+class ReviewCommentSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)  # Show username
-    review = serializers.PrimaryKeyRelatedField(queryset=Review.objects.all())  # Review ID
+    review = serializers.PrimaryKeyRelatedField(read_only=True)  # Review ID, taken from the URL
+    parent = serializers.PrimaryKeyRelatedField(queryset=ReviewComment.objects.all(), required=False, allow_null=True)  # replied comment
 
     class Meta:
         model = ReviewComment
         fields = '__all__'
-        read_only_fields = ['created_at', 'user']  # Auto-filled
+        read_only_fields = ['created_at', 'user', 'path', 'depth', 'reply_count']  # Auto-filled
 
+    def validate_parent(self, parent):
+        # replies must stay in the same review and under the maximum depth
+        review = self.context.get('review')
+        if parent is not None:
+            if review is not None and parent.review_id != review.id:
+                raise serializers.ValidationError("Parent comment belongs to another review.")
+            if parent.depth + 1 >= ReviewComment.MAX_DEPTH:
+                raise serializers.ValidationError("Maximum reply depth reached.")
+        return parent
 
-class InteractionSerializer(serializers.ModelSerializer):
+
+class InteractionSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)  # show username only
     review = serializers.PrimaryKeyRelatedField(queryset=Review.objects.all())  # review ID input only
 
@@ -119,7 +174,7 @@ class InteractionSerializer(serializers.ModelSerializer):
         return data
 
 
-class ReportSerializer(serializers.ModelSerializer):
+class ReportSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)  # show username only
     review = serializers.PrimaryKeyRelatedField(queryset=Review.objects.all())  # review ID
 
@@ -137,7 +192,37 @@ class ReportSerializer(serializers.ModelSerializer):
         return data
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
+
+
+class UserSummarySerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
+    # private "me" summary
+    username = serializers.CharField(source='user.username', read_only=True)
+    pending_review_count = serializers.IntegerField(read_only=True)
+    average_rating_given = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = UserStats
+        fields = ['username', 'review_count', 'visible_review_count', 'pending_review_count', 'average_rating_given',
+                  'likes_received', 'dislikes_received', 'comment_count']
+
+
+class ReviewerProfileSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
+    # public profile: only approved reviews are counted
+    username = serializers.CharField(source='user.username', read_only=True)
+    date_joined = serializers.DateTimeField(source='user.date_joined', read_only=True)
+    review_count = serializers.IntegerField(source='visible_review_count', read_only=True)
+    average_rating_given = serializers.FloatField(source='visible_average_rating_given', read_only=True)
+
+    class Meta:
+        model = UserStats
+        fields = ['username', 'date_joined', 'review_count', 'average_rating_given', 'likes_received', 'comment_count']
+
+
+class ChangeEventSerializer(ForbidLazyLoadsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ChangeEvent
+        fields = ['id', 'kind', 'review_id', 'object_id', 'actor_id', 'payload', 'created_at']
@@ -0,0 +1,198 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .models import Interaction, Product, Report, Review, ReviewComment
+from . import archive
+from . import sentiment
+from . import similarity
+from .moderation import is_offensive
+from . import timeseries
+from . import userstats
+
+
+@receiver(pre_save, sender=Product)
+def fold_product_name(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'name' in update_fields:
+        instance.name_lower = instance.name.lower()
+
+
+# fields whose change moves a review between rating buckets
+BUCKET_FIELDS = {'is_visible', 'rating', 'product', 'product_id', 'created_at'}
+# fields whose previous value is needed by the post_save handlers
+TRACKED_FIELDS = BUCKET_FIELDS | {'review_text'}
+
+
+@receiver(pre_save, sender=Review)
+def score_review_sentiment(sender, instance, update_fields=None, **kwargs):
+    # cheap enough to redo on every save that may touch the text
+    if update_fields is None or 'review_text' in update_fields:
+        instance.sentiment_score = sentiment.score(instance.review_text)
+
+
+@receiver(pre_save, sender=Review)
+def flag_offensive_review(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'review_text' in update_fields:
+        instance.is_offensive = is_offensive(instance.review_text)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_state(sender, instance, update_fields=None, **kwargs):
+    # keep the stored state so post_save can tell what changed
+    instance._previous_state = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not TRACKED_FIELDS & set(update_fields):
+        return  # e.g. views_count updates
+    instance._previous_state = (
+        Review.objects.filter(pk=instance.pk)
+        .values('is_visible', 'rating', 'product_id', 'created_at', 'review_text')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_aggregates(sender, instance, created, update_fields=None, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if not created and previous is None:
+        return
+
+    current = {
+        'is_visible': instance.is_visible,
+        'rating': instance.rating,
+        'product_id': instance.product_id,
+        'created_at': instance.created_at,
+    }
+    if previous and all(previous[field] == value for field, value in current.items()):
+        return
+    if previous and previous['is_visible']:
+        timeseries.add_to_bucket(previous['product_id'], previous['created_at'], previous['rating'], sign=-1)
+        timeseries.adjust_product_rating(previous['product_id'], previous['rating'], sign=-1)
+    if current['is_visible']:
+        timeseries.add_to_bucket(current['product_id'], current['created_at'], current['rating'])
+        timeseries.adjust_product_rating(current['product_id'], current['rating'])
+
+
+@receiver(post_save, sender=Review)
+def update_author_stats(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if not created and previous is None:
+        return
+    before = previous or {'rating': 0, 'is_visible': False}
+    userstats.adjust(
+        instance.user_id,
+        review_count=1 if created else 0,
+        rating_sum=instance.rating - before['rating'],
+        visible_review_count=int(instance.is_visible) - int(before['is_visible']),
+        visible_rating_sum=(instance.rating if instance.is_visible else 0) - (before['rating'] if before['is_visible'] else 0),
+    )
+    # the daily rows count every review, approved or not
+    if created:
+        userstats.add_to_day(instance.user_id, instance.created_at)
+    elif previous['created_at'] != instance.created_at:
+        userstats.add_to_day(instance.user_id, previous['created_at'], sign=-1)
+        userstats.add_to_day(instance.user_id, instance.created_at)
+
+
+@receiver(post_save, sender=Review)
+def update_similarity_index(sender, instance, created, **kwargs):
+    # MinHash/LSH signature for near-duplicate detection
+    previous = getattr(instance, '_previous_state', None)
+    if created or (previous and previous['review_text'] != instance.review_text):
+        similarity.index_review(instance)
+
+
+@receiver(pre_delete, sender=Review)
+def release_duplicate_cluster(sender, instance, **kwargs):
+    # before the cascade drops the members' rows pointing at a deleted cluster root; archive
+    # batches are released up front by archive.archive_reviews, which skips members archived too
+    if not archive.in_progress():
+        similarity.release(instance.id)
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_rating_aggregates(sender, instance, **kwargs):
+    if archive.in_progress():
+        return
+    if instance.is_visible:
+        timeseries.add_to_bucket(instance.product_id, instance.created_at, instance.rating, sign=-1)
+        timeseries.adjust_product_rating(instance.product_id, instance.rating, sign=-1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_author_stats(sender, instance, **kwargs):
+    if archive.in_progress():
+        return
+    userstats.adjust(
+        instance.user_id, create=False,
+        review_count=-1,
+        rating_sum=-instance.rating,
+        visible_review_count=-int(instance.is_visible),
+        visible_rating_sum=-instance.rating if instance.is_visible else 0,
+    )
+    userstats.add_to_day(instance.user_id, instance.created_at, sign=-1)
+
+
+@receiver(post_save, sender=Interaction)
+def count_reaction_received(sender, instance, created, **kwargs):
+    if created:
+        field = 'likes_received' if instance.reaction == 'like' else 'dislikes_received'
+        userstats.adjust(instance.review.user_id, **{field: 1})
+        # the review's reaction counts changed: it must show up in delta syncs
+        Review.objects.filter(pk=instance.review_id).update(updated_at=now())
+
+
+@receiver(post_save, sender=Report)
+def touch_reported_review(sender, instance, created, **kwargs):
+    if created:
+        # the reporter's is_reported_by_user flipped: the review's ETag must change too
+        Review.objects.filter(pk=instance.review_id).update(updated_at=now())
+
+
+@receiver(post_delete, sender=Interaction)
+def uncount_reaction_received(sender, instance, **kwargs):
+    if archive.in_progress():
+        return
+    author_id = Review.objects.filter(pk=instance.review_id).values_list('user_id', flat=True).first()
+    if author_id is not None:
+        field = 'likes_received' if instance.reaction == 'like' else 'dislikes_received'
+        userstats.adjust(author_id, create=False, **{field: -1})
+
+
+@receiver(pre_save, sender=ReviewComment)
+def set_comment_depth(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance.depth = instance.parent.depth + 1 if instance.parent_id else 0
+
+
+@receiver(post_save, sender=ReviewComment)
+def set_comment_path(sender, instance, created, **kwargs):
+    # the path needs the new id, so it is written right after the insert
+    if not created or instance.path:
+        return
+    prefix = instance.parent.path if instance.parent_id else ''
+    instance.path = prefix + ReviewComment.path_segment(instance.pk)
+    ReviewComment.objects.filter(pk=instance.pk).update(path=instance.path)
+    if instance.parent_id:
+        ReviewComment.objects.filter(pk=instance.parent_id).update(reply_count=F('reply_count') + 1)
+
+
+@receiver(post_save, sender=ReviewComment)
+def count_comment_written(sender, instance, created, **kwargs):
+    if created:
+        userstats.adjust(instance.user_id, comment_count=1)
+
+
+@receiver(post_delete, sender=ReviewComment)
+def uncount_comment_written(sender, instance, **kwargs):
+    if archive.in_progress():
+        return
+    userstats.adjust(instance.user_id, create=False, comment_count=-1)
+
+
+@receiver(post_delete, sender=ReviewComment)
+def decrement_reply_count(sender, instance, **kwargs):
+    if instance.parent_id and not archive.in_progress():
+        ReviewComment.objects.filter(pk=instance.parent_id).update(reply_count=Greatest(F('reply_count') - 1, 0))
@@ -0,0 +1,249 @@
+import random
+import re
+from itertools import groupby
+import struct
+from hashlib import blake2b
+
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import DuplicateReview, LSHBucket, ReviewSignature
+
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # candidates above ~50% similarity share at least one band
+DUPLICATE_THRESHOLD = 0.8  # estimated Jaccard similarity that flags a near-duplicate
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 3  # shorter texts ("Great product!") repeat by coincidence, they aren't indexed
+BUCKET_CANDIDATES = 20  # oldest reviews read from each bucket: a crowded bucket can't slow down inserts
+
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1234)  # fixed seed, signatures must be stable across processes and restarts
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _hash64(data, signed=False):
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'big', signed=signed)
+
+
+def _shingles(words):
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _minhash(grams):
+    hashes = [_hash64(shingle.encode()) for shingle in grams]
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+def shingles(text):
+    # word trigrams of the normalized text
+    return _shingles(WORD_RE.findall(text.lower()))
+
+
+def minhash(text):
+    return _minhash(shingles(text))
+
+
+def fingerprint(text):
+    # -> (hash of the normalized text, MinHash signature); the hash is None for texts too
+    # short to index, which are then neither matched as copies nor put in buckets
+    words = WORD_RE.findall(text.lower())
+    grams = _shingles(words)
+    text_hash = _hash64(' '.join(words).encode(), signed=True) if len(grams) >= MIN_SHINGLES else None
+    return text_hash, _minhash(grams)
+
+
+def band_keys(signature):
+    # one signed 64-bit bucket key per band (fits SQLite INTEGER)
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = blake2b(struct.pack(f'>{ROWS}Q', *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def pack(signature):
+    return struct.pack(f'>{NUM_PERM}Q', *signature)
+
+
+def unpack(data):
+    return list(struct.unpack(f'>{NUM_PERM}Q', bytes(data)))
+
+
+def estimate_similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def signature_rows(review_id, signature, text_hash, bucketed=True):
+    return (
+        ReviewSignature(review_id=review_id, signature=pack(signature), text_hash=text_hash),
+        [LSHBucket(review_id=review_id, band=band, bucket=key) for band, key in enumerate(band_keys(signature))] if bucketed else [],
+    )
+
+
+# A cluster is stored as one DuplicateReview row per member, pointing at the cluster's root
+# (its oldest review), and only roots are put in the LSH buckets: exact copies are found by
+# their text hash, near-duplicates through the roots' buckets, so rows and lookups grow with
+# the number of distinct texts, not with the number of copies.
+
+
+def cluster_root(review_id):
+    return DuplicateReview.objects.filter(review_id=review_id).values_list('duplicate_of_id', flat=True).first() or review_id
+
+
+def release(review_id, exclude=()):
+    # a root being edited or deleted hands its cluster and its buckets to the oldest member
+    # (that is not in `exclude`, e.g. deleted along with it)
+    members = DuplicateReview.objects.filter(duplicate_of_id=review_id)
+    heir = members.exclude(review_id__in=exclude).order_by('review_id').values_list('review_id', flat=True).first()
+    if heir is not None:
+        DuplicateReview.objects.filter(review_id=heir).delete()
+        members.update(duplicate_of_id=heir)
+        LSHBucket.objects.filter(review_id=review_id).update(review_id=heir)
+
+
+def release_batch(review_ids):
+    # release the roots among `review_ids` whose clusters have members outside the batch
+    roots = (
+        DuplicateReview.objects.filter(duplicate_of_id__in=review_ids).exclude(review_id__in=review_ids)
+        .values_list('duplicate_of_id', flat=True).distinct()
+    )
+    for root_id in list(roots):
+        release(root_id, exclude=review_ids)
+
+
+def best_match(signature):
+    # most similar root sharing a bucket, reading at most BUCKET_CANDIDATES rows per bucket
+    lookup = Q()
+    for band, key in enumerate(band_keys(signature)):
+        lookup |= Q(band=band, bucket=key)
+    candidate_ids = set(
+        LSHBucket.objects.filter(lookup)
+        .annotate(rank=Window(RowNumber(), partition_by=[F('band'), F('bucket')], order_by=F('review_id').asc()))
+        .filter(rank__lte=BUCKET_CANDIDATES)
+        .values_list('review_id', flat=True)
+    )
+    best = None
+    for review_id, data in ReviewSignature.objects.filter(review_id__in=candidate_ids).values_list('review_id', 'signature'):
+        similarity = estimate_similarity(signature, unpack(data))
+        if similarity >= DUPLICATE_THRESHOLD and (best is None or similarity > best[1]):
+            best = (review_id, similarity)
+    return best
+
+
+def index_review(review):
+    # (re)index one review: an exact copy joins the cluster of the first review with the same
+    # text, otherwise it joins the cluster of its most similar root or starts its own
+    text_hash, signature = fingerprint(review.review_text)
+
+    with transaction.atomic():
+        release(review.id)
+        ReviewSignature.objects.filter(review=review).delete()
+        LSHBucket.objects.filter(review=review).delete()
+        DuplicateReview.objects.filter(review=review).delete()
+
+        match = None
+        if text_hash is not None:
+            original = ReviewSignature.objects.filter(text_hash=text_hash).order_by('review_id').values_list('review_id', flat=True).first()
+            match = (original, 1.0) if original is not None else best_match(signature)
+
+        signature_row, bucket_rows = signature_rows(review.id, signature, text_hash, bucketed=text_hash is not None and match is None)
+        signature_row.save()
+        LSHBucket.objects.bulk_create(bucket_rows)
+        if match:
+            DuplicateReview.objects.create(review_id=review.id, duplicate_of_id=cluster_root(match[0]), similarity=match[1])
+
+
+def find_duplicates_in_buckets():
+    # after a bulk build: exact copies grouped by text hash, then one ordered pass over the
+    # buckets comparing the first BUCKET_CANDIDATES reviews of each; members are linked to
+    # the oldest review of their cluster and dropped from the buckets
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    linked = {}
+    for review_id, root_id in DuplicateReview.objects.values_list('review_id', 'duplicate_of_id').iterator():
+        linked[review_id] = root_id
+        union(review_id, root_id)
+
+    similarity = {}
+    rows = ReviewSignature.objects.filter(text_hash__isnull=False).order_by('text_hash', 'review_id').values_list('text_hash', 'review_id')
+    for _, group in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[0]):
+        ids = [row[1] for row in group]
+        for review_id in ids[1:]:
+            union(ids[0], review_id)
+            similarity[review_id] = 1.0
+
+    pairs = set()
+    rows = LSHBucket.objects.order_by('band', 'bucket', 'review_id').values_list('band', 'bucket', 'review_id')
+    for _, group in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[:2]):
+        ids = [row[2] for row in group][:BUCKET_CANDIDATES]
+        pairs.update((a, b) for i, a in enumerate(ids) for b in ids[i + 1:])
+
+    needed = sorted({review_id for pair in pairs for review_id in pair})
+    signatures = {}
+    for i in range(0, len(needed), 500):
+        chunk = ReviewSignature.objects.filter(review_id__in=needed[i:i + 500]).values_list('review_id', 'signature')
+        signatures.update((review_id, unpack(data)) for review_id, data in chunk)
+
+    for a, b in pairs:
+        value = estimate_similarity(signatures[a], signatures[b])
+        if value >= DUPLICATE_THRESHOLD:
+            union(a, b)
+            similarity[b] = max(similarity.get(b, 0), value)
+            similarity[a] = max(similarity.get(a, 0), value)
+
+    flagged = [
+        DuplicateReview(review_id=node, duplicate_of_id=find(node), similarity=similarity.get(node, DUPLICATE_THRESHOLD))
+        for node in parent
+        if node not in linked and find(node) != node
+    ]
+    with transaction.atomic():
+        DuplicateReview.objects.bulk_create(flagged, batch_size=1000)
+        members = [flag.review_id for flag in flagged]
+        for i in range(0, len(members), 500):
+            LSHBucket.objects.filter(review_id__in=members[i:i + 500]).delete()
+    return len(flagged)
+
+
+def duplicate_clusters():
+    # connected groups of flagged reviews (union-find over the flagged rows)
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    similarity = {}
+    for review_id, original_id, value in DuplicateReview.objects.values_list('review_id', 'duplicate_of_id', 'similarity').iterator():
+        parent[find(review_id)] = find(original_id)
+        similarity[review_id] = max(similarity.get(review_id, 0), value)
+
+    clusters = {}
+    for node in list(parent):
+        clusters.setdefault(find(node), []).append(node)
+    return sorted(
+        ({'review_ids': sorted(ids), 'max_similarity': max(similarity.get(i, 0) for i in ids)} for ids in clusters.values()),
+        key=lambda cluster: -len(cluster['review_ids']),
+    )
@@ -3,8 +3,37 @@ from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.test import override_settings
+from django.conf import settings
+from django.core.cache import caches
+import gzip
+from unittest import mock
+import json
+import re
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
 ## products tests
-from products.models import Product
+from products.models import Product, Review, Interaction, ReviewComment, Notification, ArchivedNotification, ProductRatingDay
+from products.models import DuplicateReview, LSHBucket, ReviewSignature, UserStats, ChangeEvent, EventCursor, ProductAnalyticsDay
+from products import analytics
+from products.models import ArchivedReview, ArchivedInteraction, ArchivedReport, ArchivedReviewComment, Report, NotificationInbox
+from products.models import RelatedProduct, UserReviewDay
+from products import inbox
+from products import factories
+from products import auth
+from products import related
+from products import userstats
+from products import sentiment
+from products import events
+from products import similarity
+from products.lazyloads import LazyLoadError
+from products.search import FTS_TABLE
+from products.serializers import ReviewCommentSerializer
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils.timezone import localdate, now, timedelta
+from io import StringIO
 from rest_framework_simplejwt.tokens import RefreshToken
 ## reviews tests :
 
@@ -86,6 +115,67 @@ class AuthTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         
 
+class PasswordHashingTests(APITestCase):
+    fast = {'ITERATIONS': 1000, 'WORKERS': 2, 'MAX_PENDING': 4, 'TIMEOUT': 10}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='hashuser', password='hashpass123')
+        auth.reset_metrics()
+
+    def login(self, password='hashpass123'):
+        return self.client.post(reverse('token_obtain_pair'), {'username': 'hashuser', 'password': password}, format='json')
+
+    def test_login_rehashes_with_new_iterations(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$600000$'))
+        with override_settings(AUTH_HASHING=self.fast):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)  # already current: no second rehash
+            self.assertEqual(auth.metrics()['rehashed'], 1)
+        # and back up again on the next login with the default settings
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$600000$'))
+
+    @override_settings(AUTH_HASHING=fast)
+    def test_register_uses_configured_iterations(self):
+        response = self.client.post(reverse('register'), {'username': 'Fresh', 'password': 'freshpass123', 'email': 'a@EXAMPLE.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username='Fresh')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(user.check_password('freshpass123'))
+        self.assertEqual(user.email, 'a@example.com')
+
+    @override_settings(AUTH_HASHING={**fast, 'MAX_PENDING': 0})
+    def test_full_pool_sheds_load(self):
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(auth.metrics()['rejected'], 1)
+
+    @override_settings(AUTH_HASHING={**fast, 'MAX_PENDING': 0})
+    def test_full_pool_fails_admin_login_without_error(self):
+        User.objects.create_user(username='hash_staff', password='staffpass123', is_staff=True)
+        response = self.client.post(reverse('admin:login'), {'username': 'hash_staff', 'password': 'staffpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)  # the login form again, not a 500
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    @override_settings(AUTH_HASHING=fast)
+    def test_metrics(self):
+        self.login()
+        self.login('wrong')
+        self.client.post(reverse('token_obtain_pair'), {'username': 'nobody', 'password': 'x'}, format='json')
+        self.assertEqual(self.client.get(reverse('auth-metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        admin = User.objects.create_user(username='hash_admin', password='adminpass', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        data = self.client.get(reverse('auth-metrics')).data
+        self.assertEqual((data['logins'], data['failed_logins'], data['rehashed']), (1, 2, 1))
+        self.assertGreater(data['logins_per_second'], 0)
+        self.assertIsNotNone(data['avg_hash_ms'])
+
+
 #### tests for products ####
 
 class ProductTests(APITestCase):
@@ -132,6 +222,15 @@ class ProductTests(APITestCase):
         response = self.client.post(self.create_url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+### rating fields come from the stored aggregates, never from the reviews table :
+    def test_rating_fields_read_stored_aggregates(self):
+        Review.objects.create(product=self.product, user=self.normal_user, rating=4, review_text="ok", is_visible=True)
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(self.detail_url, {'price': 12.5}, format='json')
+        self.assertEqual((response.data['reviews_count'], response.data['average_rating']), (1, 4.0))
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'products_review' in q['sql']])
+
 ### try to create product by normal user :
     def test_create_product_as_user_forbidden(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(self.normal_token))
@@ -180,6 +279,53 @@ class ProductTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
 
+## search, filters and facets :
+    def test_search_filters_and_facets(self):
+        reviewer = User.objects.create_user(username='rater', password='raterpass')
+        headphones = Product.objects.create(name="Wireless Headphones", description="Noise cancelling, long battery", price=120)
+        Product.objects.create(name="Wired Mouse", description="Plain office mouse", price=15)
+        Review.objects.create(product=headphones, user=reviewer, rating=5, review_text="great", is_visible=True)
+        Review.objects.create(product=headphones, user=reviewer, rating=4, review_text="good", is_visible=True)
+        headphones.refresh_from_db()
+        self.assertEqual((headphones.rating_count, headphones.rating_avg), (2, 4.5))
+
+        def names(params):
+            return sorted(p['name'] for p in self.client.get(self.list_url, params).data)
+
+        self.assertEqual(names({'name': 'wire'}), ["Wired Mouse", "Wireless Headphones"])
+        self.assertEqual(names({'q': 'battery noise'}), ["Wireless Headphones"])
+        self.assertEqual(names({'q': 'cancel'}), ["Wireless Headphones"])  # prefix match
+        self.assertEqual(names({'min_price': 10, 'max_price': 20}), ["Wired Mouse"])
+        self.assertEqual(names({'min_rating': 4}), ["Wireless Headphones"])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('product-facets'), {'name': 'wi'})
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(response.data['price']['0-25'], 1)
+        self.assertEqual(response.data['price']['100-250'], 1)
+        self.assertEqual(response.data['rating'], {'4-5': 1, '3-4': 0, '2-3': 0, '1-2': 0, 'unrated': 1})
+
+    def test_name_prefix_folds_non_ascii(self):
+        # folded by str.lower(), not SQLite's ASCII-only LOWER(); emoji sort above a '\uffff' bound
+        Product.objects.create(name="Élan Chair", description="Desc", price=90)
+        Product.objects.create(name="Wire🎧 Stand", description="Desc", price=9)
+        Product.objects.create(name="Wired Mouse", description="Desc", price=15)
+
+        def names(params):
+            return sorted(p['name'] for p in self.client.get(self.list_url, params).data)
+
+        self.assertEqual(names({'name': 'élan'}), ["Élan Chair"])
+        self.assertEqual(names({'name': 'ÉLAN'}), ["Élan Chair"])
+        self.assertEqual(names({'name': 'wire'}), ["Wired Mouse", "Wire🎧 Stand"])
+
+    def test_search_index_follows_updates(self):
+        self.product.name = "Renamed Gadget"
+        self.product.save()
+        response = self.client.get(self.list_url, {'q': 'gadget'})
+        self.assertEqual([p['id'] for p in response.data], [self.product.id])
+        self.product.delete()
+        self.assertEqual(self.client.get(self.list_url, {'q': 'gadget'}).data, [])
+
 ## failuer to update & delete by regular user test :
     def test_update_product_as_user_forbidden(self):
         self.client.force_authenticate(user=self.normal_user)
@@ -210,15 +356,1131 @@ class ProductTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class RelatedProductsTests(APITestCase):
+    def setUp(self):
+        self.products = [Product.objects.create(name=f"Rel {i}", description="Desc", price=10) for i in range(4)]
+        a, b, c, d = self.products
+        # three fans of A also like B, two also like C; D is only liked alone; low ratings don't count
+        likes = {'u1': [a, b, c], 'u2': [a, b, c], 'u3': [a, b], 'u4': [d], 'u5': [b]}
+        for name, liked in likes.items():
+            user = User.objects.create_user(username=name, password='pass12345')
+            for product in liked:
+                Review.objects.create(product=product, user=user, rating=5, review_text='love it', is_visible=True)
+        hater = User.objects.create_user(username='hater', password='pass12345')
+        for product in (a, d):
+            Review.objects.create(product=product, user=hater, rating=1, review_text='bad', is_visible=True)
+        call_command('build_related_products', stdout=StringIO())
+
+    def test_related_products_ranked_by_similarity(self):
+        a, b, c, d = self.products
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('product-related', args=[a.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([row['id'] for row in results], [b.id, c.id])
+        self.assertEqual(results[0]['co_raters'], 3)
+        self.assertAlmostEqual(results[0]['score'], 3 / (3 * 4) ** 0.5, places=5)
+        self.assertEqual(results[0]['name'], b.name)
+        self.assertNotIn(d.id, [row['id'] for row in results])
+
+        response = self.client.get(reverse('product-related', args=[c.id]), {'limit': 1})
+        self.assertEqual([row['id'] for row in response.data['results']], [a.id])  # 2/sqrt(3*2) beats B's 2/sqrt(4*2)
+
+    def test_products_without_neighbours_and_unknown_products(self):
+        response = self.client.get(reverse('product-related', args=[self.products[3].id]))
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(self.client.get(reverse('product-related', args=[9999])).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse('product-related', args=[self.products[0].id]), {'limit': 'x'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_chunked_build_matches_single_pass(self):
+        expected = set(RelatedProduct.objects.values_list('product_id', 'related_id', 'score', 'co_raters'))
+        related.build(chunk_size=1, min_co_raters=2)
+        self.assertEqual(set(RelatedProduct.objects.values_list('product_id', 'related_id', 'score', 'co_raters')), expected)
+
+
+class RatingTrendTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='trend_admin', password='adminpass', is_staff=True)
+        self.user = User.objects.create_user(username='trend_user', password='userpass')
+        self.product = Product.objects.create(name="Trend", description="Desc", price=1.00)
+
+    def make_review(self, rating, days_ago, visible=True):
+        review = Review.objects.create(product=self.product, user=self.user, rating=rating, review_text="ok", is_visible=visible)
+        Review.objects.filter(pk=review.pk).update(created_at=now() - timedelta(days=days_ago))
+        return review
+
+    def test_buckets_follow_visibility_changes(self):
+        review = Review.objects.create(product=self.product, user=self.user, rating=4, review_text="ok")
+        self.assertFalse(ProductRatingDay.objects.exists())  # hidden reviews are not counted
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.post(reverse('review-approve-review', args=[review.id]))
+        bucket = ProductRatingDay.objects.get()
+        self.assertEqual((bucket.count, bucket.rating_sum, bucket.stars_4), (1, 4, 1))
+
+        review.refresh_from_db()
+        review.rating = 2
+        review.save()
+        bucket.refresh_from_db()
+        self.assertEqual((bucket.count, bucket.rating_sum, bucket.stars_4, bucket.stars_2), (1, 2, 0, 1))
+
+        review.delete()
+        bucket.refresh_from_db()
+        self.assertEqual((bucket.count, bucket.rating_sum, bucket.stars_2), (0, 0, 0))
+
+    def test_weekly_series_with_gaps(self):
+        self.make_review(5, days_ago=0)
+        self.make_review(3, days_ago=0)
+        self.make_review(1, days_ago=21)
+        self.make_review(5, days_ago=21, visible=False)
+        call_command('rebuild_rating_buckets', stdout=StringIO())
+
+        today = now().date()
+        start = today - timedelta(days=27)
+        url = reverse('product-rating-trend', args=[self.product.id])
+        with self.assertNumQueries(2):  # product + one range scan of buckets
+            response = self.client.get(url, {'start': start.isoformat(), 'end': today.isoformat(), 'granularity': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        series = response.data['series']
+        self.assertIn(len(series), (4, 5))
+        self.assertEqual(series[-1]['count'], 2)
+        self.assertEqual(series[-1]['average_rating'], 4.0)
+        self.assertEqual(sum(p['count'] for p in series), 3)
+        self.assertIsNone(series[-2]['average_rating'])  # filled gap
+        self.assertEqual(sum(p['distribution']['1'] for p in series), 1)
+
+    def test_invalid_granularity(self):
+        response = self.client.get(reverse('product-rating-trend', args=[self.product.id]), {'granularity': 'hour'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 ### tests for reviews ####
 
+class ReviewBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='readerpass')
+        self.author = User.objects.create_user(username='author', password='authorpass')
+        self.product = Product.objects.create(name="Batch Product", description="Desc", price=5.00)
+        self.reviews = [
+            Review.objects.create(product=self.product, user=self.author, rating=4, review_text=f"review {i}", is_visible=True)
+            for i in range(3)
+        ]
+        Interaction.objects.create(review=self.reviews[1], user=self.user, reaction='like')
+        self.url = reverse('review-batch')
+
+    def test_batch_returns_request_order_and_missing_ids(self):
+        ids = [self.reviews[2].id, 999999, self.reviews[0].id]
+        response = self.client.get(self.url, {'ids': ','.join(str(i) for i in ids)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data['results']], [self.reviews[2].id, self.reviews[0].id])
+        self.assertEqual(response.data['missing'], [999999])
+
+    def test_batch_post_uses_annotations_and_counts_views(self):
+        self.client.force_authenticate(user=self.user)
+        ids = [review.id for review in self.reviews]
+        with self.assertNumQueries(2):  # one select + one bulk views update
+            response = self.client.post(self.url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        liked = response.data['results'][1]
+        self.assertEqual(liked['likes_count'], 1)
+        self.assertEqual(liked['user_reaction'], 'like')
+        self.assertEqual(liked['views_count'], 1)
+        self.assertEqual(list(Review.objects.order_by('id').values_list('views_count', flat=True)), [1, 1, 1])
+
+    def test_batch_rejects_invalid_ids(self):
+        response = self.client.get(self.url, {'ids': '1,abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for ids in ([True], [self.reviews[0].id, False], [1.5]):
+            response = self.client.post(self.url, {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, ids)
+        response = self.client.post(self.url, {'ids': [self.reviews[0].id, str(self.reviews[1].id)]}, format='json')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_product_batch(self):
+        response = self.client.get(reverse('product-batch'), {'ids': f'{self.product.id},424242'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['reviews_count'], 3)
+        self.assertEqual(response.data['results'][0]['average_rating'], 4.0)
+        self.assertEqual(response.data['missing'], [424242])
+
+
+
+
+
+
+
+class DuplicateReviewTests(APITestCase):
+    TEXT = "This phone is amazing, the battery lasts forever and the camera takes stunning pictures at night"
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='moderator', password='moderatorpass', is_staff=True)
+        self.spammer = User.objects.create_user(username='campaign', password='campaignpass')
+        self.products = [Product.objects.create(name=f"P{i}", description="Desc", price=1.00) for i in range(3)]
+
+    def test_near_duplicates_are_flagged_on_create(self):
+        first = Review.objects.create(product=self.products[0], user=self.spammer, rating=5, review_text=self.TEXT)
+        second = Review.objects.create(product=self.products[1], user=self.spammer, rating=5, review_text=self.TEXT + " too")
+        Review.objects.create(product=self.products[2], user=self.spammer, rating=3, review_text="Average product, nothing special about it")
+        flag = DuplicateReview.objects.get()
+        self.assertEqual((flag.review_id, flag.duplicate_of_id), (second.id, first.id))
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('admin-duplicates'))
+        self.assertEqual(response.data['cluster_count'], 1)
+        cluster = response.data['clusters'][0]
+        self.assertEqual([r['id'] for r in cluster['reviews']], [first.id, second.id])
+        self.assertEqual(cluster['product_count'], 2)
+
+    def test_editing_text_clears_the_flag(self):
+        Review.objects.create(product=self.products[0], user=self.spammer, rating=5, review_text=self.TEXT)
+        second = Review.objects.create(product=self.products[1], user=self.spammer, rating=5, review_text=self.TEXT)
+        second.review_text = "Completely different words written by a real customer this time"
+        second.save()
+        self.assertFalse(DuplicateReview.objects.exists())
+
+    def test_batch_build_command(self):
+        for product in self.products:
+            Review.objects.create(product=product, user=self.spammer, rating=5, review_text=self.TEXT)
+        call_command('build_review_signatures', rebuild=True, workers=1, stdout=StringIO())
+        self.assertEqual(ReviewSignature.objects.count(), 3)
+        first = Review.objects.order_by('id').first()
+        self.assertEqual(list(DuplicateReview.objects.values_list('duplicate_of_id', flat=True)), [first.id, first.id])
+        self.assertEqual(LSHBucket.objects.exclude(review=first).count(), 0)
+
+    def test_copies_are_linked_to_one_original(self):
+        reviews = [
+            Review.objects.create(product=self.products[i % 3], user=self.spammer, rating=5, review_text=self.TEXT)
+            for i in range(30)
+        ]
+        self.assertEqual(DuplicateReview.objects.count(), 29)
+        self.assertEqual(set(DuplicateReview.objects.values_list('duplicate_of_id', flat=True)), {reviews[0].id})
+        self.assertEqual(LSHBucket.objects.count(), similarity.BANDS)  # only the original is bucketed
+        self.assertEqual(len(similarity.duplicate_clusters()), 1)
+
+        reviews[0].delete()
+        self.assertEqual(set(DuplicateReview.objects.values_list('duplicate_of_id', flat=True)), {reviews[1].id})
+        self.assertEqual(DuplicateReview.objects.count(), 28)
+        self.assertEqual(set(LSHBucket.objects.values_list('review_id', flat=True)), {reviews[1].id})
+
+    def test_short_texts_are_not_indexed(self):
+        for product in self.products:
+            Review.objects.create(product=product, user=self.spammer, rating=5, review_text="Great product!")
+        self.assertFalse(DuplicateReview.objects.exists())
+        self.assertFalse(LSHBucket.objects.exists())
+        self.assertFalse(ReviewSignature.objects.filter(text_hash__isnull=False).exists())
+
+
+class SentimentTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='feelings', password='feelingspass')
+        self.product = Product.objects.create(name="Mood", description="Desc", price=1.00)
+
+    def test_scorer_handles_negation_and_intensifiers(self):
+        self.assertGreater(sentiment.score("Great phone, I love it"), 0.5)
+        self.assertLess(sentiment.score("Terrible battery, broken after a week"), -0.5)
+        self.assertLess(sentiment.score("This is not good at all"), 0)
+        self.assertGreater(sentiment.score("very good"), sentiment.score("good"))
+        self.assertEqual(sentiment.score("It arrived on Tuesday"), 0.0)
+
+    def test_score_is_stored_on_write_and_aggregated(self):
+        review = Review.objects.create(product=self.product, user=self.user, rating=5, review_text="excellent value", is_visible=True)
+        self.assertGreater(review.sentiment_score, 0)
+        Review.objects.create(product=self.product, user=self.user, rating=1, review_text="awful, a waste of money", is_visible=True)
+        call_command('update_analytics', stdout=StringIO())
+
+        response = self.client.get(reverse('product-product-analytics', args=[self.product.id]))
+        self.assertEqual(response.data['sentiment_last_30_days'], {'positive': 1, 'neutral': 0, 'negative': 1})
+        self.assertIsNotNone(response.data['average_sentiment_last_30_days'])
+
+    def test_backfill_command(self):
+        review = Review.objects.create(product=self.product, user=self.user, rating=5, review_text="really nice")
+        Review.objects.filter(pk=review.pk).update(sentiment_score=None)
+        call_command('backfill_sentiment', workers=1, stdout=StringIO())
+        review.refresh_from_db()
+        self.assertGreater(review.sentiment_score, 0)
+
+
+class UserStatsTests(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.author = User.objects.create_user(username='prolific', password='prolificpass')
+        self.fan = User.objects.create_user(username='fan', password='fanpass')
+        self.admin = User.objects.create_user(username='stats_admin', password='adminpass', is_staff=True)
+        self.product = Product.objects.create(name="Stats", description="Desc", price=1.00)
+
+    def test_counters_follow_writes(self):
+        approved = Review.objects.create(product=self.product, user=self.author, rating=5, review_text="great")
+        Review.objects.create(product=self.product, user=self.author, rating=2, review_text="meh")
+        self.client.force_authenticate(user=self.admin)
+        self.client.post(reverse('review-approve-review', args=[approved.id]))
+
+        self.client.force_authenticate(user=self.fan)
+        self.client.post(reverse('review-react-to-review', args=[approved.id]), {'reaction': 'like'}, format='json')
+        self.client.post(reverse('review-add-comment', args=[approved.id]), {'comment_text': 'agreed'}, format='json')
+
+        self.client.force_authenticate(user=self.author)
+        response = self.client.get(reverse('user-summary'))
+        self.assertEqual(response.data['review_count'], 2)
+        self.assertEqual(response.data['pending_review_count'], 1)
+        self.assertEqual(response.data['average_rating_given'], 3.5)
+        self.assertEqual(response.data['likes_received'], 1)
+        self.assertEqual(UserStats.objects.get(user=self.fan).comment_count, 1)
+
+        # the public profile only counts approved reviews
+        self.client.logout()
+        response = self.client.get(reverse('reviewer-profile', args=['prolific']))
+        self.assertEqual((response.data['review_count'], response.data['average_rating_given']), (1, 5.0))
+
+        approved.refresh_from_db()
+        approved.delete()
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual((stats.review_count, stats.visible_review_count, stats.likes_received), (1, 0, 0))
+
+    def test_profile_read_does_not_create_stats(self):
+        response = self.client.get(reverse('reviewer-profile', args=['fan']))
+        self.assertEqual((response.status_code, response.data['review_count']), (200, 0))
+        self.assertFalse(UserStats.objects.filter(user=self.fan).exists())
+
+    def test_counters_match_rebuild_and_feed_top_reviewers(self):
+        for rating in (1, 4, 5):
+            Review.objects.create(product=self.product, user=self.author, rating=rating, review_text="ok", is_visible=True)
+        Review.objects.create(product=self.product, user=self.fan, rating=3, review_text="ok")
+        incremental = {s.user_id: s.review_count for s in UserStats.objects.all()}
+        call_command('rebuild_user_stats', stdout=StringIO())
+        self.assertEqual({s.user_id: s.review_count for s in UserStats.objects.all()}, incremental)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('general-analytics'))
+        self.assertEqual(response.data['top_reviewers_all_time'][0], {'username': 'prolific', 'review_count': 3})
+        # the 30-day board counts every review written, approved or not
+        self.assertEqual(response.data['top_reviewers_last_30_days'], [
+            {'username': 'prolific', 'review_count': 3}, {'username': 'fan', 'review_count': 1},
+        ])
+
+    def test_top_reviewers_last_30_days(self):
+        old = Review.objects.create(product=self.product, user=self.fan, rating=4, review_text="ok", is_visible=True)
+        Review.objects.filter(pk=old.pk).update(created_at=now() - timedelta(days=45))
+        userstats.rebuild()
+        recent = Review.objects.create(product=self.product, user=self.author, rating=4, review_text="ok", is_visible=True)
+        Review.objects.create(product=self.product, user=self.author, rating=4, review_text="ok")  # pending
+        Review.objects.create(product=self.product, user=self.fan, rating=4, review_text="ok")
+        board = lambda: [(row['user__username'], row['review_count']) for row in userstats.top_reviewers()]
+        self.assertEqual(board(), [('prolific', 2), ('fan', 1)])
+
+        # hiding keeps a review on the board, deleting drops it; the bound day is inside the window
+        recent.is_visible = False
+        recent.save()
+        self.assertEqual(board(), [('prolific', 2), ('fan', 1)])
+        recent.delete()
+        Review.objects.filter(pk=old.pk).update(created_at=now() - timedelta(days=30))
+        userstats.rebuild()
+        self.assertEqual(board(), [('fan', 2), ('prolific', 1)])
+        self.assertEqual(UserReviewDay.objects.filter(day__lt=localdate() - timedelta(days=40)).count(), 0)
+
+
+class ChangeFeedTests(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.author = User.objects.create_user(username='feed_author', password='authorpass')
+        self.other = User.objects.create_user(username='feed_other', password='otherpass')
+        self.admin = User.objects.create_user(username='feed_admin', password='adminpass', is_staff=True)
+        self.product = Product.objects.create(name="Feed", description="Desc", price=1.00)
+
+    def test_mutations_append_events_in_order(self):
+        self.client.force_authenticate(user=self.author)
+        response = self.client.post(reverse('review-list'), {'product': self.product.id, 'rating': 4, 'review_text': 'fine'}, format='json')
+        review_id = response.data['id']
+        self.client.patch(reverse('review-detail', args=[review_id]), {'rating': 5}, format='json')
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.post(reverse('review-approve-review', args=[review_id]))
+
+        self.client.force_authenticate(user=self.other)
+        self.client.post(reverse('review-react-to-review', args=[review_id]), {'reaction': 'like'}, format='json')
+        self.client.post(reverse('review-report-review', args=[review_id]), {'reason': 'spam'}, format='json')
+        self.client.post(reverse('review-add-comment', args=[review_id]), {'comment_text': 'hi'}, format='json')
+        # rejected writes leave no event
+        self.client.post(reverse('review-react-to-review', args=[review_id]), {'reaction': 'like'}, format='json')
+
+        self.client.force_authenticate(user=self.author)
+        self.client.delete(reverse('review-detail', args=[review_id]))
+
+        self.assertEqual(list(ChangeEvent.objects.order_by('id').values_list('kind', flat=True)), [
+            'review.created', 'review.updated', 'review.approved', 'notification.created',
+            'reaction.created', 'report.created', 'comment.created', 'review.deleted',
+        ])
+        self.assertEqual(set(ChangeEvent.objects.values_list('review_id', flat=True)), {review_id})
+        self.assertEqual(ChangeEvent.objects.get(kind='review.updated').payload['rating'], 5)
+
+    def test_feed_pages_with_cursor(self):
+        self.client.force_authenticate(user=self.author)
+        for i in range(5):
+            self.client.post(reverse('review-list'), {'product': self.product.id, 'rating': 3, 'review_text': f'r{i}'}, format='json')
+        self.assertEqual(self.client.get(reverse('change-feed')).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        seen, cursor = [], 0
+        while True:
+            response = self.client.get(reverse('change-feed'), {'after': cursor, 'limit': 2})
+            seen += [event['id'] for event in response.data['results']]
+            cursor = response.data['next_cursor']
+            if not response.data['has_more']:
+                break
+        self.assertEqual(seen, list(ChangeEvent.objects.order_by('id').values_list('id', flat=True)))
+        response = self.client.get(reverse('change-feed'), {'after': cursor})
+        self.assertEqual((response.data['results'], response.data['next_cursor']), ([], cursor))
+
+    def test_tail_command_resumes_from_saved_position(self):
+        self.client.force_authenticate(user=self.author)
+        for i in range(3):
+            self.client.post(reverse('review-list'), {'product': self.product.id, 'rating': 3, 'review_text': f'r{i}'}, format='json')
+
+        out = StringIO()
+        call_command('tail_events', consumer='indexer', batch_size=2, stdout=out, stderr=StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        self.assertEqual(EventCursor.objects.get(name='indexer').position, ChangeEvent.objects.latest('id').id)
+
+        self.client.post(reverse('review-list'), {'product': self.product.id, 'rating': 3, 'review_text': 'new'}, format='json')
+        out = StringIO()
+        call_command('tail_events', consumer='indexer', stdout=out, stderr=StringIO())
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['kind'], 'review.created')
+
+
+class AnalyticsEngineTests(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.author = User.objects.create_user(username='engine_author', password='authorpass')
+        self.fan = User.objects.create_user(username='engine_fan', password='fanpass')
+        self.admin = User.objects.create_user(username='engine_admin', password='adminpass', is_staff=True)
+        self.phone = Product.objects.create(name="Phone", description="Desc", price=1.00)
+        self.case = Product.objects.create(name="Case", description="Desc", price=1.00)
+
+    def test_views_read_the_same_precomputed_numbers(self):
+        liked = Review.objects.create(product=self.phone, user=self.author, rating=5, review_text="great great battery", is_visible=True)
+        Review.objects.create(product=self.phone, user=self.fan, rating=2, review_text="poor screen", is_visible=True)
+        Review.objects.create(product=self.case, user=self.author, rating=4, review_text="nice", is_visible=True)
+        Review.objects.create(product=self.case, user=self.fan, rating=1, review_text="pending")
+        Interaction.objects.create(review=liked, user=self.fan, reaction='like')
+
+        # nothing is computed on read
+        response = self.client.get(reverse('product-product-analytics', args=[self.phone.id]))
+        self.assertEqual(response.data['review_count_last_30_days'], 0)
+
+        call_command('update_analytics', stdout=StringIO())
+        response = self.client.get(reverse('product-product-analytics', args=[self.phone.id]))
+        self.assertEqual(response.data['review_count_last_30_days'], 2)
+        self.assertEqual(response.data['average_rating_last_30_days'], 3.5)
+        self.assertEqual(response.data['top_recent_rating'], 5)
+        self.assertEqual(response.data['common_words'][0], ('great', 2))
+
+        self.client.force_authenticate(user=self.admin)
+        general = self.client.get(reverse('general-analytics')).data
+        self.assertEqual([row['product_id'] for row in general['top_rated_products_last_30_days']], [self.case.id, self.phone.id])
+        self.assertEqual((general['top_review_by_likes']['id'], general['top_review_by_likes']['like_count']), (liked.id, 1))
+        # the dated admin report reads the base tables and agrees with the precomputed totals
+        reports = self.client.get(reverse('admin-reports')).data
+        totals = ProductAnalyticsDay.objects.aggregate(
+            not_approved=Sum('pending_count'), low_rated=Sum('low_rated_count'), offensive=Sum('offensive_count'),
+        )
+        self.assertEqual(totals, {'not_approved': 1, 'low_rated': 1, 'offensive': 1})
+        self.assertEqual((reports['not_approved_reviews'], reports['low_rated_reviews'], reports['offensive_reviews']), (1, 1, 1))
+
+    def test_delta_from_the_feed_and_idempotent_runs(self):
+        self.client.force_authenticate(user=self.author)
+        response = self.client.post(reverse('review-list'), {'product': self.phone.id, 'rating': 4, 'review_text': 'good'}, format='json')
+        review_id = response.data['id']
+        analytics.run()
+        self.assertEqual(ProductAnalyticsDay.objects.aggregate(n=Sum('pending_count'))['n'], 1)
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.post(reverse('review-approve-review', args=[review_id]))
+        analytics.run()
+        self.assertEqual(analytics.product_summary(self.phone.id)['review_count'], 1)
+        snapshot = list(ProductAnalyticsDay.objects.values())
+
+        # a second run with nothing new, or a rerun of the same delta, changes nothing
+        self.assertEqual(analytics.run(), 0)
+        EventCursor.objects.filter(name__startswith='analytics.').update(position=0)
+        analytics.run()
+        self.assertEqual(list(ProductAnalyticsDay.objects.values('product_id', 'day', 'review_count')),
+                         [{k: row[k] for k in ('product_id', 'day', 'review_count')} for row in snapshot])
 
+        self.client.force_authenticate(user=self.author)
+        self.client.delete(reverse('review-detail', args=[review_id]))
+        analytics.run()
+        self.assertFalse(ProductAnalyticsDay.objects.exists())
 
+    def test_rebuild_matches_incremental(self):
+        for rating in (1, 3, 5):
+            Review.objects.create(product=self.phone, user=self.author, rating=rating, review_text="ok bad", is_visible=True)
+        analytics.run(batch_size=1)
+        incremental = list(ProductAnalyticsDay.objects.values('product_id', 'day', 'review_count', 'rating_sum', 'offensive_count', 'word_counts'))
+        call_command('update_analytics', rebuild=True, stdout=StringIO())
+        self.assertEqual(list(ProductAnalyticsDay.objects.values('product_id', 'day', 'review_count', 'rating_sum', 'offensive_count', 'word_counts')), incremental)
 
+    def test_moving_a_review_refreshes_the_product_it_left(self):
+        review = Review.objects.create(product=self.phone, user=self.author, rating=4, review_text="solid", is_visible=True)
+        analytics.run()
+        self.client.force_authenticate(user=self.author)
+        self.client.patch(reverse('review-detail', args=[review.id]), {'product': self.case.id}, format='json')
+        analytics.run()
+        self.assertEqual(analytics.product_summary(self.phone.id)['review_count'], 0)
+        self.assertEqual(analytics.product_summary(self.case.id)['review_count'], 1)
+
+    def test_sentiment_backfill_refreshes_rows(self):
+        review = Review.objects.create(product=self.phone, user=self.author, rating=5, review_text="excellent value", is_visible=True)
+        Review.objects.filter(pk=review.pk).update(sentiment_score=None)
+        analytics.rebuild()
+        call_command('backfill_sentiment', workers=1, stdout=StringIO())
+        analytics.run()
+        self.assertEqual(analytics.product_summary(self.phone.id)['sentiment']['positive'], 1)
+
+
+class PrecomputeAnalyticsTests(APITestCase):
+    def setUp(self):
+        self.data = factories.build_dataset(reviews=120, users=8, products=6, seed=47, prefix='pre', comments_per_review=0.2)
+
+    def rows(self):
+        return sorted(ProductAnalyticsDay.objects.values_list(*analytics.ROW_FIELDS))
+
+    def test_matches_rebuild_and_resumes(self):
+        analytics.rebuild()
+        expected = self.rows()
+        ProductAnalyticsDay.objects.all().delete()
+
+        out = StringIO()
+        call_command('precompute_product_analytics', workers=1, chunk_size=2, stdout=out)
+        self.assertEqual(self.rows(), expected)
+        self.assertIn('scaling efficiency', out.getvalue())
+        self.assertEqual(events.load_position('analytics.precompute'), 0)  # finished: no run in progress
+
+        # interrupted after the first product: a rerun continues from there
+        first = self.data.products[0].id
+        ProductAnalyticsDay.objects.all().delete()
+        events.save_position('analytics.precompute', first)
+        out = StringIO()
+        call_command('precompute_product_analytics', workers=1, stdout=out)
+        self.assertIn(f'Resuming after product {first}', out.getvalue())
+        self.assertFalse(ProductAnalyticsDay.objects.filter(product_id=first).exists())
+        self.assertEqual(self.rows(), [row for row in expected if row[analytics.ROW_FIELDS.index('product_id')] != first])
+
+    def test_rejects_bad_options(self):
+        with self.assertRaises(CommandError):
+            call_command('precompute_product_analytics', workers=0, stdout=StringIO())
+
+
+class AdminReportsTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='mod_author', password='authorpass')
+        self.fan = User.objects.create_user(username='mod_fan', password='fanpass')
+        self.admin = User.objects.create_user(username='mod_admin', password='adminpass', is_staff=True)
+        self.product = Product.objects.create(name="Mod", description="Desc", price=1.00)
+        self.today = localdate()
+        self.rude = Review.objects.create(product=self.product, user=self.author, rating=1, review_text="stupid thing", is_visible=True)
+        self.pending = Review.objects.create(product=self.product, user=self.fan, rating=5, review_text="fine")
+        old = Review.objects.create(product=self.product, user=self.fan, rating=2, review_text="poor", is_visible=True)
+        Review.objects.filter(pk=old.pk).update(created_at=now() - timedelta(days=3))
+        Report.objects.create(review=self.rude, user=self.fan, reason='offensive')
+        Report.objects.create(review=self.pending, user=self.author, reason='spam')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_flag_follows_the_text(self):
+        self.assertTrue(self.rude.is_offensive)
+        self.rude.review_text = "nice thing"
+        self.rude.save()
+        self.assertFalse(Review.objects.get(pk=self.rude.pk).is_offensive)
+
+    def test_totals_and_days_for_a_range(self):
+        response = self.client.get(reverse('admin-reports'))
+        self.assertEqual((response.data['start'], response.data['end']), (self.today - timedelta(days=6), self.today))
+        self.assertEqual(len(response.data['days']), 7)
+        self.assertEqual(
+            (response.data['not_approved_reviews'], response.data['low_rated_reviews'], response.data['offensive_reviews'], response.data['reports']),
+            (1, 2, 2, 2),
+        )
+        self.assertEqual(response.data['reports_by_reason'], {'offensive': 1, 'spam': 1})
+        self.assertEqual(response.data['days'][-1]['low_rated_reviews'], 1)
+        self.assertEqual(response.data['days'][-4]['low_rated_reviews'], 1)
+
+        today = self.client.get(reverse('admin-reports'), {'start': self.today.isoformat(), 'end': self.today.isoformat()}).data
+        self.assertEqual((today['low_rated_reviews'], today['offensive_reviews'], len(today['days'])), (1, 1, 1))
+
+    def test_bad_ranges(self):
+        for params in ({'start': 'yesterday'}, {'start': '2026-02-01', 'end': '2026-01-01'}, {'start': '2020-01-01', 'end': '2026-01-01'}):
+            self.assertEqual(self.client.get(reverse('admin-reports'), params).status_code, 400)
+        self.client.force_authenticate(user=self.fan)
+        self.assertEqual(self.client.get(reverse('admin-reports')).status_code, 403)
+
+
+class ReviewArchiveTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='archive_author', password='authorpass')
+        self.fan = User.objects.create_user(username='archive_fan', password='fanpass')
+        self.product = Product.objects.create(name="Old", description="Desc", price=1.00)
+        self.old = Review.objects.create(product=self.product, user=self.author, rating=5, review_text="bad but great", is_visible=True)
+        self.new = Review.objects.create(product=self.product, user=self.author, rating=3, review_text="fine", is_visible=True)
+        Interaction.objects.create(review=self.old, user=self.fan, reaction='like')
+        Report.objects.create(review=self.old, user=self.fan, reason='spam')
+        comment = ReviewComment.objects.create(review=self.old, user=self.fan, comment_text='hi')
+        ReviewComment.objects.create(review=self.old, user=self.author, comment_text='hello', parent=comment)
+        # backdate, then bring the derived tables in line with the new dates
+        Review.objects.filter(pk=self.old.pk).update(created_at=now() - timedelta(days=400))
+        call_command('rebuild_rating_buckets', stdout=StringIO())
+        analytics.rebuild()
+
+    def snapshot(self):
+        self.product.refresh_from_db()
+        stats = UserStats.objects.get(user=self.author)
+        return (
+            self.product.rating_count, self.product.rating_avg, ProductRatingDay.objects.count(),
+            stats.review_count, stats.likes_received, UserStats.objects.get(user=self.fan).comment_count,
+            ProductAnalyticsDay.objects.aggregate(Sum('pending_count'), Sum('low_rated_count'), Sum('offensive_count')),
+        )
+
+    def test_archive_moves_rows_and_keeps_aggregates(self):
+        before = self.snapshot()
+        call_command('archive_reviews', days=365, stdout=StringIO())
+
+        self.assertEqual(list(Review.objects.values_list('id', flat=True)), [self.new.id])
+        self.assertEqual(list(ArchivedReview.objects.values_list('id', 'likes_count')), [(self.old.id, 1)])
+        self.assertEqual((ArchivedInteraction.objects.count(), ArchivedReport.objects.count(), ArchivedReviewComment.objects.count()), (1, 1, 2))
+        self.assertFalse(ReviewComment.objects.exists())
+        self.assertTrue(ChangeEvent.objects.filter(kind='review.archived', review_id=self.old.id).exists())
+
+        analytics.run()
+        self.assertEqual(self.snapshot(), before)
+        # rebuilding from the base tables counts the archive too
+        call_command('rebuild_rating_buckets', stdout=StringIO())
+        call_command('rebuild_user_stats', stdout=StringIO())
+        analytics.rebuild()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_archiving_a_cluster_root_keeps_live_members_flagged(self):
+        text = "This phone is amazing, the battery lasts forever and the camera takes stunning pictures at night"
+        reviews = [Review.objects.create(product=self.product, user=self.fan, rating=5, review_text=text) for _ in range(4)]
+        Review.objects.filter(pk__in=[reviews[0].pk, reviews[1].pk]).update(created_at=now() - timedelta(days=400))
+        call_command('archive_reviews', days=365, stdout=StringIO())
+
+        heir = reviews[2].id
+        self.assertEqual(list(DuplicateReview.objects.values_list('review_id', 'duplicate_of_id')), [(reviews[3].id, heir)])
+        self.assertEqual(set(LSHBucket.objects.values_list('review_id', flat=True)), {heir})
+
+    def test_archived_reviews_are_read_only_on_request(self):
+        call_command('archive_reviews', days=365, stdout=StringIO())
+
+        self.assertEqual(len(self.client.get(reverse('review-list')).data), 1)
+        response = self.client.get(reverse('review-list'), {'include_archived': 'true'})
+        self.assertEqual([(review['id'], review.get('archived', False)) for review in response.data], [(self.new.id, False), (self.old.id, True)])
+        response = self.client.get(reverse('review-list'), {'include_archived': 'true', 'rating': 5})
+        self.assertEqual([review['id'] for review in response.data], [self.old.id])
+
+        self.assertEqual(self.client.get(reverse('review-detail', args=[self.old.id])).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('review-detail', args=[self.old.id]), {'include_archived': 'true'})
+        self.assertEqual((response.status_code, response.data['likes_count']), (status.HTTP_200_OK, 1))
+
+
+### tests for throttling ##
+
+@override_settings(REST_FRAMEWORK={
+    'DEFAULT_AUTHENTICATION_CLASSES': ('rest_framework_simplejwt.authentication.JWTAuthentication',),
+    'DEFAULT_THROTTLE_RATES': {'review_comment': '2/min', 'review_react': '2/min'},
+})
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(username='spammer', password='spammerpass')
+        self.other = User.objects.create_user(username='other', password='otherpass')
+        product = Product.objects.create(name="Throttled", description="Desc", price=1.00)
+        self.review = Review.objects.create(product=product, user=self.other, rating=3, review_text="ok", is_visible=True)
+        self.url = reverse('review-add-comment', args=[self.review.id])
+
+    def test_comment_bucket_is_exhausted_with_retry_after(self):
+        self.client.force_authenticate(user=self.user)
+        for _ in range(2):
+            response = self.client.post(self.url, {'comment_text': 'hi'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(self.url, {'comment_text': 'hi'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(ReviewComment.objects.count(), 2)
+
+    def test_buckets_are_per_user_and_per_endpoint(self):
+        self.client.force_authenticate(user=self.user)
+        for _ in range(3):
+            self.client.post(self.url, {'comment_text': 'hi'}, format='json')
+        # another endpoint has its own bucket
+        response = self.client.post(reverse('review-react-to-review', args=[self.review.id]), {'reaction': 'like'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # another user has its own bucket
+        self.client.force_authenticate(user=self.other)
+        response = self.client.post(self.url, {'comment_text': 'hi'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_refilled_bucket_is_updated_atomically(self):
+        # a stale bucket (refilled long ago) grants exactly its capacity; only add/incr/decr touch it
+        self.client.force_authenticate(user=self.user)
+        key = f'throttle:review_comment:user:{self.user.pk}'
+        caches['throttle'].set(key, 1)
+        with mock.patch.object(caches['throttle'], 'set', side_effect=AssertionError("non-atomic set")):
+            codes = [self.client.post(self.url, {'comment_text': 'hi'}, format='json').status_code for _ in range(3)]
+        self.assertEqual(codes, [201, 201, 429])
 
 
 ### tests for comments ##
+
+class CommentThreadTests(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(username='commenter', password='commenterpass')
+        product = Product.objects.create(name="Threads", description="Desc", price=1.00)
+        self.review = Review.objects.create(product=product, user=self.user, rating=4, review_text="ok", is_visible=True)
+        self.url = reverse('review-list-comments', args=[self.review.id])
+        self.client.force_authenticate(user=self.user)
+
+    def add(self, text, parent=None):
+        data = {'comment_text': text}
+        if parent is not None:
+            data['parent'] = parent
+        response = self.client.post(reverse('review-add-comment', args=[self.review.id]), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data['id']
+
+    def test_replies_are_nested_and_counted(self):
+        first = self.add("first")
+        reply = self.add("reply", parent=first)
+        self.add("reply to reply", parent=reply)
+        second = self.add("second")
+
+        with self.assertNumQueries(3):  # review, page boundaries, thread with users
+            response = self.client.get(self.url)
+        results = response.data['results']
+        self.assertEqual([c['id'] for c in results], [second, first])  # newest first
+        self.assertEqual(results[1]['reply_count'], 1)
+        self.assertEqual(results[1]['replies'][0]['replies'][0]['comment_text'], "reply to reply")
+        self.assertEqual(results[1]['user'], 'commenter')
+
+        response = self.client.get(self.url, {'depth': 0})
+        self.assertEqual(response.data['results'][1]['replies'], [])
+
+    def test_keyset_pagination_per_level(self):
+        parent = self.add("parent")
+        replies = [self.add(f"reply {i}", parent=parent) for i in range(5)]
+        response = self.client.get(self.url, {'parent': parent, 'limit': 2})
+        self.assertEqual([c['id'] for c in response.data['results']], replies[:2])  # oldest replies first
+        response = self.client.get(self.url, {'parent': parent, 'limit': 2, 'after': response.data['next_cursor']})
+        self.assertEqual([c['id'] for c in response.data['results']], replies[2:4])
+
+    def test_reply_must_belong_to_same_review(self):
+        other_review = Review.objects.create(product=self.review.product, user=self.user, rating=1, review_text="x")
+        foreign = ReviewComment.objects.create(review=other_review, user=self.user, comment_text="elsewhere")
+        response = self.client.post(reverse('review-add-comment', args=[self.review.id]), {'comment_text': 'x', 'parent': foreign.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 ### tests on reactions ###
 ## tests for notifications ##
 
+class NotificationInboxTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='inbox', password='inboxpass')
+        self.other = User.objects.create_user(username='other_inbox', password='otherpass')
+        self.notifications = [inbox.notify(self.user, f"message {i}") for i in range(3)]
+        inbox.notify(self.other, "not yours")
+        self.client.force_authenticate(user=self.user)
+
+    def test_unread_filter_and_counter(self):
+        inbox.mark_read(self.user, [self.notifications[0].id])
+        response = self.client.get(reverse('notifications'), {'unread': 'true'})
+        self.assertEqual(len(response.data), 2)
+        response = self.client.get(reverse('notifications-unread-count'))
+        self.assertEqual(response.data['unread_count'], 2)
+
+    def test_bulk_mark_read_is_one_update(self):
+        ids = [n.id for n in self.notifications[:2]]
+        # savepoint, one UPDATE of notifications, one UPDATE of the counter, release, counter read
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('notifications-mark-read'), {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'marked_read': 2, 'unread_count': 1})
+        # marking everything only touches what is still unread, and never other users' rows
+        response = self.client.post(reverse('notifications-mark-read'), {}, format='json')
+        self.assertEqual(response.data, {'marked_read': 1, 'unread_count': 0})
+        self.assertEqual(inbox.unread_count(self.other), 1)
+
+    def test_prune_archives_old_read_notifications(self):
+        inbox.mark_read(self.user)
+        Notification.objects.filter(id=self.notifications[0].id).update(created_at=now() - timedelta(days=200))
+        call_command('prune_notifications', days=90, batch_size=1, archive=True, stdout=StringIO())
+        self.assertFalse(Notification.objects.filter(id=self.notifications[0].id).exists())
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(ArchivedNotification.objects.get().message, "message 0")
+
+
+class DeltaSyncTests(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.author = User.objects.create_user(username='sync_author', password='authorpass')
+        self.fan = User.objects.create_user(username='sync_fan', password='fanpass')
+        self.product = Product.objects.create(name="Synced", description="Desc", price=1.00)
+        self.other = Product.objects.create(name="Elsewhere", description="Desc", price=1.00)
+        self.reviews = [
+            Review.objects.create(product=self.product, user=self.author, rating=4, review_text=f"review {i}", is_visible=True)
+            for i in range(3)
+        ]
+        Review.objects.create(product=self.other, user=self.author, rating=4, review_text="other", is_visible=True)
+        # everything so far is older than the sync window
+        Review.objects.update(updated_at=now() - timedelta(minutes=5))
+
+    def list_reviews(self, headers=None, **params):
+        return self.client.get(reverse('review-list'), {'product': self.product.id, **params}, headers=headers)
+
+    def test_etag_answers_304_until_something_changes(self):
+        first = self.list_reviews()
+        self.assertTrue(first['ETag'])
+        with self.assertNumQueries(2):  # product filter validation + the ETag aggregate
+            response = self.list_reviews({'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # views don't change the tag, edits and reactions do
+        self.client.get(reverse('review-detail', args=[self.reviews[0].id]))
+        self.assertEqual(self.list_reviews({'If-None-Match': first['ETag']}).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.force_authenticate(user=self.fan)
+        self.client.post(reverse('review-react-to-review', args=[self.reviews[0].id]), {'reaction': 'like'}, format='json')
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.list_reviews({'If-None-Match': first['ETag']}).status_code, status.HTTP_200_OK)
+
+    def test_report_changes_the_reporters_etag(self):
+        # the list shows is_reported_by_user: reporting must not leave the reporter a 304
+        self.client.force_authenticate(user=self.fan)
+        first = self.list_reviews()
+        self.client.post(reverse('review-report-review', args=[self.reviews[0].id]), {'reason': 'spam'}, format='json')
+        response = self.list_reviews({'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(next(row for row in response.data if row['id'] == self.reviews[0].id)['is_reported_by_user'])
+
+    def test_since_returns_changed_and_removed_ids(self):
+        token = self.list_reviews()['X-Sync-Token']
+        self.client.force_authenticate(user=self.author)
+        self.client.patch(reverse('review-detail', args=[self.reviews[0].id]), {'rating': 2}, format='json')
+        self.client.delete(reverse('review-detail', args=[self.reviews[1].id]))
+        created = self.client.post(reverse('review-list'), {'product': self.product.id, 'rating': 5, 'review_text': 'new'}, format='json').data
+        other = Review.objects.get(product=self.other)
+        self.client.delete(reverse('review-detail', args=[other.id]))
+
+        response = self.list_reviews(since=token)
+        self.assertEqual(sorted(row['id'] for row in response.data['results']), sorted([self.reviews[0].id, created['id']]))
+        self.assertEqual(response.data['deleted'], [self.reviews[1].id])  # other products' deletes are left out
+        self.assertEqual(response.data['sync_token'], response['X-Sync-Token'])
+
+        # a filtered list also drops rows that changed out of (or never matched) the filter
+        response = self.list_reviews(since=token, rating=4)
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['deleted'], [self.reviews[0].id, self.reviews[1].id, created['id']])
+
+        self.assertEqual(self.list_reviews(since='soon').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_notification_deltas(self):
+        notifications = [inbox.notify(self.author, f"message {i}") for i in range(3)]
+        Notification.objects.update(updated_at=now() - timedelta(minutes=5), created_at=now() - timedelta(days=200))
+        self.client.force_authenticate(user=self.author)
+        first = self.client.get(reverse('notifications'), {'unread': 'true'})
+        self.assertEqual(self.client.get(reverse('notifications'), {'unread': 'true'}, headers={'If-None-Match': first['ETag']}).status_code, 304)
+
+        inbox.mark_read(self.author, [notifications[0].id])
+        response = self.client.get(reverse('notifications'), {'unread': 'true', 'since': first['X-Sync-Token']})
+        self.assertEqual((response.data['results'], response.data['deleted']), ([], [notifications[0].id]))
+
+        token = response.data['sync_token']
+        call_command('prune_notifications', days=90, stdout=StringIO())
+        response = self.client.get(reverse('notifications'), {'since': token})
+        self.assertEqual((response.data['results'], response.data['deleted']), ([], [notifications[0].id]))
+
+
+class LazyLoadGuardTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='guard_author', password='authorpass')
+        self.product = Product.objects.create(name="Guarded", description="Desc", price=1.00)
+        self.review = Review.objects.create(product=self.product, user=self.author, rating=4, review_text="fine", is_visible=True)
+        self.comment = ReviewComment.objects.create(review=self.review, user=self.author, comment_text="hi")
+
+    def test_serializers_raise_on_lazy_loads(self):
+        self.assertTrue(settings.FORBID_LAZY_LOADS)  # set by products.testrunner.TestRunner
+        with self.assertRaisesMessage(LazyLoadError, "select_related('user')"):
+            ReviewCommentSerializer(ReviewComment.objects.get(pk=self.comment.pk)).data
+        with self.assertRaisesMessage(LazyLoadError, 'comment_text'):
+            ReviewCommentSerializer(ReviewComment.objects.select_related('user').defer('comment_text').get(pk=self.comment.pk)).data
+        self.assertEqual(ReviewCommentSerializer(ReviewComment.objects.select_related('user').get(pk=self.comment.pk)).data['user'], 'guard_author')
+        # outside serializers, and with the guard off, lazy loads work as usual
+        self.assertEqual(ReviewComment.objects.get(pk=self.comment.pk).user.username, 'guard_author')
+        with override_settings(FORBID_LAZY_LOADS=False):
+            self.assertEqual(ReviewCommentSerializer(ReviewComment.objects.get(pk=self.comment.pk)).data['user'], 'guard_author')
+
+    def test_str_reads_the_review_id_only(self):
+        Interaction.objects.create(review=self.review, user=self.author, reaction='like')
+        Report.objects.create(review=self.review, user=self.author, reason='spam')
+        rows = [
+            ReviewComment.objects.select_related('user').get(pk=self.comment.pk),
+            Interaction.objects.select_related('user').get(),
+            Report.objects.select_related('user').get(),
+        ]
+        with self.assertNumQueries(0):
+            self.assertTrue(all(str(self.review.id) in str(row) for row in rows))
+
+    def test_notification_admin_cannot_change_read_state(self):
+        admin = User.objects.create_superuser(username='inbox_admin', password='adminpass')
+        self.client.force_login(admin)
+        notification = inbox.notify(self.author, 'hello')
+        url = reverse('admin:products_notification_change', args=[notification.id])
+        self.client.post(url, {'message': 'edited', 'is_read': 'on', 'user': admin.id})
+        notification.refresh_from_db()
+        self.assertEqual((notification.message, notification.is_read, notification.user_id), ('edited', False, self.author.id))
+        self.assertEqual(inbox.unread_count(self.author), 1)
+        self.assertEqual(self.client.get(reverse('admin:products_notification_add')).status_code, 403)
+
+    def test_admin_changelists_do_not_grow_with_rows(self):
+        admin = User.objects.create_superuser(username='guard_admin', password='adminpass')
+        self.client.force_login(admin)
+        urls = ['admin:products_review_changelist', 'admin:products_reviewcomment_changelist',
+                'admin:products_interaction_changelist', 'admin:products_report_changelist']
+
+        def query_counts():
+            counts = []
+            for url in urls:
+                with CaptureQueriesContext(connection) as ctx:
+                    self.assertEqual(self.client.get(reverse(url)).status_code, 200)
+                counts.append(len(ctx.captured_queries))
+            return counts
+
+        before = query_counts()
+        users = [User.objects.create_user(username=f'guard_{i}', password='pass') for i in range(5)]
+        for user in users:
+            review = Review.objects.create(product=self.product, user=user, rating=3, review_text="ok")
+            ReviewComment.objects.create(review=review, user=user, comment_text="c")
+            Interaction.objects.create(review=review, user=user, reaction='like')
+            Report.objects.create(review=review, user=user, reason='spam')
+        self.assertEqual(query_counts(), before)
+
+
+## tests for response rendering / compression ##
+
+@override_settings(RESPONSE_COMPRESSION={'MIN_SIZE': 200, 'EXCLUDE_PATHS': []})
+class CompressionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='compress', password='compresspass')
+        product = Product.objects.create(name="Compressed", description="Desc", price=3.00)
+        for i in range(10):
+            Review.objects.create(product=product, user=self.user, rating=5, review_text="long review text " * 10, is_visible=True)
+
+    def test_gzip_when_accepted(self):
+        response = self.client.get(reverse('review-list'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 10)
+
+    def test_no_compression_without_accept_encoding(self):
+        response = self.client.get(reverse('review-list'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.json()), 10)
+
+    def test_refused_encoding_is_not_used(self):
+        response = self.client.get(reverse('review-list'), HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_responses_are_not_compressed(self):
+        with override_settings(RESPONSE_COMPRESSION={'MIN_SIZE': 10 ** 6}):
+            response = self.client.get(reverse('review-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_token_endpoint_opts_out(self):
+        response = self.client.post(
+            '/api/auth/login/', {'username': 'compress', 'password': 'compresspass'},
+            format='json', HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+### query plan regression tests ###
+class FactoryTests(APITestCase):
+    def build(self, seed):
+        data = factories.build_dataset(reviews=300, seed=seed)
+        return data, [
+            (r.product.name, r.user.username, r.rating, r.review_text, r.is_visible)
+            for r in Review.objects.select_related('product', 'user').order_by('id')
+        ] + list(Interaction.objects.order_by('id').values_list('review__review_text', 'user__username', 'reaction'))
+
+    def test_same_seed_builds_same_data(self):
+        for seed, expect_equal in ((7, True), (8, False)):
+            with transaction.atomic():
+                _, first = self.build(7)
+                transaction.set_rollback(True)
+            with transaction.atomic():
+                _, second = self.build(seed)
+                transaction.set_rollback(True)
+            self.assertEqual(first == second, expect_equal)
+
+    def test_derived_tables_match_base_tables(self):
+        data, _ = self.build(1)
+        self.assertEqual(len(data.reviews), 300)
+        for product in Product.objects.all():
+            visible = Review.objects.filter(product=product, is_visible=True)
+            self.assertEqual(product.rating_count, visible.count())
+            self.assertEqual(product.rating_count, sum(
+                ProductRatingDay.objects.filter(product=product).values_list('count', flat=True)))
+        for user in data.users:
+            stats = UserStats.objects.get(user=user)
+            self.assertEqual({field: getattr(stats, field) for field in userstats.compute(user.id)}, userstats.compute(user.id))
+            self.assertEqual(inbox.unread_count(user), Notification.objects.filter(user=user, is_read=False).count())
+
+        # the single-pass rebuild and the incremental engine agree
+        rows = set(ProductAnalyticsDay.objects.values_list('product_id', 'day', 'review_count', 'pending_count', 'top_review_id'))
+        ProductAnalyticsDay.objects.all().delete()
+        EventCursor.objects.filter(name__in=analytics.MARKS).delete()
+        analytics.run()
+        self.assertEqual(set(ProductAnalyticsDay.objects.values_list('product_id', 'day', 'review_count', 'pending_count', 'top_review_id')), rows)
+
+    def test_users_share_the_factory_password(self):
+        data = factories.build_dataset(reviews=20, users=3, derived=False)
+        self.assertTrue(all(user.check_password(factories.PASSWORD) for user in data.users))
+        response = self.client.post(reverse('token_obtain_pair'), {'username': data.users[0].username, 'password': factories.PASSWORD})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_comment_paths_and_reply_counts(self):
+        factories.build_dataset(reviews=200, derived=False, comments_per_review=2.0)
+        comments = {c.id: c for c in ReviewComment.objects.all()}
+        self.assertTrue(any(c.parent_id for c in comments.values()))
+        for comment in comments.values():
+            prefix = comments[comment.parent_id].path if comment.parent_id else ''
+            self.assertEqual(comment.path, prefix + ReviewComment.path_segment(comment.id))
+            self.assertEqual(comment.reply_count, sum(1 for c in comments.values() if c.parent_id == comment.id))
+
+
+class StartupTests(APITestCase):
+    def test_profile_startup_command(self):
+        out = StringIO()
+        call_command('profile_startup', runs=1, path='/api/', stdout=out)
+        self.assertIn('cold start to first response', out.getvalue())
+        self.assertIn('products.views', out.getvalue())
+
+
+# Every action runs under CaptureQueriesContext. Each captured statement goes through
+# EXPLAIN QUERY PLAN and must not scan a hot table, and the number of statements must
+# stay within the action's budget. On failure the offending SQL and plan are printed.
+
+GUARDED_TABLES = {
+    'products_review', 'products_interaction', 'products_report', 'products_reviewcomment',
+    'products_notification', 'products_changeevent',
+}
+STATEMENT_RE = re.compile(r'\s*(SELECT|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+# "SCAN t" and "SCAN t USING [COVERING] INDEX i" both read every row; Django aliases subquery tables U0, U1...
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)')
+SUBQUERY_ALIAS_RE = re.compile(r'^U\d+$')
+
+
+class QueryPlanAssertions:
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[3] for row in cursor.fetchall()]
+
+    def assertQueryPlans(self, name, budget, action, allow_scans=()):
+        with CaptureQueriesContext(connection) as ctx:
+            response = action()
+        if response is not None:
+            self.assertLess(response.status_code, 400, f"{name}: HTTP {response.status_code}")
+
+        statements = [query['sql'] for query in ctx.captured_queries if STATEMENT_RE.match(query['sql'])]
+        problems = []
+        if len(statements) > budget:
+            problems.append(f"{len(statements)} queries, budget is {budget}:\n" + '\n'.join(statements))
+        for sql in statements:
+            plan = self.explain(sql)
+            scans = [
+                line for line in plan
+                if (match := FULL_SCAN_RE.match(line))
+                and (match.group(1) in GUARDED_TABLES or SUBQUERY_ALIAS_RE.match(match.group(1)))
+                and match.group(1) not in allow_scans
+            ]
+            if scans:
+                problems.append(f"full scan ({', '.join(scans)}) in:\n{sql}\nplan:\n  " + '\n  '.join(plan))
+        if problems:
+            self.fail(f"{name}:\n" + '\n\n'.join(problems))
+
+
+class QueryPlanTests(QueryPlanAssertions, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = factories.build_dataset(reviews=500, users=30, products=40, seed=39, prefix='plan', comments_per_review=1.0)
+        cls.users, cls.products = data.users, data.products
+        cls.reviews = list(Review.objects.filter(id__in=data.reviews).select_related('user').order_by('id'))
+        cls.admin = User.objects.create_user(username='plan_admin', password='adminpass', is_staff=True)
+        NotificationInbox.objects.create(user=cls.admin)
+        UserStats.objects.create(user=cls.admin)
+
+    def setUp(self):
+        caches['throttle'].clear()
+
+    def test_product_search_reads_the_fts_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('product-list'), {'q': 'plan'})
+        self.assertTrue(response.data)
+        [sql] = [query['sql'] for query in ctx.captured_queries if STATEMENT_RE.match(query['sql'])]
+        self.assertTrue(any(FTS_TABLE in line and 'VIRTUAL TABLE' in line for line in self.explain(sql)), sql)
+
+    def run_analytics(self):
+        analytics.run()
+
+    def as_user(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client
+
+    def test_read_actions(self):
+        product, review, author = self.products[0], self.reviews[0], self.reviews[0].user
+        ids = ','.join(str(r.id) for r in self.reviews[:20])
+        cases = [
+            ('product list', 1, lambda: self.client.get(reverse('product-list'), {'min_price': 5, 'ordering': '-rating_avg'})),
+            ('product search', 1, lambda: self.client.get(reverse('product-list'), {'q': 'plan'})),
+            ('product retrieve', 1, lambda: self.client.get(reverse('product-detail', args=[product.id]))),
+            ('product facets', 1, lambda: self.client.get(reverse('product-facets'))),
+            ('product batch', 1, lambda: self.client.get(reverse('product-batch'), {'ids': ','.join(str(p.id) for p in self.products[:10])})),
+            ('product analytics', 2, lambda: self.client.get(reverse('product-product-analytics', args=[product.id]))),
+            ('product rating trend', 2, lambda: self.client.get(reverse('product-rating-trend', args=[product.id]))),
+            ('product related', 1, lambda: self.client.get(reverse('product-related', args=[product.id]))),
+            # the unpaginated list returns every review by design; lists add an ETag aggregate and the sync token
+            ('review list', 3, lambda: self.client.get(reverse('review-list')), {'products_review'}),
+            ('review list by product', 5, lambda: self.as_user(author).get(reverse('review-list'), {'product': product.id})),
+            ('review retrieve', 2, lambda: self.as_user(author).get(reverse('review-detail', args=[review.id]))),
+            ('review batch', 2, lambda: self.as_user(author).get(reverse('review-batch'), {'ids': ids})),
+            ('review comments', 3, lambda: self.client.get(reverse('review-list-comments', args=[review.id]))),
+            ('general analytics', 5, lambda: self.as_user(self.admin).get(reverse('general-analytics'))),
+            ('admin reports', 2, lambda: self.as_user(self.admin).get(reverse('admin-reports'))),
+            ('change feed', 1, lambda: self.as_user(self.admin).get(reverse('change-feed'), {'after': 0})),
+            ('notifications', 3, lambda: self.as_user(author).get(reverse('notifications'), {'unread': 'true'})),
+            ('unread count', 1, lambda: self.as_user(author).get(reverse('notifications-unread-count'))),
+            ('user summary', 1, lambda: self.as_user(author).get(reverse('user-summary'))),
+            ('reviewer profile', 2, lambda: self.client.get(reverse('reviewer-profile', args=[author.username]))),
+        ]
+        for name, budget, action, *allow_scans in cases:
+            with self.subTest(name):
+                self.assertQueryPlans(name, budget, action, *allow_scans)
+            self.client.force_authenticate(user=None)
+
+    def test_write_actions(self):
+        author = self.users[0]
+        pending = Review.objects.select_related('user').filter(is_visible=False).first()
+        target = self.reviews[300]
+        own = Review.objects.select_related('user').filter(user=author).first()
+        cases = [
+            ('review create', 12, lambda: self.as_user(author).post(reverse('review-list'), {'product': self.products[1].id, 'rating': 4, 'review_text': 'solid'}, format='json')),
+            ('review update', 5, lambda: self.as_user(own.user).patch(reverse('review-detail', args=[own.id]), {'rating': 1}, format='json')),
+            ('review approve', 12, lambda: self.as_user(self.admin).post(reverse('review-approve-review', args=[pending.id]))),
+            ('review react', 7, lambda: self.as_user(self.admin).post(reverse('review-react-to-review', args=[target.id]), {'reaction': 'like'}, format='json')),
+            ('review report', 6, lambda: self.as_user(self.admin).post(reverse('review-report-review', args=[target.id]), {'reason': 'spam'}, format='json')),
+            ('review comment', 5, lambda: self.as_user(self.admin).post(reverse('review-add-comment', args=[target.id]), {'comment_text': 'why?'}, format='json')),
+            ('mark read', 3, lambda: self.as_user(pending.user).post(reverse('notifications-mark-read'), {}, format='json')),
+            ('review delete', 23, lambda: self.as_user(own.user).delete(reverse('review-detail', args=[own.id]))),
+            ('analytics run', 13, self.run_analytics),
+        ]
+        for name, budget, action in cases:
+            with self.subTest(name):
+                self.assertQueryPlans(name, budget, action)
 
@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    # "30/min" -> (30 tokens, 60 seconds), same format as DRF's DEFAULT_THROTTLE_RATES
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    # Token bucket per user (or IP for anonymous users) and per endpoint scope.
+    # The rate "N/period" gives a bucket of N tokens refilled at N tokens per period.
+    #
+    # Implemented as GCRA: the cache keeps one integer per bucket, the "theoretical arrival
+    # time" in microseconds, and every request moves it forward with an atomic cache.incr(),
+    # so concurrent workers sharing the cache never grant the same token twice.
+    # The cache alias comes from settings.THROTTLE_CACHE (any backend with atomic incr).
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def get_cache_key(self, request, scope):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'throttle:{scope}:{ident}'
+
+    def allow_request(self, request, view):
+        scope = getattr(view, self.scope_attr, None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+
+        capacity, period = parse_rate(rate)
+        interval = period * 1_000_000 // capacity  # microseconds per token
+        burst = capacity * interval
+        key = self.get_cache_key(request, scope)
+        now = int(time.time() * 1_000_000)
+
+        # every change is an atomic add() / incr() / decr(): no read-modify-write between workers
+        self.cache.add(key, now, timeout=period)  # only creates a missing bucket
+        try:
+            tat = self.cache.incr(key, interval)
+        except ValueError:  # evicted between add and incr
+            self.cache.add(key, now, timeout=period)
+            tat = self.cache.incr(key, interval)
+        lag = now - (tat - interval)
+        if lag > 0:
+            # the bucket refilled past "now": catch the stored time up. Two workers racing here can
+            # both add their lag, which only delays later tokens, it never grants one twice
+            tat = self.cache.incr(key, lag)
+
+        if tat - now > burst:
+            # give the token back, the request is rejected
+            self.cache.decr(key, interval)
+            self.wait_seconds = (tat - now - burst) / 1_000_000
+            return False
+
+        self.cache.touch(key, timeout=period)
+        return True
+
+    def wait(self):
+        # used by DRF for the Retry-After header
+        return self.wait_seconds
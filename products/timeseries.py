@@ -0,0 +1,128 @@
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast, Greatest, TruncDate
+from django.utils.timezone import localdate
+
+from .models import ArchivedReview, Product, ProductRatingDay, Review
+
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def add_to_bucket(product_id, created_at, rating, sign=1):
+    # add (sign=1) or remove (sign=-1) one visible review from its daily bucket
+    day = localdate(created_at)
+    changes = {
+        'count': F('count') + sign,
+        'rating_sum': F('rating_sum') + sign * rating,
+        f'stars_{rating}': F(f'stars_{rating}') + sign,
+    }
+    if ProductRatingDay.objects.filter(product_id=product_id, day=day).update(**changes) or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            ProductRatingDay.objects.create(product_id=product_id, day=day, count=1, rating_sum=rating, **{f'stars_{rating}': 1})
+    except IntegrityError:
+        # created by a concurrent writer in the meantime
+        ProductRatingDay.objects.filter(product_id=product_id, day=day).update(**changes)
+
+
+def adjust_product_rating(product_id, rating, sign=1):
+    # keep Product.rating_count / rating_sum / rating_avg in step with the buckets
+    Product.objects.filter(pk=product_id).update(
+        rating_count=Greatest(F('rating_count') + sign, 0),
+        rating_sum=Greatest(F('rating_sum') + sign * rating, 0),
+    )
+    Product.objects.filter(pk=product_id).update(rating_avg=Case(
+        When(rating_count=0, then=Value(None)),
+        default=Cast(F('rating_sum'), FloatField()) / F('rating_count'),
+    ))
+
+
+def rebuild_product_ratings():
+    # recompute every product's aggregates from visible reviews, hot and archived
+    totals = {}
+    for model in (Review, ArchivedReview):
+        rows = model.objects.filter(is_visible=True).values('product_id').annotate(n=Count('id'), total=Sum('rating')).order_by()
+        for row in rows:
+            n, total = totals.get(row['product_id'], (0, 0))
+            totals[row['product_id']] = (n + row['n'], total + row['total'])
+
+    Product.objects.update(rating_count=0, rating_sum=0, rating_avg=None)
+    for product_id, (n, total) in totals.items():
+        Product.objects.filter(pk=product_id).update(rating_count=n, rating_sum=total, rating_avg=total / n)
+
+
+def rebuild_buckets():
+    # recompute every bucket from visible reviews (hot and archived) with one grouped query per table
+    buckets = {}
+    for model in (Review, ArchivedReview):
+        rows = (
+            model.objects.filter(is_visible=True)
+            .annotate(day=TruncDate('created_at'))
+            .values('product_id', 'day', 'rating')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            bucket = buckets.setdefault(
+                (row['product_id'], row['day']),
+                ProductRatingDay(product_id=row['product_id'], day=row['day']),
+            )
+            bucket.count += row['n']
+            bucket.rating_sum += row['n'] * row['rating']
+            stars = f"stars_{row['rating']}"
+            setattr(bucket, stars, getattr(bucket, stars) + row['n'])
+
+    with transaction.atomic():
+        ProductRatingDay.objects.all().delete()
+        ProductRatingDay.objects.bulk_create(buckets.values(), batch_size=1000)
+        rebuild_product_ratings()
+    return len(buckets)
+
+
+def period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())  # Monday
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def rating_series(product, start, end, granularity='day'):
+    # one range scan over (product, day), folded into periods with empty periods filled in
+    periods = {}
+    rows = (
+        ProductRatingDay.objects.filter(product=product, day__range=(start, end))
+        .order_by('day')
+        .values_list('day', 'count', 'rating_sum', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+    )
+    for day, count, rating_sum, *stars in rows:
+        totals = periods.setdefault(period_start(day, granularity), [0, 0, 0, 0, 0, 0, 0])
+        totals[0] += count
+        totals[1] += rating_sum
+        for i, value in enumerate(stars):
+            totals[2 + i] += value
+
+    series = []
+    current = period_start(start, granularity)
+    while current <= end:
+        count, rating_sum, *stars = periods.get(current, [0, 0, 0, 0, 0, 0, 0])
+        series.append({
+            'period_start': current,
+            'count': count,
+            'average_rating': round(rating_sum / count, 2) if count else None,
+            'distribution': {str(star): stars[star - 1] for star in range(1, 6)},
+        })
+        current = next_period(current, granularity)
+    return series
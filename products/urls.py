@@ -2,9 +2,9 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import ProductViewSet, ReviewViewSet , RegisterView, CustomTokenObtainPairView, CustomTokenRefreshView, LogoutView
 
-from .views import GeneralAnalyticsView
-from .views import AdminReportsView
-from .views import NotificationListView
+from .views import GeneralAnalyticsView, UserSummaryView, ReviewerProfileView
+from .views import AdminReportsView, DuplicateReviewsView, ChangeFeedView, AuthMetricsView
+from .views import NotificationListView, NotificationUnreadCountView, NotificationMarkReadView
 
 router = DefaultRouter()
 router.register('products', ProductViewSet, basename='product')
@@ -17,8 +17,15 @@ urlpatterns = [
     path('auth/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('analytics/general/', GeneralAnalyticsView.as_view(), name='general-analytics'),
+    path('users/me/summary/', UserSummaryView.as_view(), name='user-summary'),
+    path('users/<str:username>/profile/', ReviewerProfileView.as_view(), name='reviewer-profile'),
     path('admin/reports/', AdminReportsView.as_view(), name='admin-reports'),
+    path('admin/duplicates/', DuplicateReviewsView.as_view(), name='admin-duplicates'),
+    path('admin/auth-metrics/', AuthMetricsView.as_view(), name='auth-metrics'),
+    path('events/', ChangeFeedView.as_view(), name='change-feed'),
     path('notifications/', NotificationListView.as_view(), name='notifications'),
+    path('notifications/unread-count/', NotificationUnreadCountView.as_view(), name='notifications-unread-count'),
+    path('notifications/mark-read/', NotificationMarkReadView.as_view(), name='notifications-mark-read'),
 ]
  
  ##add endpoint /products/<id>/analytics/
\ No newline at end of file
@@ -0,0 +1,130 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils.timezone import localdate
+
+from .analytics import window_start
+from .models import ArchivedInteraction, ArchivedReview, ArchivedReviewComment, Interaction, Review, ReviewComment, UserStats
+from .models import UserReviewDay
+
+LEADERBOARD_DAYS = 30
+LEADERBOARD_SIZE = 5
+
+
+def compute(user_id):
+    # full recount from the base tables, archived rows included (first use of a user, and rebuilds)
+    totals = {}
+    for review_model, interaction_model, comment_model in (
+        (Review, Interaction, ReviewComment),
+        (ArchivedReview, ArchivedInteraction, ArchivedReviewComment),
+    ):
+        counts = {
+            **review_model.objects.filter(user_id=user_id).aggregate(
+                review_count=Count('id'),
+                visible_review_count=Count('id', filter=Q(is_visible=True)),
+                rating_sum=Sum('rating'),
+                visible_rating_sum=Sum('rating', filter=Q(is_visible=True)),
+            ),
+            **interaction_model.objects.filter(review__user_id=user_id).aggregate(
+                likes_received=Count('id', filter=Q(reaction='like')),
+                dislikes_received=Count('id', filter=Q(reaction='dislike')),
+            ),
+            'comment_count': comment_model.objects.filter(user_id=user_id).count(),
+        }
+        for field, value in counts.items():
+            totals[field] = totals.get(field, 0) + (value or 0)
+    return totals
+
+
+def adjust(user_id, create=True, **deltas):
+    # apply counter deltas with one UPDATE; a missing row is built from the base tables
+    # (which already include the write being counted). Delete handlers pass create=False:
+    # the user may be the one being deleted.
+    changes = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    if not UserStats.objects.filter(user_id=user_id).update(**changes) and create:
+        UserStats.objects.get_or_create(user_id=user_id, defaults=compute(user_id))
+
+
+def add_to_day(user_id, created_at, sign=1):
+    # add (sign=1) or remove (sign=-1) one review from its author's daily row
+    day = localdate(created_at)
+    if UserReviewDay.objects.filter(user_id=user_id, day=day).update(count=Greatest(F('count') + sign, 0)) or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            UserReviewDay.objects.create(user_id=user_id, day=day, count=1)
+    except IntegrityError:
+        # created by a concurrent writer in the meantime
+        UserReviewDay.objects.filter(user_id=user_id, day=day).update(count=F('count') + 1)
+
+
+def top_reviewers(days=LEADERBOARD_DAYS, limit=LEADERBOARD_SIZE):
+    # most reviews written in the last `days` days, approved or not, summed from the daily rows;
+    # the window is the one analytics.product_summary uses
+    return list(
+        UserReviewDay.objects.filter(day__gte=window_start(days))
+        .values('user_id', 'user__username')
+        .annotate(review_count=Sum('count'))
+        .filter(review_count__gt=0)
+        .order_by('-review_count', 'user_id')[:limit]
+    )
+
+
+def get_stats(user):
+    # read-only: a user without a row (the migration and adjust() create one on first
+    # activity) gets an unsaved recount, so a GET never writes
+    stats = UserStats.objects.filter(user=user).first()
+    if stats is None:
+        stats = UserStats(user=user, **compute(user.pk))
+    stats.user = user  # already loaded, spares the serializers a query
+    return stats
+
+
+def rebuild():
+    # recount every user that has any activity, with grouped queries over each table
+    totals = {}
+
+    def add(user_id, counts):
+        row = totals.setdefault(user_id, {})
+        for field, value in counts.items():
+            row[field] = row.get(field, 0) + (value or 0)
+
+    for review_model, interaction_model, comment_model in (
+        (Review, Interaction, ReviewComment),
+        (ArchivedReview, ArchivedInteraction, ArchivedReviewComment),
+    ):
+        for row in review_model.objects.values('user_id').order_by().annotate(
+            review_count=Count('id'),
+            visible_review_count=Count('id', filter=Q(is_visible=True)),
+            rating_sum=Sum('rating'),
+            visible_rating_sum=Sum('rating', filter=Q(is_visible=True)),
+        ):
+            add(row.pop('user_id'), row)
+        for row in interaction_model.objects.values('review__user_id').order_by().annotate(
+            likes_received=Count('id', filter=Q(reaction='like')),
+            dislikes_received=Count('id', filter=Q(reaction='dislike')),
+        ):
+            add(row.pop('review__user_id'), row)
+        for row in comment_model.objects.values('user_id').order_by().annotate(comment_count=Count('id')):
+            add(row.pop('user_id'), row)
+
+    days = {}
+    for model in (Review, ArchivedReview):
+        rows = (
+            model.objects
+            .annotate(day=TruncDate('created_at'))
+            .values('user_id', 'day')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            key = (row['user_id'], row['day'])
+            days[key] = days.get(key, 0) + row['n']
+
+    UserStats.objects.all().delete()
+    UserStats.objects.bulk_create([UserStats(user_id=user_id, **counts) for user_id, counts in totals.items()], batch_size=500)
+    UserReviewDay.objects.all().delete()
+    UserReviewDay.objects.bulk_create([UserReviewDay(user_id=user_id, day=day, count=n) for (user_id, day), n in days.items()], batch_size=1000)
+    return len(totals)
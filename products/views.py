@@ -2,21 +2,40 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from rest_framework import viewsets, permissions ,status ,generics ,filters
-from .models import Product, Review ,Notification ,Interaction ,Report , ReviewComment
+from .models import Product, Review ,Notification , ReviewComment
 from .serializers import RegisterSerializer,ProductSerializer, ReviewSerializer ,ReviewCommentSerializer,InteractionSerializer ,ReportSerializer , NotificationSerializer
+from .serializers import UserSummarySerializer, ReviewerProfileSerializer, ChangeEventSerializer, ArchivedReviewSerializer
+from .serializers import RelatedProductSerializer
 from .permissions import IsOwnerOrReadOnly, IsAdminForApproval , IsAdminOrSuperUser
+from .throttling import TokenBucketThrottle
+from .filters import ProductFilter, facet_counts
+from . import inbox
+from . import timeseries
+from . import similarity
+from . import analytics
+from . import moderation
+from . import userstats
+from . import events
+from . import auth
+from . import sync
+from .models import UserStats, ArchivedReview, RelatedProduct
+from .comments import load_thread, build_tree
+from django.shortcuts import get_object_or_404
+from datetime import date
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.filterset import filterset_factory
+from django.http import Http404
 # decorators and response
 from rest_framework.decorators import action
 from rest_framework.response import Response
-# time and text analysis
+# time
 from django.utils.timezone import now, timedelta
-from collections import Counter
-import re
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser ,IsAuthenticated, AllowAny
 from django.contrib.auth.models import User
-from django.db.models import Count , Avg, Q
+from django.db.models import F
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
 
 
 class RegisterView(generics.CreateAPIView):
@@ -27,10 +46,12 @@ class RegisterView(generics.CreateAPIView):
 # View تسجيل دخول JWT (token obtain)
 class CustomTokenObtainPairView(TokenObtainPairView):
     permission_classes = [AllowAny]
+    compress_response = False  # never compress responses carrying secrets (BREACH)
 
 # View لتحديث التوكن
 class CustomTokenRefreshView(TokenRefreshView):
     permission_classes = [AllowAny]
+    compress_response = False
 
 # View لتسجيل الخروج (عمل blacklist للتوكن)
 class LogoutView(APIView):
@@ -51,51 +72,180 @@ class LogoutView(APIView):
 
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class BatchRetrieveMixin:
+    # multi-get: GET ?ids=1,2,3 or POST {"ids": [1, 2, 3]}
+    batch_max_ids = 100
+
+    def get_batch_ids(self, request):
+        raw = request.data.get('ids') if request.method == 'POST' else request.query_params.get('ids')
+        if raw is None:
+            raise ValidationError({'ids': 'This parameter is required.'})
+        if isinstance(raw, str):
+            raw = [part for part in raw.split(',') if part.strip()]
+        if not isinstance(raw, (list, tuple)):
+            raise ValidationError({'ids': 'Expected a list of ids.'})
+        # real integers or digit strings only: int() would also take true/false and 1.5
+        if not all(
+            (isinstance(value, int) and not isinstance(value, bool))
+            or (isinstance(value, str) and value.strip().isascii() and value.strip().isdigit())
+            for value in raw
+        ):
+            raise ValidationError({'ids': 'All ids must be integers.'})
+        ids = [int(value) for value in raw]
+        ids = list(dict.fromkeys(ids))  # drop duplicates, keep request order
+        if not ids:
+            raise ValidationError({'ids': 'At least one id is required.'})
+        if len(ids) > self.batch_max_ids:
+            raise ValidationError({'ids': f'At most {self.batch_max_ids} ids per request.'})
+        return ids
+
+    def record_batch_views(self, objects):
+        # hook for models that track views
+        pass
+
+    def batch_response(self, request):
+        ids = self.get_batch_ids(request)
+        found = self.get_queryset().in_bulk(ids)  # one query for all ids
+        objects = [found[pk] for pk in ids if pk in found]
+        self.record_batch_views(objects)
+        serializer = self.get_serializer(objects, many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in found],
+        })
+
+
+class DeltaSyncMixin:
+    # list() with ETag / If-None-Match (304) and ?since=<sync_token> deltas, see products/sync.py
+    sync_since = None
+    sync_deleted_kinds = ()
+    sync_deleted_field = 'review_id'
+
+    def get_sync_scope(self):
+        # every row the user may list, before query filters and serializer annotations
+        return self.queryset.all()
+
+    def get_sync_deleted_filter(self):
+        # payload filter for the delete events, e.g. {'user_id': ...}
+        return {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.sync_since is not None:
+            queryset = sync.changed(queryset, self.sync_since[0])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = sync.parse_token(since)
+            except ValueError:
+                raise ValidationError({'since': 'Invalid sync token.'})
+        tag = sync.etag(self.filter_queryset(self.get_sync_scope()), request)  # one aggregate
+        if sync.not_modified(request, tag):
+            return sync.finish(Response(status=status.HTTP_304_NOT_MODIFIED), tag)
+
+        token = sync.current_token()
+        self.sync_since = since or None
+        response = super().list(request, *args, **kwargs)
+        if since:
+            response.data = {
+                'results': response.data,
+                'deleted': sync.removed_ids(
+                    self.get_sync_scope(), self.filter_queryset(self.get_sync_scope()), since[0], since[1],
+                    sync.parse_token(token)[1], self.sync_deleted_kinds, self.sync_deleted_field,
+                    **self.get_sync_deleted_filter(),
+                ),
+                'sync_token': token,
+            }
+        response['X-Sync-Token'] = token
+        return sync.finish(response, tag)
+
+
+class ProductViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAdminOrSuperUser]
     # Anyone can view products, only authenticated users can add/edit
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = ProductFilter
+    ordering_fields = ['name', 'price', 'created_at', 'rating_avg']
+
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        # Price and rating bucket counts for the current filters (same query params as the list)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(facet_counts(queryset))
+
+    @action(detail=False, methods=['get', 'post'], url_path='batch', url_name='batch', permission_classes=[AllowAny])
+    def batch_retrieve(self, request):
+        # Get many products by id in one request
+        return self.batch_response(request)
 
     @action(detail=True, methods=['get'], url_path='analytics')
     def product_analytics(self, request, pk=None):
-        # Get product by ID
+        # Read the precomputed analytics of the last 30 days (products/analytics.py)
         product = self.get_object()
-    
-        # Last 30 days range
-        last_30_days = now() - timedelta(days=30)
-    
-        # Filter recent visible reviews for this product
-        recent_reviews = Review.objects.filter(product=product, created_at__gte=last_30_days, is_visible=True)
-
-        # Calculate average rating
-        avg_rating = round(recent_reviews.aggregate(Avg('rating'))['rating__avg'] or 0, 2)
+        stats = analytics.product_summary(product.id)
 
+        # Return analytics data
+        return Response({
+            'average_rating_last_30_days': stats['average_rating'],
+            'review_count_last_30_days': stats['review_count'],
+            'top_recent_rating': stats['max_rating'],
+            'common_words': stats['common_words'],
+            'average_sentiment_last_30_days': stats['average_sentiment'],
+            'sentiment_last_30_days': stats['sentiment'],
+        })
 
-        # Count how many reviews
-        review_count = recent_reviews.count()
 
-        # Get highest rated review
-        top_rating = recent_reviews.order_by('-rating').first()
-        top_rating_value = top_rating.rating if top_rating else None
+    @action(detail=True, methods=['get'], url_path='rating-trend')
+    def rating_trend(self, request, pk=None):
+        # Rating time series: ?start=YYYY-MM-DD&end=YYYY-MM-DD&granularity=day|week|month
+        product = self.get_object()
 
-        # Count most common words in reviews
-        words = []
-        for review in recent_reviews:
-            words += re.findall(r'\b\w+\b', review.review_text.lower())  # Extract words
-        word_counts = Counter(words)
-        most_common_words = word_counts.most_common(5)
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in timeseries.GRANULARITIES:
+            return Response({'error': 'granularity must be day, week or month.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else now().date()
+            start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=364)
+        except ValueError:
+            return Response({'error': 'start and end must be dates (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days > 366 * 5:
+            return Response({'error': 'start must be before end, at most 5 years apart.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Return analytics data
         return Response({
-            'average_rating_last_30_days': avg_rating,
-            'review_count_last_30_days': review_count,
-            'top_recent_rating': top_rating_value,
-            'common_words': most_common_words
+            'product': product.id,
+            'granularity': granularity,
+            'start': start,
+            'end': end,
+            'series': timeseries.rating_series(product, start, end, granularity),
         })
 
+    @action(detail=True, methods=['get'], url_path='related')
+    def related(self, request, pk=None):
+        # "Customers who rated this highly also rated" (?limit=<n>), precomputed by `manage.py build_related_products`
+        try:
+            product_id = int(pk)
+        except ValueError:
+            raise Http404
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = list(
+            RelatedProduct.objects.filter(product_id=product_id)
+            .select_related('related')
+            .order_by('-score', 'related_id')[:limit]
+        )
+        if not rows:
+            self.get_object()  # 404 for unknown products, [] for products without neighbours
+        return Response({'product': product_id, 'results': RelatedProductSerializer(rows, many=True).data})
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(DeltaSyncMixin, BatchRetrieveMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
@@ -103,6 +253,8 @@ class ReviewViewSet(viewsets.ModelViewSet):
     filterset_fields = ['product', 'rating']  
     ordering_fields = ['created_at', 'rating', 'likes_count']  
     ordering = ['-created_at'] 
+    throttle_scope = None  # set per action, limits in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+    sync_deleted_kinds = ('review.deleted', 'review.archived')
 
     def get_permissions(self):
         # Set different permissions for different actions
@@ -112,17 +264,89 @@ class ReviewViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         elif self.action == 'approve_review':
             permission_classes = [permissions.IsAuthenticated, IsAdminForApproval]
+        elif self.action == 'batch_retrieve':
+            permission_classes = [AllowAny]
         else:
             permission_classes = [permissions.IsAuthenticatedOrReadOnly]
         return [permission() for permission in permission_classes]
 
+    # query profile per action: the joins the serializer/notification need, and for reads only
+    # the columns ReviewSerializer shows (the author row is just the username, not the password hash)
+    read_columns = ('id', 'product', 'user__username', 'rating', 'review_text', 'is_visible', 'created_at', 'views_count', 'sentiment_score')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve', 'batch_retrieve']:
+            queryset = queryset.select_related('user').only(*self.read_columns)
+            queryset = queryset.with_reaction_counts().with_user_state(self.request.user)
+        elif self.action in ['update', 'partial_update']:
+            # saved back whole: no only()
+            queryset = queryset.select_related('user').with_reaction_counts().with_user_state(self.request.user)
+        elif self.action == 'approve_review':
+            queryset = queryset.select_related('user', 'product')  # used by the notification
+        return queryset
+
+    def get_archived_queryset(self):
+        return ArchivedReview.objects.select_related('user').only(*self.read_columns, 'likes_count', 'dislikes_count', 'archived_at')
+
+    def get_sync_deleted_filter(self):
+        product = self.request.query_params.get('product')
+        return {'product_id': int(product)} if product and product.isdigit() else {}
+
+    def include_archived(self):
+        return self.request.query_params.get('include_archived', '').lower() in ('true', '1')
+
+    def list(self, request, *args, **kwargs):
+        # ?include_archived=true appends archived reviews (same filters) after the live ones;
+        # archived reviews never change, so deltas (?since=) and 304s leave them out
+        response = super().list(request, *args, **kwargs)
+        if self.include_archived() and response.status_code == status.HTTP_200_OK and self.sync_since is None:
+            archived = filterset_factory(ArchivedReview, fields=self.filterset_fields)(
+                request.query_params, queryset=self.get_archived_queryset().order_by('-created_at'),
+            ).qs
+            response.data = list(response.data) + ArchivedReviewSerializer(archived, many=True).data
+        return response
+
     def perform_create(self, serializer):
         # Set current user as review author
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user)
+            events.record('review.created', review.id, actor=self.request.user, **events.review_payload(review))
+        # a new review has no reactions or reports yet: spare the serializer four queries
+        review.likes_count = review.dislikes_count = 0
+        review.current_user_reaction, review.current_user_reported = None, False
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            review = serializer.save()
+            previous = getattr(review, '_previous_state', None)  # set by signals.remember_review_state
+            events.record('review.updated', review.id, actor=self.request.user, **events.review_payload(review, previous))
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            events.record('review.deleted', instance.id, actor=self.request.user, **events.review_payload(instance))
+            instance.delete()
+
+    def record_batch_views(self, reviews):
+        # Increase views count of all fetched reviews in one UPDATE
+        Review.objects.filter(pk__in=[review.pk for review in reviews]).update(views_count=F('views_count') + 1)
+        for review in reviews:
+            review.views_count += 1
+
+    @action(detail=False, methods=['get', 'post'], url_path='batch', url_name='batch')
+    def batch_retrieve(self, request):
+        # Get many reviews by id in one request
+        return self.batch_response(request)
 
     def retrieve(self, request, *args, **kwargs):
-        # Get review by ID
-        instance = self.get_object()
+        # Get review by ID (archived reviews too with ?include_archived=true)
+        try:
+            instance = self.get_object()
+        except Http404:
+            if not self.include_archived():
+                raise
+            archived = generics.get_object_or_404(self.get_archived_queryset(), pk=kwargs['pk'])
+            return Response(ArchivedReviewSerializer(archived).data)
     
         # Increase views count
         instance.views_count += 1
@@ -136,18 +360,19 @@ class ReviewViewSet(viewsets.ModelViewSet):
     def approve_review(self, request, pk=None):
         # Set review as visible
         review = self.get_object()
-        review.is_visible = True
-        review.save()
+        with transaction.atomic():
+            review.is_visible = True
+            review.save()
+            events.record('review.approved', review.id, actor=request.user, **events.review_payload(review))
 
-        # Notify review author
-        Notification.objects.create(
-            user=review.user,
-            message=f"Your review for the product '{review.product.name}' has been approved."
-        )
+            # Notify review author
+            notification = inbox.notify(review.user, f"Your review for the product '{review.product.name}' has been approved.")
+            events.record('notification.created', review.id, notification.id, actor=request.user, user_id=review.user_id)
 
         return Response({'status': 'Review approved and user notified ✅'})
 
-    @action(detail=True, methods=['post'], url_path='react')
+    @action(detail=True, methods=['post'], url_path='react',
+            throttle_classes=[TokenBucketThrottle], throttle_scope='review_react')
     def react_to_review(self, request, pk=None):
         # React to a review
         review = self.get_object()
@@ -162,12 +387,16 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer = InteractionSerializer(data=data, context={'request': request})
     
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                interaction = serializer.save(user=request.user)
+                events.record('reaction.created', review.id, interaction.id, actor=request.user,
+                              reaction=interaction.reaction, review_author_id=review.user_id)
             return Response({'status': 'Reaction saved successfully!'}, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['post'], url_path='report')
+    @action(detail=True, methods=['post'], url_path='report',
+            throttle_classes=[TokenBucketThrottle], throttle_scope='review_report')
     def report_review(self, request, pk=None):
         # Report a review
         review = self.get_object()
@@ -181,31 +410,48 @@ class ReviewViewSet(viewsets.ModelViewSet):
         # Validate and save report
         serializer = ReportSerializer(data=data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                report = serializer.save(user=request.user)
+                events.record('report.created', review.id, report.id, actor=request.user, reason=report.reason[:200])
             return Response({'status': 'Report submitted successfully'}, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
 ######### comments on reviews ##############
 ##urls ##
-### GET /reviews/<review_id>/comments/ ##
+### GET /reviews/<review_id>/comments/?parent=<id>&depth=<n|all>&limit=<n>&after=<id> ##
 ### POST /reviews/<review_id>/add-comment/ ###
 
     @action(detail=True, methods=['get'], url_path='comments')
     def list_comments(self, request, pk=None):
-        # عرض كل التعليقات المرتبطة بالمراجعة
+        # عرض التعليقات المرتبطة بالمراجعة مع الردود
         review = self.get_object()
-        comments = review.comments.all().order_by('-created_at')
-        serializer = ReviewCommentSerializer(comments, many=True)
-        return Response(serializer.data)
-
-    @action(detail=True, methods=['post'], url_path='add-comment', permission_classes=[IsAuthenticated])
+        params = request.query_params
+        try:
+            parent_id = int(params['parent']) if 'parent' in params else None
+            after = int(params['after']) if 'after' in params else None
+            depth = None if params.get('depth', 'all') == 'all' else max(int(params['depth']), 0)
+            limit = min(max(int(params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'parent, after, depth and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        parent = get_object_or_404(ReviewComment, pk=parent_id, review=review) if parent_id is not None else None
+        comments, next_cursor = load_thread(review, parent=parent, depth=depth, limit=limit, after=after)
+        results = build_tree(comments, ReviewCommentSerializer(comments, many=True).data)
+        if parent is None:
+            results.reverse()  # newest top-level comments first
+        return Response({'results': results, 'next_cursor': next_cursor})
+
+    @action(detail=True, methods=['post'], url_path='add-comment', permission_classes=[IsAuthenticated],
+            throttle_classes=[TokenBucketThrottle], throttle_scope='review_comment')
     def add_comment(self, request, pk=None):
         # إضافة تعليق جديد على مراجعة
         review = self.get_object()
-        serializer = ReviewCommentSerializer(data=request.data, context={'request': request})
+        serializer = ReviewCommentSerializer(data=request.data, context={'request': request, 'review': review})
         if serializer.is_valid():
-            serializer.save(user=request.user, review=review)
+            with transaction.atomic():
+                comment = serializer.save(user=request.user, review=review)
+                events.record('comment.created', review.id, comment.id, actor=request.user, parent_id=comment.parent_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -215,101 +461,207 @@ class GeneralAnalyticsView(APIView):
     permission_classes = [IsAdminUser]  # Only admin access
 
     def get(self, request):
-        # Last 30 days
-        last_30_days = now() - timedelta(days=30)
+        # Top reviewers in the last 30 days (every review written), from the per-user daily rows
+        recent_reviewers = [
+            {"username": row['user__username'], "review_count": row['review_count']}
+            for row in userstats.top_reviewers()
+        ]
 
-        # Top reviewers in last 30 days
+        # Top reviewers (all time, every review written) from the precomputed user stats, index on review_count
         top_reviewers = (
-            User.objects
-            .filter(reviews__created_at__gte=last_30_days)
-            .annotate(review_count=Count('reviews'))
+            UserStats.objects
+            .filter(review_count__gt=0)
+            .select_related('user')
             .order_by('-review_count')[:5]
         )
 
         data = [
             {
-                "username": user.username,
-                "review_count": user.review_count
+                "username": stats.user.username,
+                "review_count": stats.review_count
             }
-            for user in top_reviewers
+            for stats in top_reviewers
         ]
 
-        # Top-rated products (avg rating) in last 30 days
-        top_rated_products = (
-            Product.objects
-            .annotate(
-                avg_rating = Avg(
-                    'reviews__rating',
-                    filter=Q(reviews__created_at__gte=last_30_days, reviews__is_visible=True)
-                )
-            )
-            .filter(avg_rating__isnull=False)
-            .order_by('-avg_rating')[:5]
-        )
-
+        # Top-rated products (avg rating) and most liked review in last 30 days, precomputed
         top_products_data = [
             {
-                "product_id": product.id,
-                "product_name": product.name,
-                "average_rating": round(product.avg_rating, 2)
+                "product_id": row['product_id'],
+                "product_name": row['product__name'],
+                "average_rating": round(row['average_rating'], 2)
             }
-            for product in top_rated_products
+            for row in analytics.top_rated_products()
         ]
 
-        # Most liked review in last 30 days
-        top_review_id = (
-            Interaction.objects
-            .filter(reaction='like', review__created_at__gte=last_30_days, review__is_visible=True)
-            .values('review')
-            .annotate(like_count=Count('id'))
-            .order_by('-like_count')
-            .first()
-        )
-
         top_review_data = None
-
-        if top_review_id:
-            top_review_instance = Review.objects.get(id=top_review_id['review'])
-            top_review_data = ReviewSerializer(top_review_instance, context={'request': request}).data
-            top_review_data['like_count'] = top_review_id['like_count']
+        top_review = analytics.most_liked_review()
+        if top_review:
+            top_review_instance = (
+                Review.objects.select_related('user').with_reaction_counts().with_user_state(request.user)
+                .filter(id=top_review[0]).first()
+            )
+            if top_review_instance:
+                top_review_data = ReviewSerializer(top_review_instance, context={'request': request}).data
+                top_review_data['like_count'] = top_review[1]
 
         return Response({
-            "top_reviewers_last_30_days": data,
+            "top_reviewers_last_30_days": recent_reviewers,
+            "top_reviewers_all_time": data,
             "top_rated_products_last_30_days": top_products_data,
             "top_review_by_likes": top_review_data
         })
 
 
+# Activity summary of the current user
+class UserSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(UserSummarySerializer(userstats.get_stats(request.user)).data)
+
+
+# Public reviewer profile
+class ReviewerProfileView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, username):
+        user = get_object_or_404(User, username=username)
+        return Response(ReviewerProfileSerializer(userstats.get_stats(user)).data)
+
+
+class AuthMetricsView(APIView):
+    # login throughput and hashing pool counters of this process (products/auth.py)
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(auth.metrics())
+
+
 class AdminReportsView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        from .models import Review
-        from django.db.models import Q
+        # Moderation counts over ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: the last 7 days), in total and per day
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else now().date()
+            start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=moderation.DEFAULT_DAYS - 1)
+        except ValueError:
+            return Response({'error': 'start and end must be dates (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days >= moderation.MAX_DAYS:
+            return Response({'error': f'start must be before end, at most {moderation.MAX_DAYS} days.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(moderation.report(start, end))
 
-        # Count not approved reviews
-        not_approved = Review.objects.filter(is_visible=False).count()
+# Near-duplicate review clusters for moderation (?limit=<n>)
+class DuplicateReviewsView(APIView):
+    permission_classes = [IsAdminUser]
 
-        # Count low rated reviews (1 or 2 stars)
-        low_rated = Review.objects.filter(rating__in=[1, 2], is_visible=True).count()
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        clusters = similarity.duplicate_clusters()
+        page = clusters[:limit]
+        review_ids = [review_id for cluster in page for review_id in cluster['review_ids']]
+        reviews = (
+            Review.objects.filter(id__in=review_ids)
+            .select_related('user')
+            .only('id', 'product_id', 'rating', 'review_text', 'created_at', 'user__username')
+            .in_bulk()
+        )
 
-        # Count offensive reviews (match bad words)
-        offensive_words = ['bad', 'stupid', 'poor', 'shit', 'disgusting']
-        offensive_reviews = Review.objects.filter(
-            is_visible=True,
-            review_text__iregex=r'(' + '|'.join(offensive_words) + ')'
-        ).count()
+        data = []
+        for cluster in page:
+            members = [reviews[review_id] for review_id in cluster['review_ids'] if review_id in reviews]
+            data.append({
+                'size': len(members),
+                'max_similarity': round(cluster['max_similarity'], 2),
+                'user_count': len({review.user_id for review in members}),
+                'product_count': len({review.product_id for review in members}),
+                'reviews': [
+                    {
+                        'id': review.id,
+                        'user': review.user.username,
+                        'product': review.product_id,
+                        'rating': review.rating,
+                        'created_at': review.created_at,
+                        'review_text': review.review_text[:200],
+                    }
+                    for review in members
+                ],
+            })
+
+        return Response({'cluster_count': len(clusters), 'clusters': data})
+
+
+# Change feed: GET /api/events/?after=<last id seen>&limit=<n>&kind=review.created,review.deleted
+class ChangeFeedView(APIView):
+    permission_classes = [IsAdminUser]
 
+    def get(self, request):
+        params = request.query_params
+        try:
+            after = max(int(params.get('after', 0)), 0)
+            limit = min(max(int(params.get('limit', events.FEED_LIMIT)), 1), events.FEED_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'after and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind for kind in params.get('kind', '').split(',') if kind]
+
+        batch = events.read_feed(after, limit + 1, kinds)
+        has_more = len(batch) > limit
+        batch = batch[:limit]
         return Response({
-            "not_approved_reviews": not_approved,
-            "low_rated_reviews": low_rated,
-            "offensive_reviews": offensive_reviews
+            'results': ChangeEventSerializer(batch, many=True).data,
+            'next_cursor': batch[-1].id if batch else after,  # pass back as ?after= to resume
+            'has_more': has_more,
         })
 
-# List notifications for user
-class NotificationListView(generics.ListAPIView):
+
+# List notifications for user (?unread=true for unread only, ?since=<sync_token> for changes)
+class NotificationListView(DeltaSyncMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    sync_deleted_kinds = ('notification.deleted',)
+    sync_deleted_field = 'object_id'
+
+    def get_sync_scope(self):
+        return Notification.objects.filter(user=self.request.user)
+
+    def get_sync_deleted_filter(self):
+        return {'user_id': self.request.user.pk}
+
+    def filter_queryset(self, queryset):
+        if self.request.query_params.get('unread', '').lower() in ('true', '1'):
+            queryset = queryset.filter(is_read=False)  # served by the (user, is_read, created_at) index
+        return super().filter_queryset(queryset)
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        return self.get_sync_scope().order_by('-created_at')
+
+
+# Unread notifications counter
+class NotificationUnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': inbox.unread_count(request.user)})
+
+
+# Mark notifications as read: {"ids": [1, 2]} or {} for all
+class NotificationMarkReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list):
+                return Response({'error': 'ids must be a list.'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                ids = [int(value) for value in ids]
+            except (TypeError, ValueError):
+                return Response({'error': 'All ids must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        marked = inbox.mark_read(request.user, ids)
+        return Response({'marked_read': marked, 'unread_count': inbox.unread_count(request.user)})